@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+from rich.table import Table
+
+# Local imports
+from ap_faas.utils.logger import console, logger
+from benchmarks.cases import BENCHMARKS, run_case
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Metrics where a higher value is an improvement, the rest are costs
+HIGHER_IS_BETTER = ("_per_second",)
+
+
+def run_benchmark(name: str, params: dict, repeat: int) -> dict:
+    """
+    The function runs a benchmark in fresh processes, so that its peak memory
+    is its own, and keeps the median of each metric.
+
+    Parameters:
+      name (str): Name of the benchmark.
+      params (dict): Parameters of the benchmark.
+      repeat (int): Number of runs.
+
+    Returns:
+      dict: Median of each metric
+    """
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+            runs.append(executor.submit(run_case, name, params).result())
+
+    return {
+        metric: statistics.median(run[metric] for run in runs) for metric in runs[0]
+    }
+
+
+def compare_results(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    The function compares each metric with the baseline and prints the changes.
+
+    Parameters:
+      results (dict): Results of the current run.
+      baseline (dict): Results of the baseline.
+      threshold (float): Relative change flagged as a regression.
+
+    Returns:
+      list: Regressed metrics
+    """
+    table = Table(title="Benchmarks", title_justify="left")
+    table.add_column("Benchmark")
+    table.add_column("Metric")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Current", justify="right")
+    table.add_column("Change", justify="right")
+
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+
+        # Results of other parameters are not comparable
+        if previous is not None and previous["params"] != result["params"]:
+            logger.warning(f"{name}: parameters differ from the baseline, skipped")
+            previous = None
+
+        for metric, value in result["metrics"].items():
+            reference = previous["metrics"].get(metric) if previous else None
+            if not reference:
+                table.add_row(name, metric, "-", f"{value:.2f}", "-")
+                continue
+
+            change = (value - reference) / reference
+            worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+            style = "red" if worse > threshold else "green" if worse < 0 else ""
+            if worse > threshold and metric != "wall_seconds":
+                regressions.append(f"{name}.{metric}")
+
+            table.add_row(
+                name,
+                metric,
+                f"{reference:.2f}",
+                f"{value:.2f}",
+                f"[{style}]{change:+.1%}[/{style}]" if style else f"{change:+.1%}",
+            )
+
+    console.print(table)
+
+    return regressions
+
+
+def main() -> int:
+    """
+    The benchmarks main function.
+
+    Returns:
+      int: Exit status (1 if a metric regressed)
+    """
+    parser = argparse.ArgumentParser(
+        prog="benchmarks",
+        description="Run the benchmarks of the fetch and trace pipelines \
+        and compare them with a baseline.",
+    )
+    parser.add_argument(
+        "-b",
+        "--benchmark",
+        action="append",
+        choices=list(BENCHMARKS),
+        dest="benchmarks",
+        help="Benchmark to run (every benchmark if not given).",
+    )
+    parser.add_argument(
+        "-q",
+        "--quick",
+        action="store_true",
+        dest="quick",
+        help="Run the benchmarks with smaller sizes.",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        action="store",
+        type=int,
+        dest="repeat",
+        default=3,
+        help="Number of runs of each benchmark (median kept).",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="output",
+        help="Results file (benchmarks/results/<timestamp>.json by default).",
+    )
+    parser.add_argument(
+        "--baseline",
+        dest="baseline",
+        default=os.path.join(BENCHMARKS_DIR, "baseline.json"),
+        help="Baseline results file.",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        dest="save_baseline",
+        help="Store the results as the new baseline.",
+    )
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        action="store",
+        type=float,
+        dest="threshold",
+        default=0.1,
+        help="Relative change flagged as a regression.",
+    )
+    args = parser.parse_args()
+
+    results: dict = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "quick": args.quick,
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "benchmarks": {},
+    }
+
+    for name in args.benchmarks or list(BENCHMARKS):
+        params = BENCHMARKS[name][2 if args.quick else 1]
+        logger.info(f"Running {name} {params}")
+        results["benchmarks"][name] = {
+            "params": params,
+            "metrics": run_benchmark(name, params, args.repeat),
+        }
+
+    output = args.output or os.path.join(
+        BENCHMARKS_DIR, "results", f"{int(time.time())}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    logger.info(f"Results saved: {os.path.relpath(output)}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        if baseline.get("machine") != results["machine"]:
+            logger.warning("Baseline recorded on another machine")
+    else:
+        logger.warning("Baseline not found, nothing to compare")
+
+    regressions = compare_results(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        logger.success(f"Baseline saved: {os.path.relpath(args.baseline)}")
+
+    if regressions:
+        logger.error(
+            f"Regressions above {args.threshold:.0%}: {', '.join(regressions)}"
+        )
+        return 1
+
+    logger.success("No regression found")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
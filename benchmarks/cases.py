@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import os
+import resource
+import socket
+import tempfile
+import time
+import uuid
+from multiprocessing import Process
+
+import numpy as np
+import pandas as pd
+from loguru import logger as loguru_logger
+
+# Local imports
+from ap_faas.fetcher import get_concurrent_seq
+from ap_faas.fetcher.fetch import RESULT_TYPES, get_result_columns
+from ap_faas.fetcher.pool import WorkerPool
+from ap_faas.fetcher.sink import merge_results
+from ap_faas.fetcher.table import compile_requests, split_bounds
+from ap_faas.target import serve_target
+from ap_faas.traces import write_function_traces
+from ap_faas.utils.generator import generate_sample
+from ap_faas.utils.histogram import LatencyHistogram
+
+# Response headers captured by the benchmarks
+RESPONSE_HEADERS = ["function-cache", "execution-time", "expiration-time"]
+
+
+def _config(data_size: int, endpoint: str = "http://127.0.0.1:8080") -> dict:
+    """
+    The function creates the configuration of a benchmark experiment.
+
+    Parameters:
+      data_size (int): Number of requests.
+      endpoint (str): Endpoint of the functions.
+
+    Returns:
+      dict: Configuration file
+    """
+    return {
+        "data_size": data_size,
+        "random_seed": 2022,
+        "event": "https",
+        "response_headers": RESPONSE_HEADERS,
+        "functions": [
+            {
+                "name": name,
+                "endpoint": endpoint,
+                "samples": [
+                    {
+                        "path": f"{name}/{sample}",
+                        "method": "GET",
+                        "query_string": {"units": "metric"},
+                        "body": None,
+                    }
+                    for sample in range(10)
+                ],
+            }
+            for name in ["city-weather", "sport-scoring"]
+        ],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_port(port: int, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.05)
+
+    raise Exception(f"Target not listening on port {port}")
+
+
+def _serve_target(port: int) -> None:
+    # Spawned processes start with the logs enabled
+    loguru_logger.disable("ap_faas")
+    serve_target("127.0.0.1", port, {"default": {"service_time": 0}})
+
+
+def bench_fetch(data_size: int, concurrent: int, processes: int) -> dict:
+    """
+    The function measures the throughput and the client latency of the fetch
+    processes against a local target without service time.
+
+    Parameters:
+      data_size (int): Number of requests.
+      concurrent (int): Concurrent size.
+      processes (int): Number of fetch processes.
+
+    Returns:
+      dict: Metrics of the benchmark
+    """
+    port = _free_port()
+    target = Process(target=_serve_target, args=(port,), daemon=True)
+    target.start()
+
+    try:
+        _wait_port(port)
+        requests = compile_requests(
+            generate_sample(_config(data_size, f"http://127.0.0.1:{port}"))
+        )
+        bounds = split_bounds(get_concurrent_seq(len(requests), processes))
+        concurrent_per_core = get_concurrent_seq(concurrent, processes)
+
+        with tempfile.TemporaryDirectory() as parts_dir:
+            with WorkerPool(
+                processes, requests, RESPONSE_HEADERS, {"mode": "pooled"}
+            ) as pool:
+                started = time.perf_counter()
+                results = pool.run(
+                    [
+                        {
+                            "start": start,
+                            "stop": stop,
+                            "concurrent": concurrent_size,
+                            "rate_per_request": 0,
+                            "output_file": os.path.join(
+                                parts_dir, f"process_{index + 1}.csv"
+                            ),
+                            "schedule": None,
+                        }
+                        for index, ((start, stop), concurrent_size) in enumerate(
+                            zip(bounds, concurrent_per_core)
+                        )
+                    ],
+                    0,
+                )
+                elapsed = time.perf_counter() - started
+
+    finally:
+        target.terminate()
+        target.join()
+
+    histogram = LatencyHistogram()
+    for result in results:
+        histogram.merge(result["histogram"])
+    latency = histogram.summary()
+    completed = sum(result["count"] for result in results)
+
+    if completed != data_size:
+        raise Exception(f"{completed} out of {data_size} requests completed")
+
+    return {
+        "requests_per_second": completed / elapsed,
+        "latency_p50_ms": latency["p50"] * 1000,
+        "latency_p99_ms": latency["p99"] * 1000,
+    }
+
+
+def bench_generate_sample(data_size: int) -> dict:
+    """
+    The function measures the generation of the sample data.
+
+    Parameters:
+      data_size (int): Number of requests.
+
+    Returns:
+      dict: Metrics of the benchmark
+    """
+    config_file = _config(data_size)
+
+    started = time.perf_counter()
+    data = generate_sample(config_file)
+    generation = time.perf_counter() - started
+
+    started = time.perf_counter()
+    compile_requests(data)
+    compilation = time.perf_counter() - started
+
+    return {
+        "generate_seconds": generation,
+        "compile_seconds": compilation,
+        "rows_per_second": data_size / (generation + compilation),
+    }
+
+
+def bench_merge_results(data_size: int, processes: int, output_format: str) -> dict:
+    """
+    The function measures the assembly of the test file from the partial
+    results of the fetch processes.
+
+    Parameters:
+      data_size (int): Number of requests.
+      processes (int): Number of partial results files.
+      output_format (str): Output format (csv, parquet or arrow).
+
+    Returns:
+      dict: Metrics of the benchmark
+    """
+    data = generate_sample(_config(data_size))
+    columns = list(data.columns) + get_result_columns(RESPONSE_HEADERS)
+    column_types = {column: "string" for column in data.columns} | RESULT_TYPES
+
+    rng = np.random.default_rng(2022)
+    results = pd.DataFrame(
+        {
+            "request_id": [str(uuid.uuid4()) for _ in range(data_size)],
+            "response_id": [str(uuid.uuid4()) for _ in range(data_size)],
+            "response_status": 200,
+            "response": "x" * 64,
+            "request_time": time.time() + np.arange(data_size) / 1000,
+            "response_time": rng.exponential(0.05, data_size),
+            "response_bytes": 64,
+            "function-cache": "HIT",
+            "execution-time": rng.integers(1, 100, data_size),
+            "expiration-time": 250,
+        }
+    )
+    rows = pd.concat([data, results], axis=1).reindex(columns=columns)
+
+    with tempfile.TemporaryDirectory() as directory:
+        part_files = []
+        for index, (start, stop) in enumerate(
+            split_bounds(get_concurrent_seq(data_size, processes))
+        ):
+            part_files.append(os.path.join(directory, f"process_{index + 1}.csv"))
+            rows.iloc[start:stop].to_csv(part_files[-1], header=False, index=False)
+
+        started = time.perf_counter()
+        test_file = merge_results(
+            part_files,
+            columns,
+            os.path.join(directory, "test_1_concurrency"),
+            output_format,
+            column_types,
+        )
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(test_file)
+
+    return {
+        "merge_seconds": elapsed,
+        "rows_per_second": data_size / elapsed,
+        "file_mb": size / 1024 / 1024,
+    }
+
+
+def bench_write_traces(data_size: int, output_format: str) -> dict:
+    """
+    The function measures the join and storage of the traces of an experiment.
+
+    Parameters:
+      data_size (int): Number of requests.
+      output_format (str): Output format (csv, parquet or arrow).
+
+    Returns:
+      dict: Metrics of the benchmark
+    """
+    rng = np.random.default_rng(2022)
+    response_ids = np.array([str(uuid.uuid4()) for _ in range(data_size)])
+    experimental_data = pd.DataFrame(
+        {
+            "function_name": rng.choice(["city-weather", "sport-scoring"], data_size),
+            "response_id": response_ids,
+            "response_status": np.where(rng.random(data_size) < 0.99, 200, 500),
+            "request_time": time.time() + np.arange(data_size) / 1000,
+            "response_time": rng.exponential(0.05, data_size),
+        }
+    )
+
+    # Traces of most successful requests, in the order of the provider
+    traced = rng.permutation(data_size)[: int(data_size * 0.98)]
+    duration = rng.exponential(40, len(traced))
+    function_traces = pd.DataFrame(
+        {
+            "response_id": response_ids[traced],
+            "duration_ms": duration,
+            "memory_utilization_percentage": rng.uniform(5, 60, len(traced)),
+            "total_memory": 1024,
+            "cpu_total_time_ms": duration * 0.5,
+            "total_network_bytes": rng.integers(500, 50000, len(traced)),
+            "billed_mb_ms": np.ceil(duration) * 1024,
+            "cold_start": rng.random(len(traced)) < 0.05,
+            "version": "$LATEST",
+        }
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        write_function_traces(
+            directory, experimental_data, function_traces, output_format
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "write_seconds": elapsed,
+        "rows_per_second": data_size / elapsed,
+    }
+
+
+# Benchmarks with their parameters (full and quick runs)
+BENCHMARKS: dict = {
+    "fetch_1_process": (
+        bench_fetch,
+        {"data_size": 20000, "concurrent": 100, "processes": 1},
+        {"data_size": 2000, "concurrent": 50, "processes": 1},
+    ),
+    "fetch_scaling": (
+        bench_fetch,
+        {"data_size": 80000, "concurrent": 400, "processes": os.cpu_count() or 1},
+        {"data_size": 8000, "concurrent": 100, "processes": os.cpu_count() or 1},
+    ),
+    "generate_sample": (
+        bench_generate_sample,
+        {"data_size": 1000000},
+        {"data_size": 100000},
+    ),
+    "merge_results_csv": (
+        bench_merge_results,
+        {"data_size": 500000, "processes": 8, "output_format": "csv"},
+        {"data_size": 50000, "processes": 8, "output_format": "csv"},
+    ),
+    "write_traces_csv": (
+        bench_write_traces,
+        {"data_size": 200000, "output_format": "csv"},
+        {"data_size": 20000, "output_format": "csv"},
+    ),
+}
+
+
+def run_case(name: str, params: dict) -> dict:
+    """
+    The function runs a benchmark in the current process.
+
+    Parameters:
+      name (str): Name of the benchmark.
+      params (dict): Parameters of the benchmark.
+
+    Returns:
+      dict: Metrics of the benchmark, with its wall time and peak memory
+    """
+    # The logs of the package would be measured too
+    loguru_logger.disable("ap_faas")
+
+    started = time.perf_counter()
+    metrics = BENCHMARKS[name][0](**params)
+    elapsed = time.perf_counter() - started
+
+    # Maximum resident set size in kilobytes (Linux)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return metrics | {"wall_seconds": elapsed, "peak_rss_mb": peak_rss / 1024}
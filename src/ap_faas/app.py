@@ -7,8 +7,10 @@
 
 # External imports
 import argparse
+import math
 import os
 from datetime import datetime
+from multiprocessing import cpu_count
 from pathlib import Path
 
 import pandas as pd
@@ -16,13 +18,17 @@ import pandas as pd
 # Local imports
 from ap_faas.config import BASE_DIR, OUTPUT_DIR
 from ap_faas.fetcher import init as fetcher
+from ap_faas.fetcher.distributed import AUTHKEY_ENV, serve_agent
+from ap_faas.target import serve_target
 from ap_faas.traces import init as traces
 from ap_faas.utils.file_handler import (
+    is_data_file,
     read_config_file,
+    read_data,
     validate_config_file,
     write_file,
 )
-from ap_faas.utils.generator import generate_sample
+from ap_faas.utils.generator import generate_catalogue, generate_sample
 from ap_faas.utils.logger import logger
 
 
@@ -49,7 +55,11 @@ def run_experiment(filename: str, exp_name: str) -> None:
     logger.info(f"Stating Experiment: {experiment_name}")
 
     logger.info("Generating sample data...\n")
-    sample_data = generate_sample(config_file)
+    sample_data = (
+        generate_catalogue(config_file)
+        if config_file.get("sample_mode", "eager") == "lazy"
+        else generate_sample(config_file)
+    )
 
     # Start time of the experiment
     exp_start_time = datetime.now()
@@ -85,17 +95,22 @@ def run_experiment(filename: str, exp_name: str) -> None:
     logger.success("Experimental result successfully stored")
 
 
-def get_traces(directory: str, resolution: int) -> None:
+def get_traces(
+    directory: str, resolution: int, tail: bool = False, targeted: bool = False
+) -> None:
     """
     Get traces.
 
     :param experiment:str Directory with experimentation.
+    :param resolution:int Size of the windows retrieved.
+    :param tail:bool Extend the window until every response is traced.
+    :param targeted:bool Look up each response instead of scanning every window.
     :return bool
     """
     # Stop if directory not exists
     if directory is None or not os.path.exists(directory):
         raise Exception(
-            "Directory not found: specify directory with .csv(s) and config_used.json"
+            "Directory not found: specify directory with tests and config_used.json"
         )
 
     config_filename = os.path.join(directory, "config_used.json")
@@ -103,25 +118,28 @@ def get_traces(directory: str, resolution: int) -> None:
     # Stop if config.json not exists
     if not os.path.exists(config_filename):
         raise Exception(
-            "config.json not found: specify directory with in .csv(s) and config.json"
+            "config.json not found: specify directory with test files and config.json"
         )
 
     config_file = read_config_file(config_filename)
     test_directory = os.path.join(BASE_DIR, directory)
 
     concurrency_files = list(
-        filter(lambda f: f.endswith(".csv"), os.listdir(test_directory))
+        filter(
+            lambda f: f.startswith("test_") and is_data_file(f),
+            os.listdir(test_directory),
+        )
     )
 
     if len(concurrency_files) != len(config_file["experimental_results"]["test_files"]):
         logger.error(
-            "Length of .csv files found does not match"
+            "Length of test files found does not match"
             "with 'test_files' in config_used.json"
         )
 
     experiment_data = pd.concat(
         [
-            pd.read_csv(os.path.join(test_directory, file)).assign(
+            read_data(os.path.join(test_directory, file)).assign(
                 concurrency=int(file.split("_")[1])
             )
             for file in config_file["experimental_results"]["test_files"]
@@ -134,7 +152,7 @@ def get_traces(directory: str, resolution: int) -> None:
         os.makedirs(traces_directory)
     logger.info(f"Location of traces: {os.path.relpath(traces_directory, BASE_DIR)}")
 
-    traces(config_file, traces_directory, experiment_data, resolution)
+    traces(config_file, traces_directory, experiment_data, resolution, tail, targeted)
 
 
 def experiment() -> None:
@@ -207,13 +225,186 @@ def trace() -> None:
             help="Data resolution",
             default=30,
         )
+        parser.add_argument(
+            "-t",
+            "--tail",
+            action="store_true",
+            dest="tail",
+            help="Extend the window until every successful response is traced.",
+        )
+        parser.add_argument(
+            "--targeted",
+            action="store_true",
+            dest="targeted",
+            help="Look up each response by ID around its request time \
+            instead of scanning every window.",
+        )
 
         args = parser.parse_args()
 
         if args.directory:
-            return get_traces(args.directory, args.resolution)
+            return get_traces(args.directory, args.resolution, args.tail, args.targeted)
         else:
             parser.print_help()
 
     except Exception as e:
         logger.error(e)
+
+
+def agent() -> None:
+    """
+    The agent main function.
+
+    """
+    try:
+        parser = argparse.ArgumentParser(
+            prog="ap-faas",
+            description="Run a load generation agent for a remote experiment. \
+            The experiment lists the agents in `agents` of its configuration file.",
+            epilog="If a bug is found, please report it on the repository.",
+        )
+
+        # Options
+        parser.add_argument(
+            "--host",
+            dest="host",
+            default="127.0.0.1",
+            help="Address to listen on (other than a loopback one, a shared key \
+            is required).",
+        )
+        parser.add_argument(
+            "-p",
+            "--port",
+            action="store",
+            type=int,
+            dest="port",
+            default=6000,
+            help="Port to listen on.",
+        )
+        parser.add_argument(
+            "-k",
+            "--authkey",
+            dest="authkey",
+            help=f"Shared key authenticating the coordinator (default: {AUTHKEY_ENV}).",
+        )
+        parser.add_argument(
+            "-c",
+            "--cpu-percentage",
+            action="store",
+            type=int,
+            dest="cpu_percentage",
+            default=100,
+            help="Percentage of CPU cores used as fetch processes.",
+        )
+
+        args = parser.parse_args()
+
+        processes = max(math.floor(cpu_count() * (args.cpu_percentage / 100)), 1)
+        return serve_agent(args.host, args.port, args.authkey, processes)
+
+    except Exception as e:
+        logger.error(e)
+
+
+def target() -> None:
+    """
+    The target main function.
+
+    """
+    try:
+        parser = argparse.ArgumentParser(
+            prog="ap-faas",
+            description="Run a local target imitating the sample functions, \
+            to benchmark the load generator itself.",
+            epilog="If a bug is found, please report it on the repository.",
+        )
+
+        # Options
+        parser.add_argument(
+            "--host",
+            dest="host",
+            default="127.0.0.1",
+            help="Address to listen on.",
+        )
+        parser.add_argument(
+            "-p",
+            "--port",
+            action="store",
+            type=int,
+            dest="port",
+            default=8080,
+            help="Port to listen on.",
+        )
+        parser.add_argument(
+            "-f",
+            "--file",
+            dest="filename",
+            help="Settings per function (default and functions).",
+        )
+        parser.add_argument(
+            "-s",
+            "--service-time",
+            dest="service_time",
+            help="Default service time in milliseconds \
+            (e.g. 20, uniform:10:30, exponential:20, normal:20:5, lognormal:20:0.5).",
+        )
+        parser.add_argument(
+            "--cold-start-time",
+            dest="cold_start_time",
+            help="Default cold start time in milliseconds, same distributions.",
+        )
+        parser.add_argument(
+            "--cold-start-ratio",
+            action="store",
+            type=float,
+            dest="cold_start_ratio",
+            help="Default fraction of requests forced to a cold start.",
+        )
+        parser.add_argument(
+            "--payload-size",
+            action="store",
+            type=int,
+            dest="payload_size",
+            help="Default size of each response body (bytes).",
+        )
+        parser.add_argument(
+            "-c",
+            "--processes",
+            action="store",
+            type=int,
+            dest="processes",
+            default=1,
+            help="Number of target processes sharing the port.",
+        )
+        parser.add_argument(
+            "--seed",
+            action="store",
+            type=int,
+            dest="seed",
+            help="Seed of the service and cold start times.",
+        )
+
+        args = parser.parse_args()
+
+        config = (
+            read_config_file(args.filename, Path(args.filename).suffix)
+            if args.filename
+            else {}
+        )
+
+        # Options override the default settings of the file
+        config["default"] = (config.get("default") or {}) | {
+            setting: getattr(args, setting)
+            for setting in [
+                "service_time",
+                "cold_start_time",
+                "cold_start_ratio",
+                "payload_size",
+            ]
+            if getattr(args, setting) is not None
+        }
+
+        return serve_target(args.host, args.port, config, args.processes, args.seed)
+
+    except Exception as e:
+        logger.error(e)
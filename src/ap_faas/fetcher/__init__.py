@@ -6,21 +6,39 @@
 # LICENSE file in the root directory of this source tree.
 
 # External imports
-import concurrent.futures
 import math
 import os
+import shutil
 import time
-from concurrent.futures._base import DoneAndNotDoneFutures
+from collections import Counter
+from contextlib import AbstractContextManager, nullcontext
 from multiprocessing import cpu_count
+from typing import Optional, Sequence, Union
 
 import numpy as np
 import pandas as pd
+from rich.table import Table
 
 from ap_faas.config import BASE_DIR
-from ap_faas.fetcher.fetch import prepare_fetch
+from ap_faas.fetcher.body import get_body_policies
+from ap_faas.fetcher.dashboard import Dashboard
+from ap_faas.fetcher.distributed import START_DELAY, AgentPool
+from ap_faas.fetcher.fetch import RESULT_TYPES, get_result_columns
+from ap_faas.fetcher.pool import WorkerPool
+from ap_faas.fetcher.sampler import LAG_THRESHOLD, METRIC_COLUMNS, SAMPLE_INTERVAL
+from ap_faas.fetcher.schedule import (
+    SEND_LAG_THRESHOLD,
+    is_open_loop,
+    read_replay_offsets,
+)
+from ap_faas.fetcher.search import ConcurrencySearch, SloMonitor, check_results
+from ap_faas.fetcher.sink import merge_results
+from ap_faas.fetcher.table import SampleCatalogue, compile_requests, split_bounds
 
 # Local imports
-from ap_faas.utils.logger import logger
+from ap_faas.utils.file_handler import get_output_file, write_data, write_file
+from ap_faas.utils.histogram import PERCENTILES, LatencyHistogram
+from ap_faas.utils.logger import console, logger
 
 
 def get_concurrent_seq(concurrent: int, core_size: int) -> list:
@@ -41,30 +59,174 @@ def get_concurrent_seq(concurrent: int, core_size: int) -> list:
         return [base + (i < extra) for i in range(core_size)]
 
 
+def print_latency_table(latency_summaries: list) -> None:
+    """
+    The function prints the latency percentiles of each concurrent size.
+
+    Parameters:
+      latency_summaries (list): Latency summary per concurrent size.
+    """
+    table = Table(title="Latency (ms)", title_justify="left")
+    table.add_column("Concurrency", justify="right")
+    table.add_column("Count", justify="right")
+    for name in list(PERCENTILES) + ["max"]:
+        table.add_column(name, justify="right")
+
+    for latency in latency_summaries:
+        table.add_row(
+            str(latency["concurrency"]),
+            str(latency["summary"]["count"]),
+            *(
+                f"{latency['summary'][name] * 1000:.1f}"
+                for name in list(PERCENTILES) + ["max"]
+            ),
+        )
+
+    console.print(table)
+
+
+def write_worker_metrics(
+    config_file: dict, exp_dir: str, concurrent_index: int, results: list
+) -> None:
+    """
+    The function stores the resource samples of every fetch process and warns
+    when the event loop of a process lagged, inflating its latencies.
+
+    Parameters:
+      config_file (dict): Fetching configuration file
+      exp_dir (str): Directory of the experimental results.
+      concurrent_index (int): Concurrent index
+      results (list): Summary of the results written by each process
+    """
+    metrics = pd.DataFrame(
+        [sample for result in results for sample in result.get("worker_metrics", [])],
+        columns=METRIC_COLUMNS,
+    ).sort_values(["time", "pid"], kind="stable")
+    if metrics.empty:
+        return
+
+    write_data(
+        metrics,
+        os.path.join(exp_dir, f"worker_metrics_{concurrent_index}_concurrency"),
+        config_file.get("output_format", "csv"),
+    )
+
+    threshold = config_file.get("worker_metrics", {}).get(
+        "lag_threshold", LAG_THRESHOLD
+    )
+    lagged = metrics.loc[metrics["loop_lag"] > threshold]
+    if len(lagged):
+        logger.warning(
+            (
+                f"Event loop lag up to {lagged['loop_lag'].max() * 1000:.0f} ms "
+                f"in {lagged['pid'].nunique()} process(es) "
+                f"({len(lagged)} out of {len(metrics)} samples): the client was "
+                "saturated, latencies may be inflated"
+            )
+        )
+
+
+def check_send_lag(config_file: dict, results: list) -> None:
+    """
+    The function warns when the requests of an open-loop schedule were sent
+    late, so the schedule (or the replayed trace) was not reproduced.
+
+    Parameters:
+      config_file (dict): Fetching configuration file
+      results (list): Summary of the results written by each process
+    """
+    histogram = LatencyHistogram()
+    for result in results:
+        histogram.merge(result["lag_histogram"])
+    if not histogram.total:
+        return
+
+    lag = histogram.summary()
+    threshold = config_file["arrival"].get("lag_threshold", SEND_LAG_THRESHOLD)
+    if lag["p99"] > threshold:
+        logger.warning(
+            (
+                f"Requests sent {lag['mean'] * 1000:.0f} ms late on average "
+                f"(p99 {lag['p99'] * 1000:.0f} ms, max {lag['max'] * 1000:.0f} ms) "
+                "past their scheduled time: the schedule was not reproduced"
+            )
+        )
+
+
+def get_steady_state(results: list) -> Optional[dict]:
+    """
+    The function summarizes the steady state detected by each process.
+
+    Parameters:
+      results (list): Summary of the results written by each process
+
+    Returns:
+      dict: Latency of the steady requests and detection of each process,
+        if the steady state is detected
+    """
+    processes = [
+        result["steady_state"] for result in results if "steady_state" in result
+    ]
+    if not processes:
+        return None
+
+    histogram = LatencyHistogram()
+    for result in results:
+        histogram.merge(result["steady_histogram"])
+
+    steady = sum(process["phase"] == "steady" for process in processes)
+    logger.info(
+        (
+            f"Steady state reached by {steady}/{len(processes)} process(es) after "
+            f"{sum(process['warmup_requests'] for process in processes)} warm-up "
+            f"request(s), {sum(process['ended_early'] for process in processes)} "
+            "ended early "
+            f"({sum(process['skipped_requests'] for process in processes)} "
+            "request(s) skipped)"
+        )
+    )
+
+    return {
+        "summary": histogram.summary(),
+        "histogram": histogram.to_dict(),
+        "processes": processes,
+    }
+
+
 def run_experiment(
     config_file: dict,
+    pool: Union[WorkerPool, AgentPool],
     processes: int,
     concurrent_index: int,
     chunked_data_per_core: list,
     concurrent_per_core: list,
-) -> DoneAndNotDoneFutures[pd.core.frame.DataFrame]:
+    parts_dir: str,
+    replay_offsets: Optional[np.ndarray] = None,
+) -> tuple:
     """
     The function run experiment for asyncronous profiling.
 
     Parameters:
       config_file (dict): Fetching configuration file
+      pool (WorkerPool | AgentPool): Long-lived fetch processes
       processes (int): Number of processes
       concurrent_index (int): Concurrent index
-      chunked_data_per_core (list): Chunked of data per core
+      chunked_data_per_core (list): Bounds of the chunked data per core
       concurrent_per_core (list): Concurrent size per core
+      parts_dir (str): Directory of the partial results per process
+      replay_offsets (np.ndarray): Send offsets of a replayed trace, if any
 
     Returns:
-      concurrent.futures: Completed asyncronous requests per core
+      tuple: Summary of the completed asyncronous requests per core and
+        breach of the service level objective that stopped them, if any
     """
     logger.info(f"Current processes used: {processes}")
     logger.info(f"Current concurrent size: {concurrent_index}")
 
-    ramp_up_per_core = config_file["ramp_up_time"] / processes
+    # A replayed trace keeps its own timeline, every process starts with it
+    arrival = config_file.get("arrival", {})
+    replay = arrival.get("mode") == "replay"
+    ramp_up_per_core = 0 if replay else config_file["ramp_up_time"] / processes
     logger.info(
         (
             f"Current ramp up time: {config_file['ramp_up_time']} "
@@ -74,36 +236,201 @@ def run_experiment(
     logger.info(
         (
             "Current chunked per core: "
-            f"{[ len(chunked) for chunked in chunked_data_per_core]}"
+            f"{[stop - start for start, stop in chunked_data_per_core]}"
         )
     )
     logger.info(f"Current concurrent sequence per core: {concurrent_per_core}")
+    logger.info(
+        f"Connection mode: {config_file.get('connection', {}).get('mode', 'fresh')}"
+    )
 
-    executor = concurrent.futures.ProcessPoolExecutor(processes)
+    # Open-loop arrival uses the concurrent size as requests per second
+    data_size = chunked_data_per_core[-1][1] - chunked_data_per_core[0][0]
+    start_at: Optional[float] = None
+    if replay and replay_offsets is not None:
+        logger.info(
+            (
+                f"Arrival mode: replay of {arrival['trace']} "
+                f"({replay_offsets[-1]:.1f} second(s) at a "
+                f"{arrival.get('speedup', 1)}x speedup)"
+            )
+        )
+        # Every process receives its command on the same timestamp, and the
+        # trace starts a second later, once every process is set up
+        start_at = time.time() + START_DELAY
+        trace_start = start_at + 1
+    elif is_open_loop(arrival):
+        logger.info(
+            f"Arrival mode: {arrival['mode']} ({concurrent_index} request(s)/second)"
+        )
 
-    futures = []
+    commands = []
     chunked_concurrent_per_core = zip(chunked_data_per_core, concurrent_per_core)
     for index, (chunked, concurrent_size) in enumerate(chunked_concurrent_per_core):
-        future = executor.submit(
-            prepare_fetch,
-            chunked,
-            config_file["response_headers"],
-            concurrent_size,
-            config_file["rate_per_request"],
-            (index + 1),
+        start, stop = chunked
+
+        schedule: Optional[dict] = None
+        if replay and replay_offsets is not None:
+            # Every process-th offset of the trace, all from the same start
+            schedule = arrival | {
+                "offsets": replay_offsets[index::processes],
+                "start_at": trace_start,
+            }
+        elif is_open_loop(arrival):
+            # Arrival rate share of the process, proportional to its data
+            schedule = arrival | {
+                "rate": concurrent_index * (stop - start) / data_size,
+                "seed": [int(config_file["random_seed"]), int(concurrent_index), index],
+            }
+
+        commands.append(
+            {
+                "start": start,
+                "stop": stop,
+                "concurrent": concurrent_size,
+                "rate_per_request": config_file["rate_per_request"],
+                "output_file": os.path.join(parts_dir, f"process_{index + 1}.csv"),
+                "schedule": schedule,
+                "sample_interval": config_file.get("worker_metrics", {}).get(
+                    "interval", SAMPLE_INTERVAL
+                ),
+                "steady_state": config_file.get("steady_state"),
+            }
         )
 
-        futures.append(future)
+    # Remote agents render their own dashboard
+    dashboard: AbstractContextManager = (
+        nullcontext()
+        if isinstance(pool, AgentPool)
+        else Dashboard(pool.stats, f"Concurrency {concurrent_index}", data_size)
+    )
+    with dashboard:
+        if config_file.get("slo") is None:
+            return pool.run(commands, ramp_up_per_core, start_at), None
 
-        # Ramp up time
-        time.sleep(ramp_up_per_core)
+        # The concurrent size ends as soon as the objective is breached, from
+        # the counters relayed by the agents when they run it
+        with SloMonitor(pool.stats, config_file["slo"]) as monitor:
+            results = pool.run(commands, ramp_up_per_core, start_at)
 
-    finishedResults = concurrent.futures.wait(futures)
-    logger.info("Shutting processes down: started")
-    executor.shutdown(wait=True)
-    logger.info("Shutting processes down: finished")
+        return results, monitor.breach
 
-    return finishedResults
+
+def run_concurrency(
+    config_file: dict,
+    exp_dir: str,
+    pool: Union[WorkerPool, AgentPool],
+    num_cores: int,
+    data_size: int,
+    columns: list,
+    column_types: dict,
+    parts_dir: str,
+    concurrent_index: int,
+    replay_offsets: Optional[np.ndarray] = None,
+) -> dict:
+    """
+    The function runs the experiment for one concurrent size and
+    writes its test file.
+
+    Parameters:
+      config_file (dict): Fetching configuration file
+      exp_dir (str): Directory of the experimental results.
+      pool (WorkerPool | AgentPool): Long-lived fetch processes
+      num_cores (int): Number of processes available
+      data_size (int): Number of requests
+      columns (list): Header of the test file
+      column_types (dict): Type of the columns in columnar output formats
+      parts_dir (str): Directory of the partial results per process
+      concurrent_index (int): Concurrent index
+      replay_offsets (np.ndarray): Send offsets of a replayed trace, if any
+
+    Returns:
+      dict: Test file, number of requests per response status, latency summary
+        and breach of the service level objective
+    """
+    concurrent_per_core = get_concurrent_seq(concurrent_index, num_cores)
+
+    # Number of processes to use
+    processes = num_cores if concurrent_index > num_cores else concurrent_index
+
+    # Data divided in chunked per CPU cores
+    chunked_data_per_core = split_bounds(get_concurrent_seq(data_size, processes))
+
+    results, breach = run_experiment(
+        config_file,
+        pool,
+        processes,
+        concurrent_index,
+        chunked_data_per_core,
+        concurrent_per_core,
+        parts_dir,
+        replay_offsets,
+    )
+    logger.info("Compiling experimental data and writting test file...")
+
+    # Resource samples of each process, beside the test file
+    write_worker_metrics(config_file, exp_dir, concurrent_index, results)
+    if is_open_loop(config_file.get("arrival", {})):
+        check_send_lag(config_file, results)
+
+    # Merge partial results into the test file
+    concurrent_file_location = merge_results(
+        [result["file"] for result in results],
+        columns,
+        os.path.join(exp_dir, f"test_{concurrent_index}_concurrency"),
+        config_file.get("output_format", "csv"),
+        column_types,
+    )
+
+    status: Counter = sum((result["status"] for result in results), Counter())
+    logger.info(f"Number of data processed: {sum(status.values())}")
+
+    # Merge the latency histogram of each process
+    histogram = LatencyHistogram()
+    for result in results:
+        histogram.merge(result["histogram"])
+
+    latency = {"concurrency": int(concurrent_index), "summary": histogram.summary()}
+    steady_state = get_steady_state(results)
+    write_file(
+        os.path.join(exp_dir, f"test_{concurrent_index}_concurrency_latency.json"),
+        latency
+        | {"histogram": histogram.to_dict()}
+        | ({"steady_state": steady_state} if steady_state is not None else {}),
+    )
+
+    logger.success(
+        (
+            "Number of successful requests: "
+            f"{sum(count for code, count in status.items() if code == 200)}"
+        )
+    )
+    logger.error(
+        (
+            "Number of failed requests: "
+            f"{sum(count for code, count in status.items() if code > 200)}"
+        )
+    )
+    logger.info(
+        (
+            f"Test file saved for {concurrent_index} concurrent(s): "
+            f"{os.path.relpath(concurrent_file_location, BASE_DIR)}\n"
+        )
+    )
+
+    # A concurrent size stopped by the objective keeps the breach that stopped
+    # it, the others are checked once completed
+    if breach is None and config_file.get("slo") is not None:
+        breach = check_results(config_file["slo"], status, latency)
+        if breach is not None:
+            logger.warning(f"Service level objective breached: {breach}")
+
+    return {
+        "file": os.path.basename(concurrent_file_location),
+        "status": status,
+        "latency": latency,
+        "breach": breach,
+    }
 
 
 def init(config_file: dict, exp_dir: str, data: pd.core.frame.DataFrame) -> list:
@@ -114,18 +441,47 @@ def init(config_file: dict, exp_dir: str, data: pd.core.frame.DataFrame) -> list
     Parameters:
       config_file (dict): Fetching configuration file
       exp_dir (str): Directory of the experimental results.
-      data (pd.core.frame.DataFrame): Generated test data to fetch.
+      data (pd.core.frame.DataFrame): Generated test data to fetch
+        (distinct samples in the lazy sample mode).
 
     Returns:
       list: List of files based on concurrency
     """
 
+    # Requests compiled once for every concurrent size, or drawn by each
+    # process from the distinct samples when the sample mode is lazy
+    requests: Sequence
+    body_policies = get_body_policies(config_file["functions"], exp_dir)
+    if config_file.get("sample_mode", "eager") == "lazy":
+        requests = SampleCatalogue(
+            data,
+            config_file["random_seed"],
+            config_file["data_size"],
+            body_policies,
+            data.attrs.get("weights"),
+        )
+        logger.info(f"Lazy sample mode: {len(data)} distinct sample(s)")
+    else:
+        requests = compile_requests(data, body_policies)
+
     # Number of CPU cores available (including logical cores)
     num_cores = math.floor(cpu_count() * (config_file["cpu_percentage"] / 100))
 
     # If data size is smaller than the number of CPU cores
-    num_cores = num_cores if num_cores < len(data) else len(data)
-    logger.info(f"Number of processes available: {num_cores}")
+    num_cores = num_cores if num_cores < len(requests) else len(requests)
+
+    # Adaptive search of the highest concurrent size meeting the objective
+    search = None
+    if config_file["concurrency"].get("mode", "ladder") == "adaptive":
+        if config_file.get("slo") is None:
+            raise Exception(
+                "The adaptive concurrency mode requires a service level objective"
+            )
+        search = ConcurrencySearch(
+            int(config_file["concurrency"]["initial"]),
+            int(config_file["concurrency"]["maximum"]),
+            int(config_file["concurrency"]["increment"]),
+        )
 
     # List of concurrent request per period
     concurrent_sizes = np.arange(
@@ -135,75 +491,150 @@ def init(config_file: dict, exp_dir: str, data: pd.core.frame.DataFrame) -> list
     )
     concurrent_sizes = (
         np.append(concurrent_sizes, config_file["concurrency"]["maximum"])
-        if concurrent_sizes[-1] != config_file["concurrency"]["maximum"]
+        if not len(concurrent_sizes)
+        or concurrent_sizes[-1] != config_file["concurrency"]["maximum"]
         else concurrent_sizes
     )
-    logger.info(f"Concurrent sizes: {list(concurrent_sizes)}")
-
-    # Run experiment per concurrent size
-    logger.info("Starting Experiment....\n")
-    for concurrent_index in concurrent_sizes:
-        concurrent_per_core = get_concurrent_seq(concurrent_index, num_cores)
-
-        # Number of processes to use
-        processes = num_cores if concurrent_index > num_cores else concurrent_index
-
-        # Data divided in chunked per CPU cores
-        chunked_data_per_core = np.array_split(data, processes)
-
-        doneTasks, _ = run_experiment(
-            config_file,
-            processes,
-            concurrent_index,
-            chunked_data_per_core,
-            concurrent_per_core,
+    if search is not None:
+        logger.info(
+            (
+                "Concurrent sizes: adaptive search up to "
+                f"{search.maximum} (resolution {search.resolution})"
+            )
         )
-        logger.info("Compiling experimental data and writting CSV file...")
-        results = [item.result() for item in doneTasks]
+    else:
+        logger.info(f"Concurrent sizes: {list(concurrent_sizes)}")
+
+    # Format of the test files (fails early if its library is missing)
+    output_format = config_file.get("output_format", "csv")
+    get_output_file("test", output_format)
+    logger.info(f"Output format: {output_format}")
+
+    # Send offsets of a replayed trace, read once for every concurrent size
+    replay_offsets = (
+        read_replay_offsets(config_file["arrival"], len(requests))
+        if config_file.get("arrival", {}).get("mode") == "replay"
+        else None
+    )
 
-        completed_results = pd.concat(results)
-        completed_results.reset_index(drop=True, inplace=True)
+    # Header of the test files
+    columns = list(data.columns) + get_result_columns(config_file["response_headers"])
+    column_types = {column: "string" for column in data.columns} | RESULT_TYPES
+
+    # Directory of the partial results streamed by each process, cleared of
+    # the files left by an interrupted run
+    parts_dir = os.path.join(exp_dir, ".parts")
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    os.makedirs(parts_dir)
+
+    # Processes started once and reused for every concurrent size
+    pool: Union[WorkerPool, AgentPool]
+    if config_file.get("agents"):
+        pool = AgentPool(
+            config_file["agents"],
+            config_file.get("agent_authkey"),
+            requests,
+            config_file["response_headers"],
+            config_file.get("connection", {}),
+        )
 
-        # Write to CSV file
-        concurrent_file_location = os.path.join(
-            exp_dir, f"test_{concurrent_index}_concurrency.csv"
+        # Processes are provided by the agents
+        num_cores = pool.processes if pool.processes < len(requests) else len(requests)
+    else:
+        pool = WorkerPool(
+            num_cores,
+            requests,
+            config_file["response_headers"],
+            config_file.get("connection", {}),
         )
-        completed_results.to_csv(concurrent_file_location, index=False)
-        logger.info(f"Number of data processed: {len(completed_results)}")
+    logger.info(f"Number of processes available: {num_cores}")
 
+    # Run experiment per concurrent size
+    logger.info("Starting Experiment....\n")
+    latency_summaries = []
+    pending = [int(concurrent_index) for concurrent_index in concurrent_sizes]
+    steps = []
+    try:
+        with pool:
+            while True:
+                concurrent_index = search.next() if search is not None else None
+                if search is None and pending:
+                    concurrent_index = pending.pop(0)
+                if concurrent_index is None:
+                    break
+
+                completed = run_concurrency(
+                    config_file,
+                    exp_dir,
+                    pool,
+                    num_cores,
+                    len(requests),
+                    columns,
+                    column_types,
+                    parts_dir,
+                    concurrent_index,
+                    replay_offsets,
+                )
+
+                latency_summaries.append(completed["latency"])
+                print_latency_table(latency_summaries)
+                steps.append(
+                    {"concurrency": concurrent_index, "breach": completed["breach"]}
+                )
+
+                if search is not None:
+                    search.record(concurrent_index, completed["breach"])
+                elif completed["breach"] is not None:
+                    # Higher concurrent sizes would only breach it further
+                    logger.warning(
+                        "Stopping the experiment at the breached concurrent size"
+                    )
+                    break
+
+                if search.next() if search is not None else pending:
+                    wait_per_concurrency = config_file["concurrency"]["wait_time"]
+                    # Wait time per concurrent size
+                    logger.info(
+                        f"Wait of {wait_per_concurrency} second(s) "
+                        "before continuing...\n"
+                    )
+                    time.sleep(wait_per_concurrency)
+
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    if search is not None:
         logger.success(
             (
-                "Number of successful requests: "
-                f"{len(completed_results[completed_results['response_status'] == 200])}"
-            )
-        )
-        logger.error(
-            (
-                "Number of failed requests: "
-                f"{len(completed_results[completed_results['response_status'] > 200 ])}"
+                "Highest concurrent size meeting the service level objective: "
+                f"{search.passed or 'none'}"
+                + (f" (breached at {search.breached})" if search.breached else "")
             )
         )
-        logger.info(
-            (
-                f"Test file saved for {concurrent_index} concurrent(s): "
-                f"{os.path.relpath(concurrent_file_location, BASE_DIR)}\n"
-            )
+        write_file(
+            os.path.join(exp_dir, "concurrency_search.json"),
+            {
+                "slo": config_file["slo"],
+                "passed": search.passed,
+                "breached": search.breached,
+                "steps": steps,
+            },
         )
 
-        if config_file["concurrency"]["maximum"] != concurrent_index:
-            wait_per_concurrency = config_file["concurrency"]["wait_time"]
-            # Wait time per concurrent size
-            logger.info(
-                f"Wait of {wait_per_concurrency} second(s) before continuing...\n"
-            )
-            time.sleep(wait_per_concurrency)
-
-    if len(os.listdir(exp_dir)) == len(concurrent_sizes):
-        logger.info(f"Number of test file(s) stored: {len(os.listdir(exp_dir))}")
-        return [
-            f"test_{concurrent_index}_concurrency.csv"
-            for concurrent_index in concurrent_sizes
-        ]
+    # Concurrent sizes actually run (fewer when stopped or searched)
+    test_files = [
+        os.path.basename(
+            get_output_file(f"test_{step['concurrency']}_concurrency", output_format)
+        )
+        for step in steps
+    ]
+    stored_files = [
+        file for file in test_files if os.path.exists(os.path.join(exp_dir, file))
+    ]
+
+    if len(stored_files) == len(steps):
+        logger.info(f"Number of test file(s) stored: {len(stored_files)}")
+        return test_files
     else:
         raise Exception(
             "The number of test file(s) stored are distinct to the concurreny size"
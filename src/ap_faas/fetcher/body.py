@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import asyncio
+import hashlib
+import os
+import uuid
+from typing import BinaryIO, Optional
+
+from aiohttp import ClientResponse
+
+# Handling modes of the response body
+BODY_MODES = ["keep", "discard", "hash", "truncate", "spill"]
+
+# Size of each chunk read from the response stream
+CHUNK_SIZE = 64 * 1024
+
+
+class BodyPolicy:
+    """
+    This is the handling of the response body of a function.
+
+    Attributes:
+      mode (str): Handling mode (keep, discard, hash, truncate or spill).
+      limit (int): Bytes kept when the body is truncated.
+      blob_dir (str): Directory of the spilled bodies, named by their digest.
+    """
+
+    __slots__ = ("mode", "limit", "blob_dir")
+
+    def __init__(
+        self, mode: str = "keep", limit: int = 0, blob_dir: Optional[str] = None
+    ) -> None:
+        """
+        The constructor for BodyPolicy class.
+
+        Parameters:
+          mode (str): Handling mode (keep, discard, hash, truncate or spill).
+          limit (int): Bytes kept when the body is truncated.
+          blob_dir (str): Directory of the spilled bodies, named by their digest.
+        """
+        self.mode = mode
+        self.limit = limit
+        self.blob_dir = blob_dir
+
+
+def parse_body_policy(policy: str, blob_dir: str) -> BodyPolicy:
+    """
+    The function parses the response body policy of a function.
+
+    Parameters:
+      policy (str): Policy from the configuration file (e.g. hash, truncate:256).
+      blob_dir (str): Directory of the spilled bodies.
+
+    Returns:
+      BodyPolicy: Parsed policy
+    """
+    mode, _, limit = policy.partition(":")
+
+    if mode not in BODY_MODES:
+        raise Exception(f"Unknown response body policy: {policy}")
+
+    if mode == "truncate":
+        if not limit.isdigit():
+            raise Exception(f"Truncate policy without a size: {policy}")
+        return BodyPolicy(mode, int(limit))
+
+    return BodyPolicy(mode, blob_dir=blob_dir if mode == "spill" else None)
+
+
+def get_body_policies(functions: list, exp_dir: str) -> dict:
+    """
+    The function retrieves the response body policy of each function.
+
+    Parameters:
+      functions (list): Functions of the configuration file.
+      exp_dir (str): Directory of the experimental results.
+
+    Returns:
+      dict: BodyPolicy per function name
+    """
+    blob_dir = os.path.join(exp_dir, "blobs")
+
+    return {
+        function["name"]: parse_body_policy(
+            function.get("response_body", "keep"), blob_dir
+        )
+        for function in functions
+    }
+
+
+def _open_blob(blob_dir: str, temp_file: str) -> BinaryIO:
+    """
+    The function opens the temporary file of a spilled body.
+
+    Parameters:
+      blob_dir (str): Directory of the spilled bodies.
+      temp_file (str): Location of the temporary file.
+
+    Returns:
+      BinaryIO: Temporary file
+    """
+    os.makedirs(blob_dir, exist_ok=True)
+    return open(temp_file, "wb")
+
+
+async def spill_body(resp: ClientResponse, blob_dir: str) -> tuple:
+    """
+    The function streams the response body into a content-addressed file.
+    The file operations run in the default executor, so the event loop keeps
+    sending and timing the other requests, and each chunk is written while
+    the next one is read.
+
+    Parameters:
+      resp (ClientResponse): Response of the request.
+      blob_dir (str): Directory of the spilled bodies.
+
+    Returns:
+      tuple: Location of the blob and size of the body
+    """
+    loop = asyncio.get_running_loop()
+    temp_file = os.path.join(blob_dir, f".{uuid.uuid4()}")
+    blob = await loop.run_in_executor(None, _open_blob, blob_dir, temp_file)
+
+    digest = hashlib.sha256()
+    size = 0
+    writing: Optional[asyncio.Future] = None
+    finished = False
+    try:
+        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+
+            if writing is not None:
+                await writing
+            writing = loop.run_in_executor(None, blob.write, chunk)
+
+        if writing is not None:
+            await writing
+        finished = True
+
+    finally:
+        if not finished and writing is not None:
+            await asyncio.gather(writing, return_exceptions=True)
+        await loop.run_in_executor(None, blob.close)
+
+        # A body interrupted by the connection, a timeout or a cancellation
+        # leaves no temporary file behind
+        if not finished:
+            await loop.run_in_executor(None, os.remove, temp_file)
+
+    # Identical bodies are stored once
+    blob_file = os.path.join(blob_dir, digest.hexdigest())
+    await loop.run_in_executor(None, os.replace, temp_file, blob_file)
+
+    return blob_file, size
+
+
+async def read_body(resp: ClientResponse, policy: Optional[BodyPolicy]) -> tuple:
+    """
+    The function reads the response body according to its policy.
+
+    Parameters:
+      resp (ClientResponse): Response of the request.
+      policy (BodyPolicy): Handling of the response body (keep if not given).
+
+    Returns:
+      tuple: Stored body and size of the body
+    """
+    if policy is None or policy.mode == "keep":
+        message = await resp.read()
+        return message, len(message)
+
+    if policy.mode == "spill":
+        return await spill_body(resp, policy.blob_dir or "blobs")
+
+    # Body streamed without holding it in memory
+    digest = hashlib.sha256() if policy.mode == "hash" else None
+    kept = bytearray()
+    size = 0
+    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+        size += len(chunk)
+
+        if digest is not None:
+            digest.update(chunk)
+        elif len(kept) < policy.limit:
+            kept += chunk[: policy.limit - len(kept)]
+
+    if digest is not None:
+        return f"sha256:{digest.hexdigest()}", size
+
+    if policy.mode == "truncate":
+        return bytes(kept), size
+
+    return None, size
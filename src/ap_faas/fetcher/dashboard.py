@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import math
+import time
+from collections import deque
+from multiprocessing.sharedctypes import RawArray, RawValue
+from types import TracebackType
+from typing import Optional, Type
+
+import numpy as np
+from rich.console import Group
+from rich.live import Live
+from rich.table import Table
+from rich.text import Text
+
+# Local imports
+from ap_faas.utils.histogram import LatencyHistogram
+from ap_faas.utils.logger import console, format_time
+
+# Counters of each process: completed, in flight and response status classes
+COUNTERS = ["completed", "in_flight", "2xx", "3xx", "4xx", "5xx"]
+
+# Significant digits of the live latency histograms
+DIGITS = 2
+
+# Seconds covered by the rolling percentiles
+WINDOW = 10
+
+
+class SharedStats:
+    """
+    This is a block of shared memory where each fetch process updates its
+    own counters and latency histograms, without locks, along with a flag
+    asking every process to stop sending requests.
+
+    Attributes:
+      processes (int): Number of processes.
+      functions (list): Function names.
+      buckets (int): Number of buckets of each latency histogram.
+    """
+
+    def __init__(self, processes: int, functions: list) -> None:
+        """
+        The constructor for SharedStats class.
+
+        Parameters:
+          processes (int): Number of processes.
+          functions (list): Function names.
+        """
+        self.processes = processes
+        self.functions = functions
+        self.buckets = len(LatencyHistogram(DIGITS).counts)
+
+        self.__slot_size = len(COUNTERS) + len(functions) * self.buckets
+        self.__memory = RawArray("q", processes * self.__slot_size)
+        self.__stop = RawValue("b", 0)
+
+    @property
+    def stopped(self) -> bool:
+        """
+        The function checks whether the processes were asked to stop.
+
+        Returns:
+          bool: Stop validation
+        """
+        return bool(self.__stop.value)
+
+    def stop(self, stopped: bool = True) -> None:
+        """
+        The function asks every process to stop sending requests, or to
+        resume.
+
+        Parameters:
+          stopped (bool): Whether the processes have to stop.
+        """
+        self.__stop.value = int(stopped)
+
+    def view(self) -> np.ndarray:
+        """
+        The function retrieves the counters and histograms of every process.
+
+        Returns:
+          np.ndarray: Slot per process
+        """
+        return np.frombuffer(self.__memory, dtype=np.int64).reshape(
+            self.processes, self.__slot_size
+        )
+
+
+class StatsRecorder:
+    """
+    This is the writer of the shared counters of one fetch process.
+    """
+
+    def __init__(self, stats: SharedStats, proc_index: int) -> None:
+        """
+        The constructor for StatsRecorder class.
+
+        Parameters:
+          stats (SharedStats): Shared counters of the pool.
+          proc_index (int): Process index (starting at 1).
+        """
+        self.__stats = stats
+        slot = stats.view()[proc_index - 1]
+        self.__counters = slot[: len(COUNTERS)]
+        self.__histograms = slot[len(COUNTERS) :].reshape(
+            len(stats.functions), stats.buckets
+        )
+        self.__functions = {name: index for index, name in enumerate(stats.functions)}
+        self.__histogram = LatencyHistogram(DIGITS)
+
+    @property
+    def stopped(self) -> bool:
+        """
+        The function checks whether the process was asked to stop.
+
+        Returns:
+          bool: Stop validation
+        """
+        return self.__stats.stopped
+
+    def started(self) -> None:
+        """
+        The function counts a request in flight.
+        """
+        self.__counters[1] += 1
+
+    def completed(self, function: str, status: int, response_time: float) -> None:
+        """
+        The function counts a completed request.
+
+        Parameters:
+          function (str): Function name.
+          status (int): Response status.
+          response_time (float): Response time of the request (0 if none).
+        """
+        self.__counters[0] += 1
+        self.__counters[1] -= 1
+
+        status_class = min(max(status // 100, 2), 5)
+        self.__counters[status_class] += 1
+
+        if response_time > 0:
+            self.__histograms[
+                self.__functions[function], self.__histogram.index_of(response_time)
+            ] += 1
+
+
+class Dashboard:
+    """
+    This is the live view of a concurrent size, aggregating the shared counters
+    of every fetch process.
+    """
+
+    def __init__(self, stats: SharedStats, title: str, total: int) -> None:
+        """
+        The constructor for Dashboard class.
+
+        Parameters:
+          stats (SharedStats): Shared counters of the pool.
+          title (str): Title of the dashboard.
+          total (int): Number of requests expected.
+        """
+        self.__stats = stats
+        self.__title = title
+        self.__total = total
+        self.__values = LatencyHistogram(DIGITS).values()
+
+        # Counters are cumulative for the whole experiment
+        self.__baseline = stats.view().sum(axis=0)
+        self.__start = time.monotonic()
+        self.__snapshots: deque = deque()
+
+        self.__live = Live(
+            console=console, get_renderable=self.render, refresh_per_second=2
+        )
+
+    def __percentiles(self, counts: np.ndarray) -> tuple:
+        total = int(counts.sum())
+        if total == 0:
+            return ("-", "-")
+
+        cumulative = np.cumsum(counts)
+        ranks = [math.ceil(total * percentile) for percentile in [0.50, 0.99]]
+
+        # Lowest value (microseconds) of the bucket of each rank
+        return tuple(
+            f"{self.__values[np.searchsorted(cumulative, rank)] / 1000:.1f}"
+            for rank in ranks
+        )
+
+    def render(self) -> Group:
+        """
+        The function renders the current state of the experiment.
+
+        Returns:
+          Group: Summary line and table per function
+        """
+        now = time.monotonic()
+        current = self.__stats.view().sum(axis=0) - self.__baseline
+
+        # Rolling window of snapshots
+        self.__snapshots.append((now, current))
+        while len(self.__snapshots) > 1 and now - self.__snapshots[0][0] > WINDOW:
+            self.__snapshots.popleft()
+        since, previous = self.__snapshots[0]
+
+        counters = dict(zip(COUNTERS, current[: len(COUNTERS)].tolist()))
+        rate = (
+            (counters["completed"] - previous[0]) / (now - since) if now > since else 0
+        )
+
+        summary = Text.assemble(
+            (f"{self.__title} ", "bold"),
+            f"[{format_time(now - self.__start)}] ",
+            f"{counters['completed']}/{self.__total} completed | ",
+            f"{rate:.1f} req/s | ",
+            f"{counters['in_flight']} in flight | ",
+            ("2xx ", "green"),
+            f"{counters['2xx']} ",
+            ("3xx ", "cyan"),
+            f"{counters['3xx']} ",
+            ("4xx ", "yellow"),
+            f"{counters['4xx']} ",
+            ("5xx ", "red"),
+            f"{counters['5xx']}",
+        )
+
+        table = Table(title_justify="left", expand=False)
+        table.add_column("Function")
+        table.add_column("Responses", justify="right")
+        table.add_column(f"p50 {WINDOW}s (ms)", justify="right")
+        table.add_column(f"p99 {WINDOW}s (ms)", justify="right")
+
+        histograms = current[len(COUNTERS) :].reshape(
+            len(self.__stats.functions), self.__stats.buckets
+        )
+        rolling = histograms - previous[len(COUNTERS) :].reshape(histograms.shape)
+        for index, function in enumerate(self.__stats.functions):
+            table.add_row(
+                function,
+                str(int(histograms[index].sum())),
+                *self.__percentiles(rolling[index]),
+            )
+
+        return Group(summary, table)
+
+    def __enter__(self) -> "Dashboard":
+        self.__live.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.__live.stop()
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import ipaddress
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener, wait
+from types import TracebackType
+from typing import Optional, Sequence, Type
+
+import numpy as np
+
+# Local imports
+from ap_faas.fetcher.dashboard import Dashboard, SharedStats
+from ap_faas.fetcher.pool import WorkerPool, get_functions
+from ap_faas.fetcher.search import CHECK_INTERVAL
+from ap_faas.utils.logger import logger
+
+# Size of each chunk of a result file sent back to the coordinator
+CHUNK_SIZE = 1024 * 1024
+
+# Delay given to every agent to receive a step before its synchronized start
+START_DELAY = 2
+
+# Environment variable holding the shared key
+AUTHKEY_ENV = "AP_FAAS_AUTHKEY"
+
+# Shared key used when none is configured, only accepted on a loopback address
+LOOPBACK_AUTHKEY = "ap-faas"
+
+
+def is_loopback(host: str) -> bool:
+    """
+    The function checks if a host resolves to a loopback address.
+
+    Parameters:
+      host (str): Host name or address.
+
+    Returns:
+      bool: Whether the host is only reachable from the same machine
+    """
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def get_authkey(host: str, authkey: Optional[str] = None) -> bytes:
+    """
+    The function retrieves the shared key of an agent. The channel unpickles
+    what it receives, so a reachable agent requires a key of its own.
+
+    Parameters:
+      host (str): Address of the agent.
+      authkey (str): Configured shared key, if any (else from AP_FAAS_AUTHKEY).
+
+    Returns:
+      bytes: Shared key
+    """
+    authkey = authkey or os.environ.get(AUTHKEY_ENV)
+    if authkey:
+        return authkey.encode()
+
+    if not is_loopback(host):
+        raise Exception(
+            f"A shared key is required for the agent on {host} "
+            f"(--authkey, agent_authkey or {AUTHKEY_ENV})"
+        )
+
+    return LOOPBACK_AUTHKEY.encode()
+
+
+def send_results(channel: "Connection[tuple, tuple]", results: list) -> None:
+    """
+    The function streams the partial results files back to the coordinator.
+
+    Parameters:
+      channel (Connection): Channel with the coordinator.
+      results (list): Summary of the results written by each process.
+    """
+    for result in results:
+        filename = os.path.basename(result["file"])
+        with open(result["file"], "rb") as part:
+            while chunk := part.read(CHUNK_SIZE):
+                channel.send(("chunk", filename, chunk))
+        os.remove(result["file"])
+
+    channel.send(("done", results))
+
+
+def relay_stats(
+    channel: "Connection[tuple, tuple]", stats: SharedStats, done: threading.Event
+) -> None:
+    """
+    The function sends the live counters of the agent to the coordinator while
+    a step runs, and asks the processes to stop when the coordinator does.
+
+    Parameters:
+      channel (Connection): Channel with the coordinator.
+      stats (SharedStats): Shared counters of the agent's pool.
+      done (Event): End of the step, after which the last counters are sent.
+    """
+    while True:
+        finished = done.wait(CHECK_INTERVAL)
+
+        while channel.poll():
+            action, _ = channel.recv()
+            if action == "stop":
+                stats.stop()
+
+        # Counters of every process together, only the ones recorded
+        counters = stats.view().sum(axis=0)
+        indices = np.flatnonzero(counters)
+        channel.send(("stats", indices, counters[indices]))
+
+        if finished:
+            return
+
+
+def serve_agent(host: str, port: int, authkey: Optional[str], processes: int) -> None:
+    """
+    The function runs an agent that executes the steps of a remote coordinator
+    with a local pool of fetch processes.
+
+    Parameters:
+      host (str): Address to listen on.
+      port (int): Port to listen on.
+      authkey (str): Shared key authenticating the coordinator, if any
+        (required unless the address is a loopback one).
+      processes (int): Number of fetch processes of the agent.
+    """
+    with Listener((host, port), authkey=get_authkey(host, authkey)) as listener:
+        logger.info(f"Agent listening on {host}:{port} ({processes} process(es))")
+
+        while True:
+            # Connections failing the handshake are dropped, not fatal
+            try:
+                channel = listener.accept()
+            except (AuthenticationError, EOFError, OSError) as err:
+                logger.warning(f"Connection rejected: {err!r}")
+                continue
+
+            with channel:
+                logger.info(f"Coordinator connected: {listener.last_accepted}")
+                parts_dir = tempfile.mkdtemp(prefix="ap_faas_agent_")
+                pool: Optional[WorkerPool] = None
+
+                try:
+                    while True:
+                        action, content = channel.recv()
+
+                        if action == "setup":
+                            pool = WorkerPool(
+                                processes,
+                                content["requests"],
+                                content["response_headers"],
+                                content["connection"],
+                            )
+                            channel.send(("ready", processes))
+
+                        elif action == "run" and pool is not None:
+                            commands = [
+                                command
+                                | {
+                                    "output_file": os.path.join(
+                                        parts_dir,
+                                        os.path.basename(command["output_file"]),
+                                    )
+                                }
+                                for command in content["commands"]
+                            ]
+                            size = sum(
+                                command["stop"] - command["start"]
+                                for command in commands
+                            )
+                            pool.stats.stop(False)
+                            done = threading.Event()
+                            relay = threading.Thread(
+                                target=relay_stats, args=(channel, pool.stats, done)
+                            )
+                            relay.start()
+                            try:
+                                try:
+                                    with Dashboard(pool.stats, "Agent", size):
+                                        results = pool.run(
+                                            commands,
+                                            content["ramp_up_per_core"],
+                                            content["start_at"],
+                                        )
+                                finally:
+                                    done.set()
+                                    relay.join()
+                                send_results(channel, results)
+                            except Exception as err:
+                                channel.send(("error", str(err)))
+
+                        elif action == "close":
+                            break
+
+                except EOFError:
+                    logger.warning("Coordinator disconnected")
+
+                finally:
+                    if pool is not None:
+                        pool.close()
+                    shutil.rmtree(parts_dir, ignore_errors=True)
+
+                logger.info("Waiting for the next coordinator...")
+
+
+class AgentPool:
+    """
+    This is a coordinator of remote agents, exposing their fetch processes
+    as a single pool.
+
+    Attributes:
+      processes (int): Number of processes across all the agents.
+      stats (SharedStats): Live counters relayed by each agent (one slot per
+        agent), whose stop flag is forwarded to the agents.
+    """
+
+    def __init__(
+        self,
+        agents: list,
+        authkey: Optional[str],
+        requests: Sequence,
+        response_headers: list,
+        connection: dict,
+    ) -> None:
+        """
+        The constructor for AgentPool class.
+
+        Parameters:
+          agents (list): Host and port of each agent.
+          authkey (str): Shared key authenticating the coordinator, if any
+            (required unless every agent is on a loopback address).
+          requests (Sequence): Sequence of PreparedRequest of the experiment.
+          response_headers (list): Response headers to capture.
+          connection (dict): Connection configuration (fresh or pooled).
+        """
+        self.__channels: list = []
+        self.__capacity: list = []
+
+        for agent in agents:
+            channel = Client(
+                (agent["host"], agent["port"]),
+                authkey=get_authkey(agent["host"], authkey),
+            )
+            channel.send(
+                (
+                    "setup",
+                    {
+                        "requests": requests,
+                        "response_headers": response_headers,
+                        "connection": connection,
+                    },
+                )
+            )
+            _, capacity = channel.recv()
+            logger.info(
+                f"Agent {agent['host']}:{agent['port']} ready: {capacity} process(es)"
+            )
+
+            self.__channels.append(channel)
+            self.__capacity.append(capacity)
+
+        self.processes = sum(self.__capacity)
+        self.stats = SharedStats(len(self.__channels), get_functions(requests))
+
+    def __assign(self, size: int) -> list:
+        """
+        The function assigns each command to an agent, round-robin over the
+        agents with free processes.
+
+        Parameters:
+          size (int): Number of commands.
+
+        Returns:
+          list: Agent index of each command
+        """
+        assigned = [0 for _ in self.__capacity]
+        assignment = []
+        agent = 0
+        for _ in range(size):
+            while assigned[agent] >= self.__capacity[agent]:
+                agent = (agent + 1) % len(self.__capacity)
+            assignment.append(agent)
+            assigned[agent] += 1
+            agent = (agent + 1) % len(self.__capacity)
+
+        return assignment
+
+    def run(
+        self,
+        commands: list,
+        ramp_up_per_core: float,
+        start_at: Optional[float] = None,
+    ) -> list:
+        """
+        The function splits the commands across the agents, starts all of them
+        on a synchronized timestamp and collects their results files.
+
+        Parameters:
+          commands (list): Command per process (bounds, concurrency and output).
+          ramp_up_per_core (float): Interval between the start of each process.
+          start_at (float): Timestamp to start the first process (after the
+            delay given to every agent if not given).
+
+        Returns:
+          list: Summary of the results written by each process
+        """
+        if len(commands) > self.processes:
+            raise Exception(
+                f"{len(commands)} commands for {self.processes} agent process(es)"
+            )
+
+        assignment = self.__assign(len(commands))
+        if start_at is None:
+            start_at = time.time() + START_DELAY
+
+        # Commands of each agent keep their global ramp up position
+        active = []
+        for agent, channel in enumerate(self.__channels):
+            positions = [
+                index for index, assigned in enumerate(assignment) if assigned == agent
+            ]
+            if not positions:
+                continue
+
+            stride = (
+                (positions[-1] - positions[0]) / (len(positions) - 1)
+                if len(positions) > 1
+                else 1
+            )
+            channel.send(
+                (
+                    "run",
+                    {
+                        "commands": [commands[index] for index in positions],
+                        "ramp_up_per_core": ramp_up_per_core * stride,
+                        "start_at": start_at + positions[0] * ramp_up_per_core,
+                    },
+                )
+            )
+            active.append(channel)
+
+        parts_dir = os.path.dirname(commands[0]["output_file"])
+        slots = self.stats.view()
+        stopping = False
+        results = []
+        errors = []
+        while active:
+            # A stop asked on the coordinator is forwarded to every agent
+            if self.stats.stopped and not stopping:
+                stopping = True
+                for channel in active:
+                    channel.send(("stop", None))
+
+            ready = wait(active, CHECK_INTERVAL)
+            for channel in [channel for channel in active if channel in ready]:
+                try:
+                    action, *content = channel.recv()
+                except EOFError:
+                    action, content = "error", ["Agent disconnected"]
+
+                if action == "stats":
+                    indices, counters = content
+                    slot = np.zeros(slots.shape[1], dtype=slots.dtype)
+                    slot[indices] = counters
+                    slots[self.__channels.index(channel)] = slot
+                    continue
+
+                if action == "chunk":
+                    filename, chunk = content
+                    with open(os.path.join(parts_dir, filename), "ab") as part:
+                        part.write(chunk)
+                    continue
+
+                active.remove(channel)
+                if action == "done":
+                    results += [
+                        result
+                        | {
+                            "file": os.path.join(
+                                parts_dir, os.path.basename(result["file"])
+                            )
+                        }
+                        for result in content[0]
+                    ]
+                else:
+                    errors.append(content[0])
+
+        if errors:
+            raise Exception(f"Error from agent: {errors[0]}")
+
+        return results
+
+    def close(self) -> None:
+        """
+        The function releases every agent.
+        """
+        for channel in self.__channels:
+            try:
+                channel.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+            channel.close()
+        logger.info("Agents released")
+
+    def __enter__(self) -> "AgentPool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -9,10 +9,8 @@
 import asyncio
 import time
 import uuid
-from asyncio import Semaphore
-from os import getpid
 from types import SimpleNamespace
-from typing import List
+from typing import Iterator, Optional, Sequence
 
 import numpy as np
 from aiohttp import (
@@ -22,49 +20,149 @@ from aiohttp import (
     ClientSession,
     ClientTimeout,
     CookieJar,
+    DummyCookieJar,
+    TCPConnector,
     TraceConfig,
+    TraceConnectionCreateEndParams,
+    TraceConnectionCreateStartParams,
+    TraceConnectionQueuedEndParams,
+    TraceConnectionQueuedStartParams,
+    TraceConnectionReuseconnParams,
+    TraceDnsResolveHostEndParams,
+    TraceDnsResolveHostStartParams,
     TraceRequestEndParams,
     TraceRequestStartParams,
 )
-from pandas.core.frame import DataFrame
-from pandas.core.series import Series
-from rich.progress import BarColumn, Progress, TaskID, TextColumn
+from aiohttp.tracing import TraceRequestHeadersSentParams
 
 # Local imports
-from ap_faas.utils.logger import TimeColumn, console, logger
+from ap_faas.fetcher.body import read_body
+from ap_faas.fetcher.dashboard import StatsRecorder
+from ap_faas.fetcher.sampler import SAMPLE_INTERVAL, ResourceSampler
+from ap_faas.fetcher.schedule import build_schedule
+from ap_faas.fetcher.sink import ResultWriter
+from ap_faas.fetcher.steady import SteadyStateDetector
+from ap_faas.fetcher.table import JSON_HEADERS, PreparedRequest
+from ap_faas.utils.logger import logger
+
+# Columns of the result appended to each request data point
+RESULT_COLUMNS = [
+    "request_id",
+    "response_id",
+    "response_status",
+    "response_body",
+    "request_time",
+    "response_time",
+    "response_bytes",
+]
+
+# Columns of the client phases of each request (seconds), after the headers
+PHASE_COLUMNS = [
+    "queued_time",
+    "dns_time",
+    "connect_time",
+    "ttfb_time",
+    "transfer_time",
+    "connection_reused",
+]
+
+# Columns of the send schedule appended after the client phases
+SCHEDULE_COLUMNS = ["intended_time", "send_time"]
+
+# Column of the latency phase of the process (warmup or steady), if detected
+STEADY_COLUMNS = ["phase"]
+
+# Type of the result columns in columnar output formats
+RESULT_TYPES = {
+    "request_id": "string",
+    "response_id": "string",
+    "response_status": "int16",
+    "response_body": "string",
+    "request_time": "timestamp",
+    "response_time": "float64",
+    "response_bytes": "int64",
+    "queued_time": "float32",
+    "dns_time": "float32",
+    "connect_time": "float32",
+    "ttfb_time": "float32",
+    "transfer_time": "float32",
+    "connection_reused": "bool",
+    "intended_time": "timestamp",
+    "send_time": "timestamp",
+    "phase": "string",
+}
+
+
+def get_result_columns(response_headers: list) -> list:
+    """
+    The function retrieves the columns appended to each request data point.
+
+    Parameters:
+      response_headers (list): Response headers to capture.
+
+    Returns:
+      list: Columns of the request's result
+    """
+    return (
+        RESULT_COLUMNS
+        + response_headers
+        + PHASE_COLUMNS
+        + SCHEDULE_COLUMNS
+        + STEADY_COLUMNS
+    )
+
+
+def get_phases(trace_request_ctx: dict) -> tuple:
+    """
+    The function retrieves the client phases traced for a request, rounded
+    to microseconds (0 for the phases a reused connection skips).
+
+    Parameters:
+      trace_request_ctx (dict): Trace context of the request.
+
+    Returns:
+      tuple: Queued, DNS, connect (with TLS), time to first byte and body
+        transfer durations, and whether the connection was reused
+    """
+    return tuple(
+        round(trace_request_ctx[phase], 6) if phase in trace_request_ctx else None
+        for phase in PHASE_COLUMNS[:-1]
+    ) + (trace_request_ctx.get("connection_reused"),)
 
 
 async def fetch_data(
-    request: Series,
+    request: PreparedRequest,
     response_headers: list,
     session: ClientSession,
-    progress_bar: Progress,
-    task: TaskID,
 ) -> tuple:
     """
     The function fetch result from Function-as-a-Service.
 
     Parameters:
-      request (Series[Any]): Request data point.
+      request (PreparedRequest): Compiled request.
       response_headers (list): Response headers to capture.
       session (ClientSession): Async HTTP requests session
-      progress_bar (Progress): Current progress bar.
 
     Returns:
       tuple: Tuple of request's result
     """
-    url = f"{request['endpoint']}/{request['path']}?{request['query_string']}"
-
     try:
-        trace_request_ctx = {
+        trace_request_ctx: dict = {
             "request_id": str(uuid.uuid4()),
             "request_time": 0,
             "response_time": 0,
         }
-        async with getattr(session, request["method"].lower())(
-            url, json=request["body"], trace_request_ctx=trace_request_ctx
+        async with session.request(
+            request.method,
+            request.url,
+            data=request.body,
+            headers=JSON_HEADERS if request.body is not None else None,
+            trace_request_ctx=trace_request_ctx,
         ) as resp:
-            message = await resp.read()
+            message, size = await read_body(resp, request.body_policy)
+            trace_request_ctx["transfer_time"] = (
+                session.loop.time() - trace_request_ctx["response_end"]
+            )
 
             if resp.history:
                 result = (
@@ -74,6 +172,7 @@ async def fetch_data(
                     f"Redirect to {resp.url}",
                     trace_request_ctx["request_time"],
                     trace_request_ctx["response_time"],
+                    size,
                 ) + tuple(
                     resp.history[0].headers[response_header]
                     if response_header in resp.history[0].headers
@@ -89,6 +188,7 @@ async def fetch_data(
                     message,
                     trace_request_ctx["request_time"],
                     trace_request_ctx["response_time"],
+                    size,
                 ) + tuple(
                     resp.headers[response_header]
                     if response_header in resp.headers
@@ -104,6 +204,7 @@ async def fetch_data(
                     message,
                     trace_request_ctx["request_time"],
                     trace_request_ctx["response_time"],
+                    size,
                 ) + tuple(None for _ in response_headers)
 
     except asyncio.exceptions.TimeoutError as time_error:
@@ -115,6 +216,7 @@ async def fetch_data(
             time_error,
             trace_request_ctx["request_time"],
             trace_request_ctx["response_time"],
+            0,
         ) + tuple(None for _ in response_headers)
 
     except ClientResponseError as resp_err:
@@ -128,6 +230,7 @@ async def fetch_data(
             resp_err,
             trace_request_ctx["request_time"],
             trace_request_ctx["response_time"],
+            0,
         ) + tuple(None for _ in response_headers)
 
     except ClientConnectionError as conn_err:
@@ -141,6 +244,7 @@ async def fetch_data(
             conn_err,
             trace_request_ctx["request_time"],
             trace_request_ctx["response_time"],
+            0,
         ) + tuple(None for _ in response_headers)
 
     except ClientPayloadError as load_error:
@@ -154,6 +258,7 @@ async def fetch_data(
             load_error,
             trace_request_ctx["request_time"],
             trace_request_ctx["response_time"],
+            0,
         ) + tuple(None for _ in response_headers)
 
     except Exception as exeption_error:
@@ -165,13 +270,10 @@ async def fetch_data(
             exeption_error,
             trace_request_ctx["request_time"],
             trace_request_ctx["response_time"],
+            0,
         ) + tuple(None for _ in response_headers)
 
-    progress_bar.update(
-        task, description=f"{request['method']} {request['path']}", advance=1
-    )
-
-    return result
+    return result + get_phases(trace_request_ctx)
 
 
 async def on_request_start(
@@ -190,6 +292,11 @@ async def on_request_start(
     trace_config_ctx.start = session.loop.time()
     trace_config_ctx.trace_request_ctx["request_time"] = time.time()
 
+    # Phases a reused connection skips
+    trace_config_ctx.trace_request_ctx["queued_time"] = 0
+    trace_config_ctx.trace_request_ctx["dns_time"] = 0
+    trace_config_ctx.trace_request_ctx["connect_time"] = 0
+
 
 async def on_request_end(
     session: ClientSession,
@@ -197,179 +304,526 @@ async def on_request_end(
     params: TraceRequestEndParams,
 ) -> None:
     """
-    The function traces client request when it starts.
+    The function traces client request when its response headers are received.
 
     Parameters:
       session (ClientSession): Async HTTP requests session
       trace_config_ctx (SimpleNamespace): Trace configuration context.
       params (TraceRequestEndParams): Trace parameters
     """
-    elapsed = session.loop.time() - trace_config_ctx.start
-    trace_config_ctx.trace_request_ctx["response_time"] = elapsed
+    now = session.loop.time()
+    trace_config_ctx.trace_request_ctx["response_time"] = now - trace_config_ctx.start
+
+    # Response headers received, the body is read next
+    trace_config_ctx.trace_request_ctx["ttfb_time"] = now - getattr(
+        trace_config_ctx, "headers_sent", trace_config_ctx.start
+    )
+    trace_config_ctx.trace_request_ctx["response_end"] = now
+
+
+async def on_connection_queued_start(
+    session: ClientSession,
+    trace_config_ctx: SimpleNamespace,
+    params: TraceConnectionQueuedStartParams,
+) -> None:
+    """
+    The function traces a request waiting for a free connection of the pool.
+
+    Parameters:
+      session (ClientSession): Async HTTP requests session
+      trace_config_ctx (SimpleNamespace): Trace configuration context.
+      params (TraceConnectionQueuedStartParams): Trace parameters
+    """
+    trace_config_ctx.queued = session.loop.time()
+
+
+async def on_connection_queued_end(
+    session: ClientSession,
+    trace_config_ctx: SimpleNamespace,
+    params: TraceConnectionQueuedEndParams,
+) -> None:
+    """
+    The function traces a request leaving the queue of the pool.
+
+    Parameters:
+      session (ClientSession): Async HTTP requests session
+      trace_config_ctx (SimpleNamespace): Trace configuration context.
+      params (TraceConnectionQueuedEndParams): Trace parameters
+    """
+    trace_config_ctx.trace_request_ctx["queued_time"] = (
+        session.loop.time() - trace_config_ctx.queued
+    )
+
+
+async def on_dns_resolvehost_start(
+    session: ClientSession,
+    trace_config_ctx: SimpleNamespace,
+    params: TraceDnsResolveHostStartParams,
+) -> None:
+    """
+    The function traces the resolution of the host when it starts.
+
+    Parameters:
+      session (ClientSession): Async HTTP requests session
+      trace_config_ctx (SimpleNamespace): Trace configuration context.
+      params (TraceDnsResolveHostStartParams): Trace parameters
+    """
+    trace_config_ctx.dns = session.loop.time()
+
+
+async def on_dns_resolvehost_end(
+    session: ClientSession,
+    trace_config_ctx: SimpleNamespace,
+    params: TraceDnsResolveHostEndParams,
+) -> None:
+    """
+    The function traces the resolution of the host when it ends.
+
+    Parameters:
+      session (ClientSession): Async HTTP requests session
+      trace_config_ctx (SimpleNamespace): Trace configuration context.
+      params (TraceDnsResolveHostEndParams): Trace parameters
+    """
+    trace_config_ctx.trace_request_ctx["dns_time"] = (
+        session.loop.time() - trace_config_ctx.dns
+    )
 
 
-async def check_sem_async(
-    request: Series,
+async def on_connection_create_start(
+    session: ClientSession,
+    trace_config_ctx: SimpleNamespace,
+    params: TraceConnectionCreateStartParams,
+) -> None:
+    """
+    The function traces a new connection when it starts.
+
+    Parameters:
+      session (ClientSession): Async HTTP requests session
+      trace_config_ctx (SimpleNamespace): Trace configuration context.
+      params (TraceConnectionCreateStartParams): Trace parameters
+    """
+    trace_config_ctx.connect = session.loop.time()
+
+
+async def on_connection_create_end(
+    session: ClientSession,
+    trace_config_ctx: SimpleNamespace,
+    params: TraceConnectionCreateEndParams,
+) -> None:
+    """
+    The function traces a new connection when it is established, TCP and TLS
+    handshakes included (the host is resolved within).
+
+    Parameters:
+      session (ClientSession): Async HTTP requests session
+      trace_config_ctx (SimpleNamespace): Trace configuration context.
+      params (TraceConnectionCreateEndParams): Trace parameters
+    """
+    trace_request_ctx = trace_config_ctx.trace_request_ctx
+    trace_request_ctx["connect_time"] = (
+        session.loop.time() - trace_config_ctx.connect - trace_request_ctx["dns_time"]
+    )
+    trace_request_ctx["connection_reused"] = False
+
+
+async def on_connection_reuseconn(
+    session: ClientSession,
+    trace_config_ctx: SimpleNamespace,
+    params: TraceConnectionReuseconnParams,
+) -> None:
+    """
+    The function traces a request sent over a connection of the pool.
+
+    Parameters:
+      session (ClientSession): Async HTTP requests session
+      trace_config_ctx (SimpleNamespace): Trace configuration context.
+      params (TraceConnectionReuseconnParams): Trace parameters
+    """
+    trace_config_ctx.trace_request_ctx["connection_reused"] = True
+
+
+async def on_request_headers_sent(
+    session: ClientSession,
+    trace_config_ctx: SimpleNamespace,
+    params: TraceRequestHeadersSentParams,
+) -> None:
+    """
+    The function traces a request when its headers are sent.
+
+    Parameters:
+      session (ClientSession): Async HTTP requests session
+      trace_config_ctx (SimpleNamespace): Trace configuration context.
+      params (TraceRequestHeadersSentParams): Trace parameters
+    """
+    trace_config_ctx.headers_sent = session.loop.time()
+
+
+def create_session(
+    session_timeout: ClientTimeout, connector: Optional[TCPConnector] = None
+) -> ClientSession:
+    """
+    The function creates an HTTP session with request tracing enabled.
+
+    Parameters:
+      session_timeout (ClientTimeout): Timeout configuration.
+      connector (TCPConnector): Shared connector for pooled connections.
+
+    Returns:
+      ClientSession: Async HTTP requests session
+    """
+    trace_config = TraceConfig()
+
+    # Each hook is named after its signal. The signals are looked up by name,
+    # as the aiosignal releases from 1.4 no longer match the signal types
+    # declared by aiohttp
+    for hook in [
+        on_request_start,
+        on_request_end,
+        on_connection_queued_start,
+        on_connection_queued_end,
+        on_dns_resolvehost_start,
+        on_dns_resolvehost_end,
+        on_connection_create_start,
+        on_connection_create_end,
+        on_connection_reuseconn,
+        on_request_headers_sent,
+    ]:
+        getattr(trace_config, hook.__name__).append(hook)
+
+    return ClientSession(
+        connector=connector,
+        # A pooled session must not carry cookies from one request to the next
+        cookie_jar=CookieJar() if connector is None else DummyCookieJar(),
+        trace_configs=[trace_config],
+        timeout=session_timeout,
+    )
+
+
+def create_connector(concurrent: int, connection: dict) -> TCPConnector:
+    """
+    The function creates a connection pool sized to the process concurrency.
+
+    Parameters:
+      concurrent (int): Concurrent size.
+      connection (dict): Connection configuration.
+
+    Returns:
+      TCPConnector: Connection pool with keep-alive and DNS caching
+    """
+    return TCPConnector(
+        limit=concurrent,
+        limit_per_host=0,
+        use_dns_cache=True,
+        ttl_dns_cache=connection.get("dns_cache_ttl", 300),
+        keepalive_timeout=connection.get("keepalive_timeout", 60),
+        enable_cleanup_closed=True,
+    )
+
+
+async def send_request(
+    request: PreparedRequest,
     response_headers: list,
-    semaphore: Semaphore,
     session_timeout: ClientTimeout,
-    rate_per_request: int,
-    progress_bar: Progress,
-    task: TaskID,
-) -> tuple:
+    stats: StatsRecorder,
+    writer: ResultWriter,
+    pooled_session: Optional[ClientSession] = None,
+    intended_time: Optional[float] = None,
+) -> None:
     """
-    The function run the request with a semaphore.
+    The function sends the request and stores its result.
 
     Parameters:
-      request (Series[Any]): Request data point.
+      request (PreparedRequest): Compiled request.
       response_headers (list): Response headers to capture.
-      semaphore (Semaphore): Asyncronous semaphore.
       session_timeout (ClientTimeout): Timeout configuration.
-      rate_per_request (int): Delay of request per second.
-      progress_bar (Progress): Current progress bar.
+      stats (StatsRecorder): Live counters of the process.
+      writer (ResultWriter): Writer of the process results.
+      pooled_session (ClientSession): Long-lived session, if connections are pooled.
+      intended_time (float): Scheduled send time, if the load is open-loop.
+    """
+    send_time = time.time()
+    stats.started()
+
+    if pooled_session is not None:
+        fetched = await fetch_data(request, response_headers, pooled_session)
+    else:
+        # Fresh connection per request (cold client)
+        async with create_session(session_timeout) as session:
+            fetched = await fetch_data(request, response_headers, session)
+
+    stats.completed(request.function, fetched[2], fetched[5])
+
+    # Stream the result to disk as soon as the request completes
+    writer.write(
+        request.row + fetched + (intended_time, send_time),
+        fetched[2],
+        fetched[5],
+        send_time - intended_time if intended_time is not None else None,
+    )
 
-    Returns:
-      tuple: Tuple of request's result
+
+async def worker_pool(
+    requests: Sequence,
+    response_headers: list,
+    concurrent: int,
+    rate_per_request: int,
+    session_timeout: ClientTimeout,
+    stats: StatsRecorder,
+    writer: ResultWriter,
+    pooled_session: Optional[ClientSession] = None,
+) -> None:
     """
-    # Getter function with semaphore.
-    async with semaphore:
-        trace_config = TraceConfig()
-        trace_config.on_request_start.append(on_request_start)
-        trace_config.on_request_end.append(on_request_end)
-
-        conn = None  # TCPConnector(limit=0)
-        async with ClientSession(
-            connector=conn,
-            cookie_jar=CookieJar(),
-            trace_configs=[trace_config],
-            timeout=session_timeout,
-        ) as session:
-            fetched = await fetch_data(
-                request, response_headers, session, progress_bar, task
+    The function sends the requests with a bounded pool of workers (closed-loop),
+    each worker taking the next request as soon as its previous one completes.
+
+    Parameters:
+      requests (Sequence): Sequence of PreparedRequest.
+      response_headers (list): Response headers to capture.
+      concurrent (int): Concurrent size.
+      rate_per_request (int): Delay of request per second.
+      session_timeout (ClientTimeout): Timeout configuration.
+      stats (StatsRecorder): Live counters of the process.
+      writer (ResultWriter): Writer of the process results.
+      pooled_session (ClientSession): Long-lived session, if connections are pooled.
+    """
+    # Requests are shared lazily by all the workers
+    pending: Iterator[PreparedRequest] = iter(requests)
+    in_flight = 0
+
+    async def worker() -> None:
+        nonlocal in_flight
+
+        for request in pending:
+            # The rest of the requests are dropped once asked to stop, or
+            # once the steady state is precise enough
+            if stats.stopped or writer.done:
+                break
+
+            in_flight += 1
+            await send_request(
+                request,
+                response_headers,
+                session_timeout,
+                stats,
+                writer,
+                pooled_session,
             )
 
-            if semaphore.locked():
+            # Delay the next request while every worker is busy
+            if in_flight >= concurrent:
                 await asyncio.sleep(rate_per_request)
+            in_flight -= 1
+
+    await asyncio.gather(
+        *(worker() for _ in range(min(concurrent, len(requests)))),
+        return_exceptions=False,
+    )
+
+
+async def schedule_task(
+    requests: Sequence,
+    response_headers: list,
+    offsets: np.ndarray,
+    session_timeout: ClientTimeout,
+    stats: StatsRecorder,
+    writer: ResultWriter,
+    pooled_session: Optional[ClientSession] = None,
+    start_at: Optional[float] = None,
+) -> None:
+    """
+    The function sends the requests at their scheduled time (open-loop),
+    regardless of how many requests are still in flight.
+
+    Parameters:
+      requests (Sequence): Sequence of PreparedRequest.
+      response_headers (list): Response headers to capture.
+      offsets (np.ndarray): Send offset (seconds) of each request.
+      session_timeout (ClientTimeout): Timeout configuration.
+      stats (StatsRecorder): Live counters of the process.
+      writer (ResultWriter): Writer of the process results.
+      pooled_session (ClientSession): Long-lived session, if connections are pooled.
+      start_at (float): Timestamp of the start of the schedule, shared by every
+        process (now if not given).
+    """
+    loop = asyncio.get_running_loop()
+
+    # Monotonic clock drives the schedule, wall clock is only recorded
+    wall_start = time.time() if start_at is None else start_at
+    start = loop.time() + wall_start - time.time()
+
+    # Only the requests in flight are kept
+    in_flight: set = set()
+    for offset, request in zip(offsets.tolist(), requests):
+        delay = start + offset - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        # The rest of the schedule is dropped once asked to stop, or once
+        # the steady state is precise enough
+        if stats.stopped or writer.done:
+            break
+
+        sent = asyncio.create_task(
+            send_request(
+                request,
+                response_headers,
+                session_timeout,
+                stats,
+                writer,
+                pooled_session,
+                wall_start + offset,
+            )
+        )
+        in_flight.add(sent)
+        sent.add_done_callback(in_flight.discard)
 
-            return fetched
+    await asyncio.gather(*in_flight, return_exceptions=False)
 
 
 async def prepare_task(
-    data: DataFrame,
+    requests: Sequence,
     response_headers: list,
     concurrent: int,
     rate_per_request: int,
-    progress_bar: Progress,
-    task: TaskID,
-) -> DataFrame:
+    stats: StatsRecorder,
+    connection: dict,
+    writer: ResultWriter,
+    schedule: Optional[dict] = None,
+    sampler: Optional[ResourceSampler] = None,
+) -> None:
     """
     The function prepares the tasks with concurrency and delay per task.
 
     Parameters:
-      data (pd.core.frame.DataFrame): Data sample for process.
+      requests (Sequence): Sequence of PreparedRequest for process.
       response_headers (list): Response headers to capture.
       concurrent (int): Concurrent size.
       rate_per_request (int): Delay of request per second.
-      progress_bar (Progress): Current progress bar.
-
-    Returns:
-      DataFrame: List of function's requests
+      stats (StatsRecorder): Live counters of the process.
+      connection (dict): Connection configuration.
+      writer (ResultWriter): Writer of the process results.
+      schedule (dict): Open-loop arrival schedule, closed-loop if not given.
+      sampler (ResourceSampler): Sampler of the process resources, if any.
     """
-    # create instance of Semaphore
-    semaphore = Semaphore(concurrent)
-
     # set the session timeout (this affects all requests)
     # https://stackoverflow.com/questions/64534844/python-asyncio-aiohttp-timeout
     # https://github.com/aio-libs/aiohttp/issues/3203
     session_timeout = ClientTimeout(total=None)
 
-    updated_data = data
-    tasks = [
-        asyncio.create_task(
-            check_sem_async(
-                request,
+    # One long-lived session per process when connections are pooled
+    # (an open-loop schedule is not capped by the concurrent size)
+    pooled_session = (
+        create_session(
+            session_timeout,
+            create_connector(concurrent if schedule is None else 0, connection),
+        )
+        if connection.get("mode", "fresh") == "pooled"
+        else None
+    )
+
+    if sampler is not None:
+        sampler.start()
+
+    try:
+        if schedule is not None:
+            await schedule_task(
+                requests,
                 response_headers,
-                semaphore,
+                build_schedule(schedule, len(requests)),
                 session_timeout,
+                stats,
+                writer,
+                pooled_session,
+                schedule.get("start_at"),
+            )
+
+        else:
+            await worker_pool(
+                requests,
+                response_headers,
+                concurrent,
                 rate_per_request,
-                progress_bar,
-                task,
+                session_timeout,
+                stats,
+                writer,
+                pooled_session,
             )
-        )
-        for _, request in data.iterrows()
-    ]
-
-    response_output = await asyncio.gather(*tasks, return_exceptions=False)
-    filtered_output: List = list(filter(None, response_output))
-
-    updated_data[
-        [
-            "request_id",
-            "response_id",
-            "response_status",
-            "response_body",
-            "request_time",
-            "response_time",
-        ]
-        + response_headers
-    ] = np.array(filtered_output, dtype=object)
 
-    return updated_data
+    finally:
+        if sampler is not None:
+            await sampler.stop()
+
+        if pooled_session is not None:
+            await pooled_session.close()
 
 
 def prepare_fetch(
-    data: DataFrame,
+    requests: Sequence,
     response_headers: list,
     concurrent: int,
     rate_per_request: int,
-    proc_index: int,
-) -> DataFrame:
+    stats: StatsRecorder,
+    output_file: str,
+    connection: Optional[dict] = None,
+    schedule: Optional[dict] = None,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+    sample_interval: Optional[float] = SAMPLE_INTERVAL,
+    steady_state: Optional[dict] = None,
+) -> dict:
     """
     The function prepares the fetcher for asyncronous profiling.
 
     Parameters:
-      data (DataFrame): Data sample for process.
+      requests (Sequence): Sequence of PreparedRequest for process.
       response_headers (list): Response headers to capture.
       concurrent (int): Concurrent size.
       rate_per_request (int): Delay of request per second.
-      process_index (str): Process index.
+      stats (StatsRecorder): Live counters of the process.
+      output_file (str): Partial results file of the process.
+      connection (dict): Connection configuration (fresh or pooled).
+      schedule (dict): Open-loop arrival schedule, closed-loop if not given.
+      loop (AbstractEventLoop): Event loop of a long-lived process, if any.
+      sample_interval (float): Seconds between two samples of the process
+        resources (not sampled if not given).
+      steady_state (dict): Settings of the steady state detection (not
+        detected if not given).
 
     Returns:
-      DataFrame: List of function's requests
+      dict: Summary of the results written by the process, with its samples
     """
+    sampler = ResourceSampler(sample_interval) if sample_interval else None
 
     try:
-        with Progress(
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(bar_width=None),
-            TextColumn("[progress.percentage]{task.percentage:>5.1f}%"),
-            TimeColumn(),
-            console=console,
-        ) as progress:
-            task = progress.add_task(
-                f"Process {proc_index} ({getpid()})", total=len(data)
-            )
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        detector = (
+            SteadyStateDetector(steady_state) if steady_state is not None else None
+        )
+        with ResultWriter(output_file, detector) as writer:
+            # Long-lived processes reuse their event loop for every command
+            event_loop = loop or asyncio.new_event_loop()
+            asyncio.set_event_loop(event_loop)
 
-            results = loop.run_until_complete(
+            event_loop.run_until_complete(
                 prepare_task(
-                    data, response_headers, concurrent, rate_per_request, progress, task
+                    requests,
+                    response_headers,
+                    concurrent,
+                    rate_per_request,
+                    stats,
+                    connection or {},
+                    writer,
+                    schedule,
+                    sampler,
                 )
             )
 
-            progress.update(
-                task,
-                description=f"[bold green]Fetch Completed: {proc_index} ({getpid()})",
-                advance=len(data),
-            )
-
-            # Wait 5s for the underlying SSL connections to close
-            loop.run_until_complete(asyncio.sleep(2))
-            loop.close()
+            if loop is None:
+                # Wait 5s for the underlying SSL connections to close
+                event_loop.run_until_complete(asyncio.sleep(2))
+                event_loop.close()
 
-            return results
+            return writer.summary(len(requests)) | {
+                "worker_metrics": sampler.samples if sampler is not None else []
+            }
 
     except Exception as err:
         logger.error(f"Error from fetcher: {err}")
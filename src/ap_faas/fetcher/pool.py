@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import asyncio
+import time
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection, wait
+from types import TracebackType
+from typing import Optional, Sequence, Type
+
+# Local imports
+from ap_faas.fetcher.dashboard import SharedStats, StatsRecorder
+from ap_faas.fetcher.fetch import prepare_fetch
+from ap_faas.fetcher.sampler import SAMPLE_INTERVAL
+from ap_faas.utils.logger import logger
+
+
+def worker_main(
+    proc_index: int,
+    channel: "Connection[tuple, Optional[dict]]",
+    stats: SharedStats,
+    requests: Sequence,
+    response_headers: list,
+    connection: dict,
+) -> None:
+    """
+    The function runs a long-lived fetch process, executing each command
+    received over its channel on the same event loop.
+
+    Parameters:
+      proc_index (int): Process index.
+      channel (Connection): Channel with the parent process.
+      stats (SharedStats): Live counters of the pool.
+      requests (Sequence): Sequence of PreparedRequest of the experiment.
+      response_headers (list): Response headers to capture.
+      connection (dict): Connection configuration (fresh or pooled).
+    """
+    recorder = StatsRecorder(stats, proc_index)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        while True:
+            command = channel.recv()
+
+            # Stop command
+            if command is None:
+                break
+
+            try:
+                summary = prepare_fetch(
+                    requests[command["start"] : command["stop"]],
+                    response_headers,
+                    command["concurrent"],
+                    command["rate_per_request"],
+                    recorder,
+                    command["output_file"],
+                    connection,
+                    command["schedule"],
+                    loop,
+                    command.get("sample_interval", SAMPLE_INTERVAL),
+                    command.get("steady_state"),
+                )
+                channel.send(("done", summary))
+
+            except Exception as err:
+                channel.send(("error", str(err)))
+
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+    finally:
+        # Wait for the underlying SSL connections to close
+        loop.run_until_complete(asyncio.sleep(0.25))
+        loop.close()
+
+
+def get_functions(requests: Sequence) -> list:
+    """
+    The function retrieves the function names of the experiment, in the order
+    of the live latency histograms.
+
+    Parameters:
+      requests (Sequence): Sequence of PreparedRequest of the experiment.
+
+    Returns:
+      list: Function names
+    """
+    # A sample catalogue knows its functions without drawing every request
+    functions = getattr(requests, "functions", None)
+
+    return functions or sorted({request.function for request in requests})
+
+
+class WorkerPool:
+    """
+    This is a pool of fetch processes started once per experiment and
+    reused for every concurrent size.
+
+    Attributes:
+      processes (int): Number of processes.
+      stats (SharedStats): Live counters of every process.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        requests: Sequence,
+        response_headers: list,
+        connection: dict,
+    ) -> None:
+        """
+        The constructor for WorkerPool class.
+
+        Parameters:
+          processes (int): Number of processes.
+          requests (Sequence): Sequence of PreparedRequest of the experiment.
+          response_headers (list): Response headers to capture.
+          connection (dict): Connection configuration (fresh or pooled).
+        """
+        self.processes = processes
+        self.stats = SharedStats(processes, get_functions(requests))
+        self.__channels: list = []
+        self.__workers: list = []
+
+        for index in range(processes):
+            parent_channel, child_channel = Pipe()
+            worker = Process(
+                target=worker_main,
+                args=(
+                    (index + 1),
+                    child_channel,
+                    self.stats,
+                    requests,
+                    response_headers,
+                    connection,
+                ),
+                daemon=True,
+            )
+            worker.start()
+            child_channel.close()
+
+            self.__channels.append(parent_channel)
+            self.__workers.append(worker)
+
+        logger.info(f"Worker pool started: {processes} process(es)")
+
+    def run(
+        self,
+        commands: list,
+        ramp_up_per_core: float,
+        start_at: Optional[float] = None,
+    ) -> list:
+        """
+        The function sends a command to each process and waits for all of them.
+
+        Parameters:
+          commands (list): Command per process (bounds, concurrency and output).
+          ramp_up_per_core (float): Interval between the start of each process.
+          start_at (float): Timestamp to start the first process, if synchronized.
+
+        Returns:
+          list: Summary of the results written by each process
+        """
+        if len(commands) > self.processes:
+            raise Exception(
+                f"{len(commands)} commands for a pool of {self.processes} process(es)"
+            )
+
+        if start_at is not None:
+            time.sleep(max(start_at - time.time(), 0))
+
+        channels = self.__channels[: len(commands)]
+        for index, (channel, command) in enumerate(zip(channels, commands)):
+            channel.send(command)
+
+            # Ramp up time
+            if index < len(commands) - 1:
+                time.sleep(ramp_up_per_core)
+
+        results = []
+        errors = []
+        pending = list(channels)
+        while pending:
+            ready = wait(pending)
+            for channel in [channel for channel in pending if channel in ready]:
+                pending.remove(channel)
+                try:
+                    status, content = channel.recv()
+                except EOFError:
+                    status, content = "error", "Process terminated unexpectedly"
+
+                if status == "done":
+                    results.append(content)
+                else:
+                    errors.append(content)
+
+        if errors:
+            raise Exception(f"Error from fetcher: {errors[0]}")
+
+        return results
+
+    def close(self) -> None:
+        """
+        The function stops every process of the pool.
+        """
+        logger.info("Shutting processes down: started")
+        for channel in self.__channels:
+            try:
+                channel.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+
+        for worker in self.__workers:
+            worker.join()
+
+        for channel in self.__channels:
+            channel.close()
+        logger.info("Shutting processes down: finished")
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
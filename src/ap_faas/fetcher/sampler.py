@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import asyncio
+import os
+import time
+from typing import Optional
+
+# Seconds between two samples of a fetch process
+SAMPLE_INTERVAL = 0.5
+
+# Event loop lag (seconds) beyond which the client is considered saturated
+LAG_THRESHOLD = 0.05
+
+# Columns of each sample of a fetch process
+METRIC_COLUMNS = ["time", "pid", "loop_lag", "cpu_percent", "rss_mb", "sockets"]
+
+# Size of a memory page, to read the resident set size
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_mb() -> Optional[float]:
+    """
+    The function retrieves the resident set size of the process (Linux).
+
+    Returns:
+      float: Resident set size in megabytes, if available
+    """
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE / 1024 / 1024
+    except OSError:
+        return None
+
+
+def _sockets() -> Optional[int]:
+    """
+    The function counts the sockets opened by the process (Linux).
+
+    Returns:
+      int: Number of open sockets, if available
+    """
+    try:
+        count = 0
+        with os.scandir("/proc/self/fd") as descriptors:
+            for descriptor in descriptors:
+                try:
+                    count += os.readlink(descriptor.path).startswith("socket:")
+                except OSError:
+                    continue
+        return count
+    except OSError:
+        return None
+
+
+class ResourceSampler:
+    """
+    This is a sampler of the event loop lag, CPU, memory and sockets of a
+    fetch process, running on the loop it measures.
+
+    Attributes:
+      interval (float): Seconds between two samples.
+      samples (list): Samples taken (see METRIC_COLUMNS).
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        """
+        The constructor for ResourceSampler class.
+
+        Parameters:
+          interval (float): Seconds between two samples.
+        """
+        self.interval = interval
+        self.samples: list = []
+        self.__task: Optional[asyncio.Task] = None
+
+    async def __sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        pid = os.getpid()
+        last_wall = loop.time()
+        last_cpu = time.process_time()
+
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+
+            # A busy loop wakes the sampler up late
+            now = loop.time()
+            cpu = time.process_time()
+            self.samples.append(
+                (
+                    time.time(),
+                    pid,
+                    round(max(now - expected, 0), 6),
+                    round((cpu - last_cpu) / (now - last_wall) * 100, 1),
+                    _rss_mb(),
+                    _sockets(),
+                )
+            )
+            last_wall, last_cpu = now, cpu
+
+    def start(self) -> None:
+        """
+        The function starts sampling on the running event loop.
+        """
+        self.__task = asyncio.get_running_loop().create_task(self.__sample())
+
+    async def stop(self) -> list:
+        """
+        The function stops sampling.
+
+        Returns:
+          list: Samples taken
+        """
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+        return self.samples
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import numpy as np
+import pandas as pd
+
+# Local imports
+from ap_faas.utils.file_handler import iter_column
+
+# Arrival modes with a precomputed schedule (open-loop)
+OPEN_LOOP_MODES = ["constant", "poisson", "step", "ramp", "replay"]
+
+# Column of the recorded send time of each request in a replayed trace
+REPLAY_COLUMN = "request_time"
+
+# Delay (seconds) past the scheduled send time beyond which the schedule is
+# not reproduced
+SEND_LAG_THRESHOLD = 0.05
+
+
+def is_open_loop(arrival: dict) -> bool:
+    """
+    The function checks whether the arrival mode is open-loop.
+
+    Parameters:
+      arrival (dict): Arrival configuration.
+
+    Returns:
+      bool: Open-loop validation
+    """
+    return arrival.get("mode", "closed") in OPEN_LOOP_MODES
+
+
+def build_schedule(schedule: dict, size: int) -> np.ndarray:
+    """
+    The function computes the send offsets of the requests of a process.
+
+    Parameters:
+      schedule (dict): Arrival mode, rate (requests per second) and random seed.
+      size (int): Number of requests.
+
+    Returns:
+      np.ndarray: Send offset (seconds) of each request from the start
+    """
+    mode = schedule["mode"]
+
+    if size == 0:
+        return np.zeros(0)
+
+    # Offsets of a replayed trace, shared out beforehand
+    if mode == "replay":
+        offsets = np.asarray(schedule["offsets"], dtype=float)
+        if len(offsets) < size:
+            raise Exception(f"{len(offsets)} replay offsets for {size} requests")
+        return offsets[:size]
+
+    rate = float(schedule["rate"])
+
+    if rate <= 0:
+        raise Exception(f"Arrival rate must be greater than zero: {rate}")
+
+    if mode == "constant":
+        intervals = np.full(size, 1 / rate)
+
+    elif mode == "poisson":
+        rng = np.random.default_rng(schedule["seed"])
+        intervals = rng.exponential(1 / rate, size)
+
+    elif mode == "step":
+        # Equally sized steps reaching the rate on the last step
+        steps = min(int(schedule.get("steps", 4)), size)
+        step_rates = rate * np.arange(1, steps + 1) / steps
+        step_sizes = np.diff(np.linspace(0, size, steps + 1).round().astype(int))
+        intervals = 1 / np.repeat(step_rates, step_sizes)
+
+    elif mode == "ramp":
+        initial_rate = min(float(schedule.get("initial_rate", 1)), rate)
+        intervals = 1 / np.linspace(initial_rate, rate, size)
+
+    else:
+        raise Exception(f"Arrival mode not supported: {mode}")
+
+    # The first request is sent at the start of the schedule
+    return np.concatenate(([0.0], np.cumsum(intervals[:-1])))
+
+
+def _to_epoch(values: pd.Series) -> np.ndarray:
+    """
+    The function converts recorded send times to epoch seconds.
+
+    Parameters:
+      values (Series): Epoch seconds, timestamps or dates.
+
+    Returns:
+      np.ndarray: Epoch seconds
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+
+    timestamps = pd.to_datetime(values, utc=True)
+    return timestamps.to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+
+
+def read_replay_offsets(arrival: dict, size: int) -> np.ndarray:
+    """
+    The function reads the send offsets of a recorded trace (a test file of
+    an earlier experiment or any file with a send time column), one chunk
+    at a time, keeping only the earliest send times in memory.
+
+    Parameters:
+      arrival (dict): Arrival configuration (trace, column and speedup).
+      size (int): Number of requests to replay.
+
+    Returns:
+      np.ndarray: Send offset (seconds) of each request from the start
+    """
+    trace = arrival.get("trace")
+    if not trace:
+        raise Exception("The replay arrival mode requires a trace file")
+
+    column = arrival.get("column", REPLAY_COLUMN)
+    speedup = float(arrival.get("speedup", 1))
+    if speedup <= 0:
+        raise Exception(f"Replay speedup must be greater than zero: {speedup}")
+
+    # Requests of the merged test files are not in send order, so the
+    # earliest ones are selected from every chunk
+    times = np.zeros(0)
+    count = 0
+    try:
+        for chunk in iter_column(trace, column):
+            chunk_times = _to_epoch(chunk.dropna())
+            count += len(chunk_times)
+            times = np.concatenate([times, chunk_times])
+            if len(times) > size:
+                times = np.partition(times, size - 1)[:size]
+    except (OSError, ValueError, KeyError) as err:
+        raise Exception(f"Error reading the replay trace {trace}: {err}")
+
+    if count < size:
+        raise Exception(
+            f"Replay trace with {count} request(s) for a data size of {size}"
+        )
+
+    times = np.sort(times)
+
+    return (times - times[0]) / speedup
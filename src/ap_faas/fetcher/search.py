@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import math
+import threading
+from collections import Counter
+from types import TracebackType
+from typing import Optional, Type
+
+import numpy as np
+
+# Local imports
+from ap_faas.fetcher.dashboard import COUNTERS, DIGITS, SharedStats
+from ap_faas.utils.histogram import LatencyHistogram
+from ap_faas.utils.logger import logger
+
+# Service level objective when it is not configured
+DEFAULT_SLO = {
+    "p99": None,
+    "error_rate": 0.01,
+    "min_requests": 100,
+}
+
+# Seconds between two checks of the live counters
+CHECK_INTERVAL = 0.5
+
+
+def check_slo(slo: dict, count: int, errors: int, p99: float) -> Optional[str]:
+    """
+    The function checks the requests of a concurrent size against the
+    service level objective.
+
+    Parameters:
+      slo (dict): Service level objective (p99 in ms, error rate and minimum
+        number of requests).
+      count (int): Number of completed requests.
+      errors (int): Number of failed requests (4xx and 5xx).
+      p99 (float): 99th percentile of the latency (seconds).
+
+    Returns:
+      str: Breach of the objective, if any
+    """
+    slo = DEFAULT_SLO | slo
+    if count < slo["min_requests"]:
+        return None
+
+    error_rate = errors / count
+    if slo["error_rate"] is not None and error_rate > slo["error_rate"]:
+        return f"error rate {error_rate:.2%} above {slo['error_rate']:.2%}"
+
+    if slo["p99"] is not None and not math.isnan(p99) and p99 * 1000 > slo["p99"]:
+        return f"p99 {p99 * 1000:.1f} ms above {slo['p99']} ms"
+
+    return None
+
+
+def check_results(slo: dict, status: Counter, latency: dict) -> Optional[str]:
+    """
+    The function checks the results of a concurrent size against the
+    service level objective, with the same minimum number of requests as
+    the live counters.
+
+    Parameters:
+      slo (dict): Service level objective.
+      status (Counter): Number of requests per response status.
+      latency (dict): Latency summary of the concurrent size.
+
+    Returns:
+      str: Breach of the objective, if any
+    """
+    errors = sum(count for code, count in status.items() if code >= 400)
+    return check_slo(slo, sum(status.values()), errors, latency["summary"]["p99"])
+
+
+class ConcurrencySearch:
+    """
+    This is the search of the highest concurrent size meeting the service
+    level objective: the size doubles until the objective is breached, then
+    a binary search narrows the range down to the resolution.
+
+    Attributes:
+      maximum (int): Highest concurrent size.
+      resolution (int): Width of the range where the search ends.
+      passed (int): Highest concurrent size meeting the objective (0 if none).
+      breached (int): Lowest concurrent size breaching the objective, if any.
+    """
+
+    def __init__(self, initial: int, maximum: int, resolution: int) -> None:
+        """
+        The constructor for ConcurrencySearch class.
+
+        Parameters:
+          initial (int): First concurrent size.
+          maximum (int): Highest concurrent size.
+          resolution (int): Width of the range where the search ends.
+        """
+        self.maximum = maximum
+        self.resolution = max(resolution, 1)
+        self.passed = 0
+        self.breached: Optional[int] = None
+        self.__next: Optional[int] = min(initial, maximum)
+
+    def next(self) -> Optional[int]:
+        """
+        The function retrieves the next concurrent size to run.
+
+        Returns:
+          int: Concurrent size, if the search is not over
+        """
+        return self.__next
+
+    def record(self, concurrent: int, breach: Optional[str]) -> None:
+        """
+        The function records the outcome of a concurrent size.
+
+        Parameters:
+          concurrent (int): Concurrent size.
+          breach (str): Breach of the objective, if any.
+        """
+        if breach is None:
+            self.passed = max(self.passed, concurrent)
+        else:
+            self.breached = min(self.breached or concurrent, concurrent)
+
+        if self.breached is None:
+            # Exponential growth up to the maximum
+            following = min(self.passed * 2, self.maximum)
+            self.__next = following if following > self.passed else None
+        elif self.breached - self.passed <= self.resolution:
+            self.__next = None
+        else:
+            self.__next = self.passed + (self.breached - self.passed) // 2
+
+
+class SloMonitor:
+    """
+    This is a watcher of the live counters of a concurrent size, asking the
+    fetch processes to stop as soon as the service level objective is
+    breached.
+
+    Attributes:
+      breach (str): Breach of the objective, if any.
+    """
+
+    def __init__(self, stats: SharedStats, slo: dict) -> None:
+        """
+        The constructor for SloMonitor class.
+
+        Parameters:
+          stats (SharedStats): Shared counters of the pool.
+          slo (dict): Service level objective.
+        """
+        self.breach: Optional[str] = None
+        self.__stats = stats
+        self.__slo = slo
+        self.__histogram = LatencyHistogram(DIGITS)
+        self.__done = threading.Event()
+        self.__thread = threading.Thread(target=self.__watch, daemon=True)
+
+        # Counters are cumulative for the whole experiment
+        self.__baseline = stats.view().sum(axis=0)
+
+    def __check(self) -> Optional[str]:
+        current = self.__stats.view().sum(axis=0) - self.__baseline
+        counters = dict(zip(COUNTERS, current[: len(COUNTERS)].tolist()))
+
+        # Latency of every function together
+        counts = current[len(COUNTERS) :].reshape(-1, self.__stats.buckets).sum(axis=0)
+        total = int(counts.sum())
+        p99 = math.nan
+        if total:
+            rank = math.ceil(total * 0.99)
+            index = int(np.searchsorted(np.cumsum(counts), rank))
+            p99 = self.__histogram.values()[index] / 1e6
+
+        return check_slo(
+            self.__slo,
+            counters["completed"],
+            counters["4xx"] + counters["5xx"],
+            p99,
+        )
+
+    def __watch(self) -> None:
+        while not self.__done.wait(CHECK_INTERVAL):
+            breach = self.__check()
+            if breach is not None:
+                self.breach = breach
+                self.__stats.stop()
+                logger.warning(f"Service level objective breached: {breach}")
+                return
+
+    def __enter__(self) -> "SloMonitor":
+        self.__stats.stop(False)
+        self.__thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.__done.set()
+        self.__thread.join()
+        self.__stats.stop(False)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import csv
+import os
+import shutil
+from collections import Counter
+from types import TracebackType
+from typing import Optional, Type
+
+# Local imports
+from ap_faas.fetcher.steady import STEADY, SteadyStateDetector
+from ap_faas.utils.file_handler import convert_csv, get_output_file
+from ap_faas.utils.histogram import LatencyHistogram
+
+# Number of rows buffered before they are flushed to disk
+FLUSH_EVERY = 256
+
+
+class ResultWriter:
+    """
+    This is an append-only writer for the completed requests of one process.
+
+    Attributes:
+      filename (str): Location of the partial results file.
+      count (int): Number of rows written.
+      status (Counter): Number of rows written per response status.
+      histogram (LatencyHistogram): Latency of the requests with a response.
+      detector (SteadyStateDetector): Steady state detection, if enabled.
+      steady_histogram (LatencyHistogram): Latency of the steady requests.
+      lag_histogram (LatencyHistogram): Delay of the requests past their
+        scheduled send time (open-loop).
+    """
+
+    def __init__(
+        self, filename: str, detector: Optional[SteadyStateDetector] = None
+    ) -> None:
+        """
+        The constructor for ResultWriter class.
+
+        Parameters:
+          filename (str): Location of the partial results file.
+          detector (SteadyStateDetector): Steady state detection, if enabled.
+        """
+        self.filename = filename
+        self.count = 0
+        self.status: Counter = Counter()
+        self.histogram = LatencyHistogram()
+        self.detector = detector
+        self.steady_histogram = LatencyHistogram()
+        self.lag_histogram = LatencyHistogram()
+
+        self.__file = open(filename, "w", newline="")
+        self.__writer = csv.writer(self.__file)
+
+    @property
+    def done(self) -> bool:
+        """
+        The function checks whether the process can end before its last request.
+
+        Returns:
+          bool: Whether the steady state reached its precision
+        """
+        return self.detector is not None and self.detector.done
+
+    def write(
+        self,
+        row: tuple,
+        status: int,
+        response_time: float,
+        lag: Optional[float] = None,
+    ) -> None:
+        """
+        The function appends a completed request to the file, with its phase
+        (warmup or steady) when the steady state is detected.
+
+        Parameters:
+          row (tuple): Request data point and its result.
+          status (int): Response status of the request.
+          response_time (float): Response time of the request (0 if none).
+          lag (float): Delay past the scheduled send time, if open-loop.
+        """
+        phase = (
+            self.detector.record(status, response_time)
+            if self.detector is not None
+            else None
+        )
+        self.__writer.writerow(row + (phase,))
+        self.count += 1
+        self.status[status] += 1
+
+        if response_time > 0:
+            self.histogram.record(response_time)
+            if phase == STEADY:
+                self.steady_histogram.record(response_time)
+
+        if lag is not None:
+            self.lag_histogram.record(lag)
+
+        if self.count % FLUSH_EVERY == 0:
+            self.__file.flush()
+
+    def close(self) -> None:
+        """
+        The function flushes and closes the file.
+        """
+        self.__file.close()
+
+    def summary(self, size: Optional[int] = None) -> dict:
+        """
+        The function summarizes the rows written by the process.
+
+        Parameters:
+          size (int): Requests of the process, to count the ones left unsent
+            once the steady state is precise enough.
+
+        Returns:
+          dict: Partial results file, row count, status count, latency and
+            send lag, with the steady state detection if enabled
+        """
+        summary = {
+            "file": self.filename,
+            "count": self.count,
+            "status": self.status,
+            "histogram": self.histogram,
+            "lag_histogram": self.lag_histogram,
+        }
+        if self.detector is not None:
+            summary |= {
+                "steady_state": self.detector.summary(
+                    max(size - self.count, 0) if size is not None else 0
+                ),
+                "steady_histogram": self.steady_histogram,
+            }
+
+        return summary
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def merge_results(
+    part_files: list,
+    columns: list,
+    output_file: str,
+    output_format: str = "csv",
+    column_types: Optional[dict] = None,
+) -> str:
+    """
+    The function merges the partial results of each process into one file.
+
+    Parameters:
+      part_files (list): Partial results files (without header).
+      columns (list): Header of the output file.
+      output_file (str): Location of the merged file (without extension).
+      output_format (str): Output format (csv, parquet or arrow).
+      column_types (dict): Type of the columns in columnar output formats.
+
+    Returns:
+      str: Location of the merged file
+    """
+    csv_file = get_output_file(output_file)
+    with open(csv_file, "w", newline="") as output:
+        csv.writer(output).writerow(columns)
+
+        for part_file in part_files:
+            with open(part_file, "r", newline="") as part:
+                shutil.copyfileobj(part, output)
+            os.remove(part_file)
+
+    return convert_csv(csv_file, output_format, column_types)
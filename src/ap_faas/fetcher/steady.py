@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import math
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+# Settings of the steady state detection when they are not configured
+DEFAULT_STEADY_STATE = {
+    "batch_size": 100,
+    "window": 10,
+    "precision": 0.05,
+    "p99_precision": 0.1,
+    "end_early": False,
+    "min_requests": 1000,
+}
+
+# Critical value of the confidence intervals (95%)
+CONFIDENCE_Z = 1.96
+
+# Phase of each request of a process
+WARMUP, STEADY = "warmup", "steady"
+
+
+def _is_precise(values: np.ndarray, precision: float) -> bool:
+    """
+    The function checks whether the confidence interval of the mean of
+    batch statistics is narrow enough.
+
+    Parameters:
+      values (np.ndarray): Statistic of each batch.
+      precision (float): Highest half-width relative to the mean.
+
+    Returns:
+      bool: Precision validation
+    """
+    mean = values.mean()
+    if len(values) < 2 or mean <= 0:
+        return False
+
+    half_width = CONFIDENCE_Z * values.std(ddof=1) / math.sqrt(len(values))
+    return bool(half_width / mean <= precision)
+
+
+class SteadyStateDetector:
+    """
+    This is an online estimator of the latency of a process with batch means:
+    the process is steady once the confidence intervals of the mean and of
+    the p99 over the last batches are narrow enough, and done once the steady
+    batches alone reach the same precision.
+
+    Attributes:
+      batch_size (int): Requests per batch.
+      precision (float): Relative half-width of the interval of the mean.
+      p99_precision (float): Relative half-width of the interval of the p99.
+      end_early (bool): Whether the process ends once done.
+      min_requests (int): Steady requests before the process can end.
+      phase (str): Current phase (warmup or steady).
+      warmup_requests (int): Requests recorded before the steady state.
+    """
+
+    def __init__(self, settings: Optional[dict] = None) -> None:
+        """
+        The constructor for SteadyStateDetector class.
+
+        Parameters:
+          settings (dict): Settings of the detection (see DEFAULT_STEADY_STATE).
+        """
+        settings = DEFAULT_STEADY_STATE | (settings or {})
+        self.batch_size = int(settings["batch_size"])
+        self.precision = float(settings["precision"])
+        self.p99_precision = float(settings["p99_precision"])
+        self.end_early = bool(settings["end_early"])
+        self.min_requests = int(settings["min_requests"])
+        self.phase = WARMUP
+        self.warmup_requests = 0
+
+        self.__batch: list = []
+        self.__window: deque = deque(maxlen=int(settings["window"]))
+        self.__steady: list = []
+        self.__done = False
+
+    @property
+    def done(self) -> bool:
+        """
+        The function checks whether the process can end.
+
+        Returns:
+          bool: Whether the steady state reached the precision
+        """
+        return self.end_early and self.__done
+
+    def __precise(self, batches: list) -> bool:
+        statistics = np.array(batches)
+        return _is_precise(statistics[:, 0], self.precision) and _is_precise(
+            statistics[:, 1], self.p99_precision
+        )
+
+    def record(self, status: int, response_time: float) -> str:
+        """
+        The function records a completed request.
+
+        Parameters:
+          status (int): Response status of the request.
+          response_time (float): Response time of the request (0 if none).
+
+        Returns:
+          str: Phase of the request
+        """
+        phase = self.phase
+        if phase == WARMUP:
+            self.warmup_requests += 1
+
+        # Only successful responses describe the latency
+        if status != 200 or response_time <= 0:
+            return phase
+
+        self.__batch.append(response_time)
+        if len(self.__batch) < self.batch_size:
+            return phase
+
+        batch = np.array(self.__batch)
+        statistics = (batch.mean(), np.percentile(batch, 99))
+        self.__batch.clear()
+
+        if self.phase == WARMUP:
+            self.__window.append(statistics)
+            if len(self.__window) == self.__window.maxlen and self.__precise(
+                list(self.__window)
+            ):
+                self.phase = STEADY
+
+        else:
+            self.__steady.append(statistics)
+            steady_requests = len(self.__steady) * self.batch_size
+            self.__done = steady_requests >= self.min_requests and self.__precise(
+                self.__steady
+            )
+
+        return phase
+
+    def summary(self, skipped: int = 0) -> dict:
+        """
+        The function summarizes the detection.
+
+        Parameters:
+          skipped (int): Requests of the process left unsent.
+
+        Returns:
+          dict: Phase reached, warm-up requests and whether the process ended
+            before its last request
+        """
+        return {
+            "phase": self.phase,
+            "warmup_requests": self.warmup_requests,
+            "precision_reached": self.__done,
+            "ended_early": self.done and skipped > 0,
+            "skipped_requests": skipped,
+        }
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import json
+import math
+from collections.abc import Sequence
+from typing import Iterator, Optional, Union, overload
+
+import numpy as np
+from pandas.core.frame import DataFrame
+from yarl import URL
+
+# Local imports
+from ap_faas.fetcher.body import BodyPolicy
+
+# Headers sent along with a JSON body
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Requests drawn from the same random stream of a sample catalogue
+BLOCK_SIZE = 4096
+
+
+class PreparedRequest:
+    """
+    This is a request compiled ahead of time, ready to be sent.
+
+    Attributes:
+      row (tuple): Data point of the request, stored with its result.
+      function (str): Function name.
+      method (str): HTTP method.
+      url (URL): Parsed URL of the request.
+      body (bytes): Serialized JSON body, if any.
+      label (str): Description of the request.
+      body_policy (BodyPolicy): Handling of the response body.
+    """
+
+    __slots__ = ("row", "function", "method", "url", "body", "label", "body_policy")
+
+    def __init__(
+        self,
+        row: tuple,
+        function: str,
+        method: str,
+        url: URL,
+        body: Optional[bytes],
+        label: str,
+        body_policy: Optional[BodyPolicy] = None,
+    ) -> None:
+        """
+        The constructor for PreparedRequest class.
+
+        Parameters:
+          row (tuple): Data point of the request, stored with its result.
+          function (str): Function name.
+          method (str): HTTP method.
+          url (URL): Parsed URL of the request.
+          body (bytes): Serialized JSON body, if any.
+          label (str): Description of the request.
+          body_policy (BodyPolicy): Handling of the response body.
+        """
+        self.row = row
+        self.function = function
+        self.method = method
+        self.url = url
+        self.body = body
+        self.label = label
+        self.body_policy = body_policy
+
+
+def serialize_body(body: object) -> Optional[bytes]:
+    """
+    The function serializes the JSON body of a request.
+
+    Parameters:
+      body (object): JSON body of the request.
+
+    Returns:
+      bytes: Serialized body, if any
+    """
+    if body is None or (isinstance(body, float) and math.isnan(body)):
+        return None
+
+    return json.dumps(body).encode("utf-8")
+
+
+def compile_requests(data: DataFrame, body_policies: Optional[dict] = None) -> list:
+    """
+    The function compiles the sample data into requests ready to be sent.
+
+    Parameters:
+      data (DataFrame): Generated test data to fetch.
+      body_policies (dict): Response body policy per function (keep if not given).
+
+    Returns:
+      list: List of PreparedRequest
+    """
+    columns = list(data.columns)
+    function, endpoint, path, method, query_string, body = (
+        columns.index(column)
+        for column in [
+            "function_name",
+            "endpoint",
+            "path",
+            "method",
+            "query_string",
+            "body",
+        ]
+    )
+
+    # Requests repeat the same samples, so each distinct one is compiled once
+    compiled: dict = {}
+    requests = []
+    for row in data.itertuples(index=False, name=None):
+        key = (
+            row[function],
+            row[endpoint],
+            row[path],
+            row[method],
+            row[query_string],
+            id(row[body]),
+        )
+
+        if key not in compiled:
+            compiled[key] = (
+                row[function],
+                row[method].upper(),
+                URL(f"{row[endpoint]}/{row[path]}?{row[query_string]}"),
+                serialize_body(row[body]),
+                f"{row[method]} {row[path]}",
+                (body_policies or {}).get(row[function]),
+            )
+
+        requests.append(PreparedRequest(row, *compiled[key]))
+
+    return requests
+
+
+def split_bounds(sizes: list) -> list:
+    """
+    The function splits the requests in consecutive chunks.
+
+    Parameters:
+      sizes (list): Size of each chunk.
+
+    Returns:
+      list: Start and stop index of each chunk
+    """
+    bounds = []
+    start = 0
+    for size in sizes:
+        bounds.append((start, start + size))
+        start += size
+
+    return bounds
+
+
+class SampleCatalogue(Sequence):
+    """
+    This is the catalogue of distinct samples of an experiment, from which
+    every process draws its own requests lazily. The sample of each request
+    only depends on the seed and its index, drawn from a random stream per
+    block of requests, whatever the number of processes.
+
+    Attributes:
+      templates (list): PreparedRequest of each distinct sample.
+      functions (list): Function names.
+      seed (int): Random seed of the experiment.
+      size (int): Number of requests.
+      weights (ndarray): Probability of each sample, uniform if not given.
+    """
+
+    def __init__(
+        self,
+        data: DataFrame,
+        seed: int,
+        size: int,
+        body_policies: Optional[dict] = None,
+        weights: Optional[list] = None,
+    ) -> None:
+        """
+        The constructor for SampleCatalogue class.
+
+        Parameters:
+          data (DataFrame): Distinct samples of the experiment.
+          seed (int): Random seed of the experiment.
+          size (int): Number of requests.
+          body_policies (dict): Response body policy per function.
+          weights (list): Probability of each sample, uniform if not given.
+        """
+        self.templates = compile_requests(data, body_policies)
+        self.functions = sorted({request.function for request in self.templates})
+        self.seed = seed
+        self.size = size
+        self.weights = None if weights is None else np.asarray(weights, dtype=float)
+
+    def draw(self, start: int, stop: int) -> Iterator[PreparedRequest]:
+        """
+        The function draws the requests of a range of indexes.
+
+        Parameters:
+          start (int): Index of the first request.
+          stop (int): Index after the last request.
+
+        Returns:
+          Iterator: PreparedRequest of each index
+        """
+        for block in range(start // BLOCK_SIZE, math.ceil(stop / BLOCK_SIZE)):
+            offset = block * BLOCK_SIZE
+            rng = np.random.default_rng([self.seed, block])
+            choices = (
+                rng.integers(0, len(self.templates), BLOCK_SIZE)
+                if self.weights is None
+                else rng.choice(len(self.templates), BLOCK_SIZE, p=self.weights)
+            )
+
+            for choice in choices[
+                max(start - offset, 0) : min(stop - offset, BLOCK_SIZE)
+            ].tolist():
+                yield self.templates[choice]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[PreparedRequest]:
+        return self.draw(0, self.size)
+
+    @overload
+    def __getitem__(self, index: int) -> PreparedRequest:
+        ...
+
+    @overload
+    def __getitem__(
+        self, index: "slice[Optional[int], Optional[int], Optional[int]]"
+    ) -> "RequestRange":
+        ...
+
+    def __getitem__(
+        self, index: "Union[int, slice[Optional[int], Optional[int], Optional[int]]]"
+    ) -> Union[PreparedRequest, "RequestRange"]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.size)
+            if step != 1:
+                raise Exception("Sample catalogue only supports consecutive ranges")
+            return RequestRange(self, start, max(stop, start))
+
+        if not -self.size <= index < self.size:
+            raise IndexError("Request index out of range")
+        return next(self.draw(index % self.size, index % self.size + 1))
+
+
+class RequestRange(Sequence):
+    """
+    This is a range of requests of a sample catalogue, drawn when iterated.
+
+    Attributes:
+      catalogue (SampleCatalogue): Catalogue of the experiment.
+      start (int): Index of the first request.
+      stop (int): Index after the last request.
+    """
+
+    def __init__(self, catalogue: SampleCatalogue, start: int, stop: int) -> None:
+        """
+        The constructor for RequestRange class.
+
+        Parameters:
+          catalogue (SampleCatalogue): Catalogue of the experiment.
+          start (int): Index of the first request.
+          stop (int): Index after the last request.
+        """
+        self.catalogue = catalogue
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __iter__(self) -> Iterator[PreparedRequest]:
+        return self.catalogue.draw(self.start, self.stop)
+
+    @overload
+    def __getitem__(self, index: int) -> PreparedRequest:
+        ...
+
+    @overload
+    def __getitem__(
+        self, index: "slice[Optional[int], Optional[int], Optional[int]]"
+    ) -> "RequestRange":
+        ...
+
+    def __getitem__(
+        self, index: "Union[int, slice[Optional[int], Optional[int], Optional[int]]]"
+    ) -> Union[PreparedRequest, "RequestRange"]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise Exception("Request range only supports consecutive ranges")
+            return RequestRange(
+                self.catalogue, self.start + start, self.start + max(stop, start)
+            )
+
+        if not -len(self) <= index < len(self):
+            raise IndexError("Request index out of range")
+        return self.catalogue[self.start + index % len(self)]
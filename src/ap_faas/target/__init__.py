@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import asyncio
+import uuid
+from multiprocessing import Process
+from typing import Optional
+
+import numpy as np
+from aiohttp import web
+
+# Local imports
+from ap_faas.target.profile import FunctionProfile
+from ap_faas.utils.logger import logger
+
+
+def create_target(config: dict, seed: Optional[int] = None) -> web.Application:
+    """
+    The function creates a target imitating the sample functions, where the
+    first segment of the path selects the function.
+
+    Parameters:
+      config (dict): Default settings and settings per function.
+      seed (int): Seed of the service and cold start times, if any.
+
+    Returns:
+      Application: Target application
+    """
+    rng = np.random.default_rng(seed)
+    default = config.get("default", {})
+    profiles = {
+        name: FunctionProfile(default | (settings or {}), rng)
+        for name, settings in (config.get("functions") or {}).items()
+    }
+    fallback = FunctionProfile(default, rng)
+
+    async def handle(request: web.Request) -> web.Response:
+        profile = profiles.get(request.match_info["path"].split("/")[0], fallback)
+
+        # The request is received completely, as a function would
+        await request.read()
+
+        cold = profile.acquire(rng.random() < profile.cold_start_ratio)
+        service_time = profile.service_time()
+        try:
+            await asyncio.sleep(
+                service_time + (profile.cold_start_time() if cold else 0)
+            )
+        finally:
+            profile.release()
+
+        return web.Response(
+            body=profile.payload,
+            headers=profile.headers
+            | {
+                "response-id": str(uuid.uuid4()),
+                "function-cache": "MISS" if cold else "HIT",
+                "execution-time": str(round(service_time * 1000)),
+            },
+        )
+
+    app = web.Application()
+    app.router.add_route("*", "/{path:.*}", handle)
+
+    return app
+
+
+def _run_target(host: str, port: int, config: dict, seed: Optional[int]) -> None:
+    """
+    The function runs a target process until it is interrupted.
+
+    Parameters:
+      host (str): Address to listen on.
+      port (int): Port to listen on.
+      config (dict): Default settings and settings per function.
+      seed (int): Seed of the service and cold start times, if any.
+    """
+    try:
+        web.run_app(
+            create_target(config, seed),
+            host=host,
+            port=port,
+            reuse_port=True,
+            print=None,
+            access_log=None,
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+def serve_target(
+    host: str,
+    port: int,
+    config: dict,
+    processes: int = 1,
+    seed: Optional[int] = None,
+) -> None:
+    """
+    The function runs a local target of the experiments, with processes
+    sharing the same port.
+
+    Parameters:
+      host (str): Address to listen on.
+      port (int): Port to listen on.
+      config (dict): Default settings and settings per function.
+      processes (int): Number of target processes.
+      seed (int): Seed of the service and cold start times, if any.
+    """
+    # Settings are validated before the processes start
+    create_target(config)
+
+    # Each process draws its own times from the seed
+    seeds = (
+        np.random.SeedSequence(seed).generate_state(processes).tolist()
+        if seed is not None
+        else [None] * processes
+    )
+
+    logger.info(f"Target listening on {host}:{port} ({processes} process(es))")
+
+    if processes == 1:
+        return _run_target(host, port, config, seeds[0])
+
+    workers = [
+        Process(target=_run_target, args=(host, port, config, process_seed))
+        for process_seed in seeds
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import time
+from typing import Callable, Union
+
+import numpy as np
+
+# Parameters of each service time distribution (milliseconds)
+DISTRIBUTIONS = {
+    "constant": 1,
+    "uniform": 2,
+    "exponential": 1,
+    "normal": 2,
+    "lognormal": 2,
+}
+
+# Settings of a function when they are not configured
+DEFAULT_PROFILE = {
+    "service_time": "constant:10",
+    "cold_start_time": "constant:250",
+    "cold_start_ratio": 0,
+    "keep_alive": 600,
+    "payload_size": 256,
+    "expiration_time": 250,
+    "headers": {},
+}
+
+
+def parse_distribution(
+    distribution: Union[str, int, float], rng: np.random.Generator
+) -> Callable[[], float]:
+    """
+    The function parses a time distribution of the configuration.
+
+    Parameters:
+      distribution (str): Distribution and its parameters in milliseconds
+        (e.g. 20, uniform:10:30, exponential:20, normal:20:5, lognormal:20:0.5).
+      rng (Generator): Random number generator.
+
+    Returns:
+      Callable: Sampler of the distribution (seconds)
+    """
+    if isinstance(distribution, (int, float)):
+        distribution = f"constant:{distribution}"
+
+    name, *values = distribution.split(":")
+    if name not in DISTRIBUTIONS or len(values) != DISTRIBUTIONS[name]:
+        raise Exception(f"Unknown time distribution: {distribution}")
+
+    try:
+        params = [float(value) for value in values]
+    except ValueError:
+        raise Exception(f"Time distribution with invalid values: {distribution}")
+
+    if name == "constant":
+        return lambda: params[0] / 1000
+    elif name == "uniform":
+        return lambda: rng.uniform(params[0], params[1]) / 1000
+    elif name == "exponential":
+        return lambda: rng.exponential(params[0]) / 1000
+    elif name == "normal":
+        return lambda: max(rng.normal(params[0], params[1]), 0) / 1000
+    else:
+        # Median and shape of the distribution
+        mu = np.log(params[0])
+        return lambda: rng.lognormal(mu, params[1]) / 1000
+
+
+class FunctionProfile:
+    """
+    This is the behavior of a function imitated by the target, with the warm
+    instances that spare the next requests a cold start.
+
+    Attributes:
+      service_time (Callable): Sampler of the service time (seconds).
+      cold_start_time (Callable): Sampler of the cold start time (seconds).
+      cold_start_ratio (float): Fraction of requests forced to a cold start.
+      keep_alive (float): Time an idle instance stays warm (seconds).
+      payload (bytes): Body of each response.
+      headers (dict): Headers of each response.
+    """
+
+    __slots__ = (
+        "service_time",
+        "cold_start_time",
+        "cold_start_ratio",
+        "keep_alive",
+        "payload",
+        "headers",
+        "__idle",
+    )
+
+    def __init__(self, settings: dict, rng: np.random.Generator) -> None:
+        """
+        The constructor for FunctionProfile class.
+
+        Parameters:
+          settings (dict): Settings of the function.
+          rng (Generator): Random number generator.
+        """
+        unknown = set(settings) - set(DEFAULT_PROFILE)
+        if unknown:
+            raise Exception(f"Unknown target setting(s): {', '.join(sorted(unknown))}")
+
+        settings = DEFAULT_PROFILE | settings
+        self.service_time = parse_distribution(settings["service_time"], rng)
+        self.cold_start_time = parse_distribution(settings["cold_start_time"], rng)
+        self.cold_start_ratio = float(settings["cold_start_ratio"])
+        self.keep_alive = float(settings["keep_alive"])
+        self.payload = b"x" * int(settings["payload_size"])
+        self.headers = {
+            "expiration-time": str(settings["expiration_time"]),
+        } | {name: str(value) for name, value in settings["headers"].items()}
+
+        # Release time of each idle instance, the most recent last
+        self.__idle: list = []
+
+    def acquire(self, forced_cold: bool) -> bool:
+        """
+        The function takes the most recently used warm instance, if any.
+
+        Parameters:
+          forced_cold (bool): Ignore the warm instances.
+
+        Returns:
+          bool: Whether the request starts cold
+        """
+        if not self.__idle:
+            return True
+
+        released = self.__idle.pop()
+        if time.monotonic() - released > self.keep_alive:
+            # Older instances expired before this one
+            self.__idle.clear()
+            return True
+
+        return forced_cold
+
+    def release(self) -> None:
+        """
+        The function returns an instance to the warm ones.
+        """
+        self.__idle.append(time.monotonic())
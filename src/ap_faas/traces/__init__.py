@@ -9,16 +9,87 @@
 import importlib
 import os
 
+import numpy as np
 import pandas as pd
 
 # Local imports
+from ap_faas.utils.file_handler import write_data
 from ap_faas.utils.logger import logger
 
 
+def get_request_epoch(request_time: pd.Series) -> pd.Series:
+    """
+    The function retrieves the request time as epoch seconds, whatever the
+    format of the test files.
+
+    Parameters:
+      request_time (Series): Request time of each request.
+
+    Returns:
+      Series: Request time as epoch seconds
+    """
+    if pd.api.types.is_datetime64_any_dtype(request_time):
+        request_time = request_time.map(pd.Timestamp.timestamp)
+
+    return request_time.astype(float)
+
+
+def join_traces(
+    experimental_data: pd.core.frame.DataFrame,
+    function_traces: pd.core.frame.DataFrame,
+) -> dict:
+    """
+    The function joins each request with its trace through a hash index
+    of the response IDs, built once.
+
+    Parameters:
+      experimental_data (DataFrame): Results from experimental test.
+      function_traces (DataFrame): Trace information from each function's request.
+
+    Returns:
+      dict: Complete data (requests with their trace), unmatched requests,
+        unmatched traces and duplicate traces
+    """
+    if "response_id" not in function_traces.columns:
+        function_traces = function_traces.assign(response_id=pd.Series(dtype=object))
+
+    # First trace of each response, later ones are kept for inspection
+    trace_ids = function_traces["response_id"]
+    duplicated = trace_ids.duplicated(keep="first").to_numpy()
+    duplicate_traces = function_traces[trace_ids.duplicated(keep=False).to_numpy()]
+    unique_traces = function_traces[~duplicated].reset_index(drop=True)
+
+    # Position of the trace of each request (-1 without trace)
+    index = pd.Index(unique_traces["response_id"])
+    positions = index.get_indexer(experimental_data["response_id"])
+    matched = positions >= 0
+
+    # Left join: requests without trace get empty trace columns
+    trace_columns = unique_traces.drop(columns=["response_id"]).reindex(positions)
+    trace_columns.columns = [
+        f"{column}_trace" if column in experimental_data.columns else column
+        for column in trace_columns.columns
+    ]
+    trace_columns.index = experimental_data.index
+    complete_data = pd.concat([experimental_data, trace_columns], axis=1)
+
+    # Traces not referenced by any request
+    referenced = np.zeros(len(unique_traces), dtype=bool)
+    referenced[positions[matched]] = True
+
+    return {
+        "complete_data": complete_data.reset_index(drop=True),
+        "unmatched_requests": experimental_data[~matched],
+        "unmatched_traces": unique_traces[~referenced],
+        "duplicate_traces": duplicate_traces,
+    }
+
+
 def write_function_traces(
     traces_directory: str,
     experimental_data: pd.core.frame.DataFrame,
     function_traces: pd.core.frame.DataFrame,
+    output_format: str = "csv",
 ) -> None:
     """
     The function stores execution and traces for each request
@@ -27,54 +98,45 @@ def write_function_traces(
       traces_directory (str): Directory of the trace files.
       experimental_data (DataFrame): Results from experimental test.
       function_traces (DataFrame): Trace information from each function's request.
+      output_format (str): Output format (csv, parquet or arrow).
     """
 
-    # Filename for experimental data CSV file
-    experimental_data_file = os.path.join(traces_directory, "experimental_data.csv")
-
-    # Filename for traces data CSV file
-    trace_data_file = os.path.join(traces_directory, "trace_data.csv")
-
-    # Filename for complete data CSV file
-    complete_data_file = os.path.join(traces_directory, "complete_data.csv")
-
-    # Filename for unmatched traces
-    unmatched_traces_file = os.path.join(traces_directory, "unmatched_traces.csv")
-
     # Write experimental data in file
-    experimental_data.to_csv(experimental_data_file, index=False)
+    write_data(
+        experimental_data,
+        os.path.join(traces_directory, "experimental_data"),
+        output_format,
+    )
 
     # Write traces data in file
-    function_traces.to_csv(trace_data_file, index=False)
-
-    # Compile experimental data with traces
-    complete_data = experimental_data.merge(
-        function_traces.drop_duplicates(subset=["response_id"]),
-        left_on="response_id",
-        right_on="response_id",
-        how="left",
-        sort=False,
+    write_data(
+        function_traces, os.path.join(traces_directory, "trace_data"), output_format
     )
 
-    # Write complete data in file
-    complete_data.to_csv(complete_data_file, index=False)
+    joined = join_traces(experimental_data, function_traces)
 
-    # Get unmerged traces
-    unmerged_df = function_traces.merge(complete_data, how="left", indicator=True)
-    unmatched_traces = unmerged_df[unmerged_df["_merge"] == "left_only"][
-        list(function_traces.columns)
-    ]
+    # Write complete data in file
+    complete_data_file = write_data(
+        joined["complete_data"],
+        os.path.join(traces_directory, "complete_data"),
+        output_format,
+    )
 
-    # Write unmatched traces in file
-    unmatched_traces.to_csv(unmatched_traces_file, index=False)
+    # Write unmatched requests, unmatched traces and duplicate traces in files
+    for name in ["unmatched_requests", "unmatched_traces", "duplicate_traces"]:
+        write_data(joined[name], os.path.join(traces_directory, name), output_format)
 
     logger.info(
         (
             "(Unsuccessful Requests) - Experimental data: "
             f"{len(experimental_data.loc[experimental_data['response_status'] > 200 ])}"
-            f" | Function traces: {complete_data['@ptr'].isna().sum()}"
+            f" | Function traces: {len(joined['unmatched_requests'])}"
         )
     )
+    if len(joined["duplicate_traces"]):
+        logger.warning(
+            f"{len(joined['duplicate_traces'])} trace(s) share their response_id"
+        )
     logger.success(
         (
             "Complete experiment data saved: "
@@ -88,6 +150,8 @@ def init(
     traces_directory: str,
     experimental_data: pd.core.frame.DataFrame,
     resolution: int,
+    tail: bool = False,
+    targeted: bool = False,
 ) -> None:
     """
     The function initializes the retrieval of traces from the provider
@@ -98,6 +162,9 @@ def init(
       traces_directory (str): Directory of the traces files
       limit (int): Record limit retrieval from logs
       experimental_data (Dataframe): Results from experimental test
+      resolution (int): Size of the windows retrieved (seconds)
+      tail (bool): Extend the window until every response is traced
+      targeted (bool): Look up each response instead of scanning every window
     """
     # Get provider information
     provider = config_file["provider"]
@@ -110,7 +177,13 @@ def init(
     )
 
     # Initialize Traces class
-    traces = Traces(experimental_data["function_name"].unique().tolist(), config_file)
+    # Query windows already retrieved are reused by the next runs
+    traces = Traces(
+        experimental_data["function_name"].unique().tolist(),
+        config_file,
+        cache_dir=os.path.join(traces_directory, "cache"),
+        experimental_data=experimental_data,
+    )
     logger.info(
         (
             f"{len(experimental_data.loc[experimental_data['response_status'] == 200])}"
@@ -118,10 +191,23 @@ def init(
         )
     )
 
+    # Successful requests, the only ones with traces
+    successful = experimental_data.loc[
+        (experimental_data["response_status"] == 200)
+        & experimental_data["response_id"].notna(),
+        ["response_id", "request_time"],
+    ]
+    responses = list(
+        zip(successful["response_id"], get_request_epoch(successful["request_time"]))
+    )
+
     # Getting traces information from function insights
     function_traces = pd.DataFrame(
         traces.get_traces_per_request(
-            limit=len(experimental_data), resolution=resolution
+            limit=len(experimental_data),
+            resolution=resolution,
+            expected=responses if tail else None,
+            requests=responses if targeted else None,
         )
     )
     logger.info(
@@ -129,4 +215,9 @@ def init(
     )
 
     # Write execution and trace for each function's request
-    write_function_traces(traces_directory, experimental_data, function_traces)
+    write_function_traces(
+        traces_directory,
+        experimental_data,
+        function_traces,
+        config_file.get("output_format", "csv"),
+    )
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from typing import Optional
+
+# Seconds before the logs of a window are considered complete
+INGESTION_DELAY = 300
+
+
+class QueryCache:
+    """
+    This is an on-disk cache of the results of each query window.
+
+    Attributes:
+      directory (str): Directory of the cached results.
+      hits (int): Windows read from the cache.
+      misses (int): Windows not found in the cache.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        The constructor for QueryCache class.
+
+        Parameters:
+          directory (str): Directory of the cached results.
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def __filename(
+        self, log_group: str, query: str, start_time: int, end_time: int
+    ) -> str:
+        """
+        The function retrieves the file of a query window.
+
+        Parameters:
+          log_group (str): Log group of the query.
+          query (str): Query string.
+          start_time (int): Start time of the window.
+          end_time (int): End time of the window (inclusive).
+
+        Returns:
+          str: Location of the cached results
+        """
+        group = re.sub(r"[^A-Za-z0-9_-]+", "_", log_group).strip("_")
+        query_hash = hashlib.sha256(" ".join(query.split()).encode()).hexdigest()
+
+        # Windows cached with an exclusive end (start_end) are not reused
+        return os.path.join(
+            self.directory, f"{group}_{query_hash[:16]}_{start_time}-{end_time}.json"
+        )
+
+    def get(
+        self, log_group: str, query: str, start_time: int, end_time: int
+    ) -> Optional[list]:
+        """
+        The function retrieves the cached results of a query window.
+
+        Parameters:
+          log_group (str): Log group of the query.
+          query (str): Query string.
+          start_time (int): Start time of the window.
+          end_time (int): End time of the window (inclusive).
+
+        Returns:
+          list: Cached results, if any
+        """
+        filename = self.__filename(log_group, query, start_time, end_time)
+
+        try:
+            with open(filename, "r") as file:
+                results = json.load(file)["results"]
+            self.hits += 1
+            return results
+
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        log_group: str,
+        query: str,
+        start_time: int,
+        end_time: int,
+        results: list,
+    ) -> bool:
+        """
+        The function caches the results of a query window, once its logs
+        are no longer ingested.
+
+        Parameters:
+          log_group (str): Log group of the query.
+          query (str): Query string.
+          start_time (int): Start time of the window.
+          end_time (int): End time of the window (inclusive).
+          results (list): Results of the query.
+
+        Returns:
+          bool: Validation of storage
+        """
+        if end_time > time.time() - INGESTION_DELAY:
+            return False
+
+        filename = self.__filename(log_group, query, start_time, end_time)
+        temp_file = f"{filename}.{uuid.uuid4().hex}"
+        with open(temp_file, "w") as file:
+            json.dump(
+                {
+                    "log_group": log_group,
+                    "query": query,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "results": results,
+                },
+                file,
+            )
+
+        # Readers never see a partially written window
+        os.replace(temp_file, filename)
+
+        return True
@@ -5,6 +5,11 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+# External imports
+from typing import Optional
+
+import pandas as pd
+
 
 class TracesInterface:
     """
@@ -16,21 +21,40 @@ class TracesInterface:
       experimental_results (dict): Experimental results from fetcher.
     """
 
-    def __init__(self, function: str, credentials: dict, config_file: dict) -> None:
+    def __init__(
+        self,
+        function: str,
+        config_file: dict,
+        cache_dir: Optional[str] = None,
+        experimental_data: Optional[pd.DataFrame] = None,
+    ) -> None:
         """
         The constructor for Traces class.
 
         Parameters:
           function (str): function name
-          credectials (dict): Cloud provider credentials.
+          config_file (dict): Experimental configuration file.
+          cache_dir (str): Directory of the cached query windows, if any.
+          experimental_data (DataFrame): Results from experimental test.
         """
 
-    def get_traces_per_request(self, limit: int, resolution: int) -> list:
+    def get_traces_per_request(
+        self,
+        limit: int,
+        resolution: int,
+        expected: Optional[list] = None,
+        requests: Optional[list] = None,
+    ) -> list:
         """
         The function retrieves the trace from each function.
 
         Parameters:
           limit (int): Record limit of retrieval.
+          resolution (int): Size of the windows retrieved (seconds).
+          expected (list): Response ID and request time of each response to
+            wait for (tail mode), if any.
+          requests (list): Response ID and request time of each request to
+            look up directly (targeted mode), if any.
 
         Returns:
           list: List of dictionaries with traces
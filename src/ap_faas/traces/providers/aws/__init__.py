@@ -7,19 +7,40 @@
 
 # External imports
 import concurrent.futures
-import itertools
 import math
 import time
-from datetime import datetime, timedelta
-from typing import Iterable, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 import boto3
-import numpy as np
+import pandas as pd
+from botocore.client import BaseClient
 
 # Local imports
+from ap_faas.traces.cache import QueryCache
+from ap_faas.traces.providers.aws.scheduler import QueryScheduler
 from ap_faas.traces.providers.TracesInterface import TracesInterface
 from ap_faas.utils.logger import logger
 
+# Maximum number of records returned by a Logs Insights query
+LIMIT_QUOTA = 10000
+
+# Interval and longest duration of the tail mode (seconds)
+TAIL_INTERVAL = 60
+TAIL_TIMEOUT = 3600
+
+# Response IDs per query (within the query length limit) and longest
+# interval between the first and last request of a query (seconds)
+TARGET_BATCH = 200
+TARGET_SPAN = 300
+
+# Margin of the window before the first and after the last request (seconds)
+TARGET_BEFORE = 5
+TARGET_AFTER = 120
+
+# Format of the timestamps returned by Logs Insights (UTC)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
 
 class Traces(TracesInterface):
     """
@@ -29,13 +50,19 @@ class Traces(TracesInterface):
       function (str): function name
       provider_info (dict): Cloud provider information.
       experimental_results (dict): Experimental results from fetcher.
+      limit_quota (int): Maximum number of records returned by a query.
     """
 
+    limit_quota = LIMIT_QUOTA
+
     def __init__(
         self,
         functions: str,
         config_file: dict,
         namespace: str = "AWS/Lambda",
+        cache_dir: Optional[str] = None,
+        experimental_data: Optional[pd.DataFrame] = None,
+        logs_client: Optional[BaseClient] = None,
     ) -> None:
         """
         The constructor for Traces class.
@@ -43,31 +70,26 @@ class Traces(TracesInterface):
         Parameters:
           functions (str): Function name
           config_file (dict): Experimental configuration file.
+          cache_dir (str): Directory of the cached query windows, if any.
+          experimental_data (DataFrame): Results from experimental test
+            (not needed by a cloud provider).
+          logs_client (BaseClient): Logs client replacing CloudWatch Logs, if any.
         """
-        session = None
-
-        if "profile" in config_file["credentials"]:
-            session = boto3.Session(
-                profile_name=config_file["credentials"]["profile"],
-                region_name=config_file["region"],
-            )
-        elif "access_key" and "secret_key" in config_file["credentials"]:
-            session = boto3.Session(
-                aws_access_key_id=config_file["credentials"]["access_key"],
-                aws_secret_access_key=config_file["credentials"]["secret_key"],
-                region_name=config_file["region"],
-            )
+        if logs_client is not None:
+            self.cloudwatch = None
+            self.cloudwatch_logs = logs_client
         else:
-            raise Exception("Cloud provider credentials not found")
+            session = self.__create_session(config_file)
 
-        self.cloudwatch = session.client("cloudwatch")
-        logger.info("Connected to AWS CloudWatch")
+            self.cloudwatch = session.client("cloudwatch")
+            logger.info("Connected to AWS CloudWatch")
 
-        self.cloudwatch_logs = session.client("logs")
-        logger.info("Connected to AWS CloudWatchLogs")
+            self.cloudwatch_logs = session.client("logs")
+            logger.info("Connected to AWS CloudWatchLogs")
 
         self.namespace = namespace
         self.functions = functions
+        self.cache = QueryCache(cache_dir) if cache_dir else None
 
         self.start_time = datetime.fromtimestamp(
             config_file["experimental_results"]["start_time"]
@@ -83,21 +105,57 @@ class Traces(TracesInterface):
             )
         )
 
-    def get_traces_per_request(self, limit: int, resolution: int) -> list:
+    def __create_session(self, config_file: dict) -> boto3.Session:
+        """
+        The function creates an AWS session from the configured credentials.
+
+        Parameters:
+          config_file (dict): Experimental configuration file.
+
+        Returns:
+          Session: AWS session
+        """
+        if "profile" in config_file["credentials"]:
+            return boto3.Session(
+                profile_name=config_file["credentials"]["profile"],
+                region_name=config_file["region"],
+            )
+        elif "access_key" and "secret_key" in config_file["credentials"]:
+            return boto3.Session(
+                aws_access_key_id=config_file["credentials"]["access_key"],
+                aws_secret_access_key=config_file["credentials"]["secret_key"],
+                region_name=config_file["region"],
+            )
+        else:
+            raise Exception("Cloud provider credentials not found")
+
+    def get_traces_per_request(
+        self,
+        limit: int,
+        resolution: int,
+        expected: Optional[list] = None,
+        requests: Optional[list] = None,
+    ) -> list:
         """
         The function retrieves the trace from each function.
 
         Parameters:
           limit (int): Record limit of retrieval.
+          resolution (int): Size of the bins packed into windows (seconds).
+          expected (list): Response ID and request time of each response to
+            wait for (tail mode), if any.
+          requests (list): Response ID and request time of each request to
+            look up directly (targeted mode), instead of scanning every window.
 
         Returns:
           list: List of dictionaries with traces
         """
         logger.info("Extracting Traces from LambdaInsights")
 
-        query = f"filter event_type = 'performance' and \
-            function_name in {self.functions} \
-            | fields \
+        filter_query = f"filter event_type = 'performance' and \
+            function_name in {self.functions}"
+
+        fields_query = "| fields \
               request_id as response_id, \
               duration as duration_ms, \
               memory_utilization as memory_utilization_percentage, \
@@ -114,11 +172,195 @@ class Traces(TracesInterface):
             | sort @timestamp desc"
 
         log_group = "/aws/lambda-insights"
-        function_traces = self.__iter_query_response(
-            query, log_group, limit, resolution
+
+        # Pointers of the records retrieved, kept for the rounds of the tail mode
+        retrieved: set = set()
+
+        def retrieve(
+            targets: Optional[list],
+            end_time: Optional[int] = None,
+            ranges: Optional[list] = None,
+        ) -> list:
+            if targets is None:
+                results = self.__iter_query_response(
+                    f"{filter_query} {fields_query}",
+                    filter_query,
+                    log_group,
+                    limit,
+                    resolution,
+                    retrieved,
+                    ranges
+                    or [
+                        (
+                            math.floor(self.start_time.timestamp()),
+                            math.ceil(self.end_time.timestamp()),
+                            True,
+                        )
+                    ],
+                )
+            else:
+                results = self.__targeted_response(
+                    filter_query, fields_query, log_group, targets, end_time
+                )
+
+            return [self.__parse_trace_per_request(traces) for traces in results]
+
+        function_traces = retrieve(requests)
+
+        # Tail mode extends the window until every response is traced
+        tail_start = time.monotonic()
+        while expected:
+            missing = {response_id for response_id, _ in expected} - {
+                traces.get("response_id") for traces in function_traces
+            }
+            if not missing:
+                break
+
+            if time.monotonic() - tail_start > TAIL_TIMEOUT:
+                logger.warning(
+                    f"{len(missing)} response(s) still without traces, tail stopped"
+                )
+                break
+
+            logger.info(
+                (
+                    f"{len(missing)} response(s) without traces, "
+                    f"extending the window in {TAIL_INTERVAL}s"
+                )
+            )
+            time.sleep(TAIL_INTERVAL)
+            scanned_end = math.ceil(self.end_time.timestamp())
+            self.end_time = max(self.end_time, datetime.now())
+
+            if requests is None:
+                # Only the ranges where a missing response can be traced are
+                # scanned again, without their cached windows, along with the
+                # extension of the window
+                ranges = self.__missing_ranges(
+                    [
+                        request_time
+                        for response_id, request_time in expected
+                        if response_id in missing
+                    ],
+                    math.floor(self.start_time.timestamp()),
+                    scanned_end,
+                )
+                logger.info(f"{len(ranges)} range(s) scanned again")
+                function_traces += retrieve(
+                    None,
+                    ranges=[(start, end, False) for start, end in ranges]
+                    + [(scanned_end, math.ceil(self.end_time.timestamp()), True)],
+                )
+            else:
+                # Only the missing responses are looked up again
+                function_traces += retrieve(
+                    [request for request in requests if request[0] in missing],
+                    math.ceil(self.end_time.timestamp()),
+                )
+
+        if self.cache is not None:
+            logger.info(
+                (
+                    f"Cached windows: {self.cache.hits} reused, "
+                    f"{self.cache.misses} queried"
+                )
+            )
+
+        return function_traces
+
+    def __missing_ranges(
+        self, request_times: list, start_time: int, end_time: int
+    ) -> list:
+        """
+        The function merges the ranges where the trace of a missing response
+        can be recorded, from TARGET_BEFORE seconds before its request time to
+        TARGET_AFTER seconds after.
+
+        Parameters:
+          request_times (list): Request time of each missing response.
+          start_time (int): Start time of the range scanned so far.
+          end_time (int): End time of the range scanned so far (inclusive).
+
+        Returns:
+          list: Start and end of each range to scan again
+        """
+        ranges: list = []
+        for request_time in sorted(request_times):
+            range_start = max(math.floor(request_time - TARGET_BEFORE), start_time)
+            range_end = min(math.ceil(request_time + TARGET_AFTER), end_time)
+            if range_start > range_end:
+                continue
+
+            if ranges and range_start <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], range_end))
+            else:
+                ranges.append((range_start, range_end))
+
+        return ranges
+
+    def __targeted_response(
+        self,
+        filter_query: str,
+        fields_query: str,
+        log_group: str,
+        requests: list,
+        end_time: Optional[int] = None,
+    ) -> list:
+        """
+        The function looks up the traces of the requests by their response ID,
+        batching the requests sent close in time into a single query.
+
+        Parameters:
+          filter_query (str): Filter of the records to retrieve.
+          fields_query (str): Fields of the records to retrieve.
+          log_group (str): Log group where perform query.
+          requests (list): Response ID and request time of each request.
+          end_time (int): Earliest end of every window (tail mode), if any.
+
+        Returns:
+          list: List of query results
+        """
+        batches: list = []
+        for response_id, request_time in sorted(requests, key=lambda r: r[1]):
+            if (
+                batches
+                and len(batches[-1][0]) < TARGET_BATCH
+                and request_time - batches[-1][1] <= TARGET_SPAN
+            ):
+                batches[-1][0].append(response_id)
+                batches[-1][2] = request_time
+            else:
+                batches.append([[response_id], request_time, request_time])
+
+        windows = [
+            (
+                math.floor(batch[1] - TARGET_BEFORE),
+                max(math.ceil(batch[2] + TARGET_AFTER), end_time or 0),
+                batch[0],
+            )
+            for batch in batches
+        ]
+        logger.info(
+            f"{len(requests)} response(s) looked up in {len(windows)} window(s)"
         )
 
-        return [self.__parse_trace_per_request(traces) for traces in function_traces]
+        response_result = []
+        with QueryScheduler(self.cloudwatch_logs) as scheduler:
+            threads = [
+                self.__submit(
+                    scheduler,
+                    f"{filter_query} and request_id in {response_ids} {fields_query}",
+                    log_group,
+                    start_time,
+                    window_end,
+                )
+                for start_time, window_end, response_ids in windows
+            ]
+
+            for future in concurrent.futures.as_completed(threads):
+                response_result += future.result()
+
+        return response_result
 
     def __parse_trace_per_request(self, traces: list) -> dict:
         """
@@ -132,116 +374,261 @@ class Traces(TracesInterface):
         """
         return {trace["field"]: trace["value"] for trace in traces}
 
-    def __iter_query_response(
-        self, query: str, log_group: str, limit: int, resolution: int
-    ) -> list:
+    def __unique(self, results: list, retrieved: set) -> list:
+        """
+        The function leaves out the records already retrieved by another
+        window, as consecutive windows share their boundary.
+
+        Parameters:
+          results (list): List of query results.
+          retrieved (set): Pointer of every record retrieved so far.
+
+        Returns:
+          list: Records not retrieved yet
+        """
+        unique = []
+        for record in results:
+            pointer = self.__parse_trace_per_request(record).get("@ptr", str(record))
+            if pointer not in retrieved:
+                retrieved.add(pointer)
+                unique.append(record)
+
+        return unique
+
+    def __submit(
+        self,
+        scheduler: QueryScheduler,
+        query: str,
+        log_group: str,
+        start_time: int,
+        end_time: int,
+        cached: bool = True,
+    ) -> concurrent.futures.Future:
         """
-        The function allows multiple query requests.
+        The function schedules a query window, unless its results are cached.
 
         Parameters:
+          scheduler (QueryScheduler): Scheduler of the queries.
           query (str): Query string.
           log_group (str): Log group where perform query.
-          limit (int): Record limit of retrieval.
+          start_time (int): Start time of the window.
+          end_time (int): End time of the window (inclusive).
+          cached (bool): Whether cached results can be reused (else they are
+            replaced).
 
         Returns:
-          list: List of query results
+          Future: Results of the query window
         """
-        limit_quota = 10000
+        cache = self.cache
+        if cache is None:
+            return scheduler.submit(
+                query, log_group, start_time, end_time, self.limit_quota
+            )
 
-        timestamp_sizes = np.arange(
-            math.floor(self.start_time.timestamp()),
-            math.ceil(self.end_time.timestamp()),
-            resolution,
+        cached_results = (
+            cache.get(log_group, query, start_time, end_time) if cached else None
+        )
+        if cached_results is not None:
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            future.set_result(cached_results)
+            return future
+
+        def store(future: concurrent.futures.Future) -> None:
+            # Capped windows are cached too, so reruns split them right away
+            if future.exception() is None:
+                cache.put(log_group, query, start_time, end_time, future.result())
+
+        future = scheduler.submit(
+            query, log_group, start_time, end_time, self.limit_quota
         )
+        future.add_done_callback(store)
 
-        timestamp_sizes = (
-            np.append(timestamp_sizes, self.end_time.timestamp())
-            if timestamp_sizes[-1] != self.end_time.timestamp()
-            else timestamp_sizes
+        return future
+
+    def __count_windows(
+        self,
+        scheduler: QueryScheduler,
+        filter_query: str,
+        log_group: str,
+        resolution: int,
+        start_time: int,
+        end_time: int,
+        cached: bool = True,
+    ) -> list:
+        """
+        The function packs the bins of a range with records into windows of at
+        most limit_quota records, from a count of records per bin.
+
+        Parameters:
+          scheduler (QueryScheduler): Scheduler of the queries.
+          filter_query (str): Filter of the records to retrieve.
+          log_group (str): Log group where perform query.
+          resolution (int): Size of each bin (seconds).
+          start_time (int): Start time of the range.
+          end_time (int): End time of the range (inclusive).
+          cached (bool): Whether a cached count can be reused.
+
+        Returns:
+          list: Start and end of each window (consecutive windows share a
+            boundary)
+        """
+        bins = [
+            self.__parse_trace_per_request(record)
+            for record in self.__submit(
+                scheduler,
+                f"{filter_query} \
+                | stats count(*) as records by bin({resolution}s) as window",
+                log_group,
+                start_time,
+                end_time,
+                cached,
+            ).result()
+        ]
+
+        # Too many bins to count, counted again with coarser bins
+        if len(bins) >= self.limit_quota:
+            coarser = math.ceil((end_time - start_time) / (self.limit_quota - 1))
+            logger.warning(f"Too many bins of {resolution}s, using bins of {coarser}s")
+            return self.__count_windows(
+                scheduler,
+                filter_query,
+                log_group,
+                coarser,
+                start_time,
+                end_time,
+                cached,
+            )
+
+        counts = sorted(
+            (
+                datetime.strptime(record["window"], TIMESTAMP_FORMAT)
+                .replace(tzinfo=timezone.utc)
+                .timestamp(),
+                int(record["records"]),
+            )
+            for record in bins
         )
 
-        def pairwise(iterable: Iterable) -> Iterable[Tuple]:
-            a, b = itertools.tee(iterable)
-            next(b, None)
-            return zip(a, b)
+        # Consecutive bins are merged while they fit in a single query
+        windows: list = []
+        window_count = 0
+        for bin_time, count in counts:
+            bin_start = max(int(bin_time), start_time)
+            bin_end = min(int(bin_time) + resolution, end_time)
 
-        threads = []
-        response_result = []
+            if windows and window_count + count <= self.limit_quota:
+                windows[-1] = (windows[-1][0], bin_end)
+                window_count += count
+            else:
+                windows.append((bin_start, bin_end))
+                window_count = count
 
-        logger.info(f"{len(timestamp_sizes) - 1} interval(s) to find the records")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-            for index, pair in enumerate(pairwise(timestamp_sizes)):
-                threads.append(
-                    executor.submit(
-                        self.__query_response,
-                        query,
-                        log_group,
-                        pair[0],
-                        pair[1],
-                        limit_quota,
-                        (index + 1),
-                        len(timestamp_sizes) - 1,
-                    )
-                )
-                time.sleep(0.50)
-        for future in concurrent.futures.as_completed(threads):
-            response_result += future.result()
+        logger.info(
+            (
+                f"{sum(count for _, count in counts)} record(s) counted "
+                f"in {len(counts)} bin(s) of {resolution}s"
+            )
+        )
 
-        return response_result
+        return windows
 
-    def __query_response(
+    def __iter_query_response(
         self,
         query: str,
+        filter_query: str,
         log_group: str,
-        start_time: float,
-        end_time: float,
-        limit: int = 1000,
-        index: int = 1,
-        total: int = 1,
+        limit: int,
+        resolution: int,
+        retrieved: set,
+        ranges: list,
     ) -> list:
         """
-        The function perform query over log group.
+        The function allows multiple query requests, splitting in half every
+        window that reaches the record limit of a query. Records on the
+        boundary of two windows, or already retrieved, are kept once.
 
         Parameters:
           query (str): Query string.
+          filter_query (str): Filter of the records to retrieve.
           log_group (str): Log group where perform query.
-          start_time (float): Start time of the experiment.
-          end_time (float): End time of the experiment.
           limit (int): Record limit of retrieval.
+          resolution (int): Size of the bins packed into windows (seconds).
+          retrieved (set): Pointer of every record retrieved so far.
+          ranges (list): Start, end (inclusive) and whether cached windows can
+            be reused, of each range packed into windows.
 
         Returns:
           list: List of query results
         """
-        # logger.info("Starting query...")
-        start_query_response = self.cloudwatch_logs.start_query(
-            logGroupName=log_group,
-            startTime=int(start_time),
-            endTime=int(end_time),
-            queryString=query,
-            limit=limit,
-        )
-
-        query_id = start_query_response["queryId"]
-        logger.info(f"{index} out of {total} - Generated query ID: {query_id}")
-
-        response = {}
-
-        count = 0
-        while count < 3:
-            time.sleep(1)
-            response = self.cloudwatch_logs.get_query_results(queryId=query_id)
-            if response["status"] != "Running":
-                break
-            count += 1
+        response_result = []
 
-        logger.info(
-            f"{query_id}: {len(response['results'])} record(s) found (retries:{count})"
-        )
-        if len(response["results"]) >= 10000:
-            logger.warning(
-                (
-                    f"Record larger than 10,000 ({len(response['results'])}). "
-                    "Please try again with a lower resolution"
+        with QueryScheduler(self.cloudwatch_logs) as scheduler:
+            windows = [
+                (*window, cached)
+                for start_time, end_time, cached in ranges
+                for window in self.__count_windows(
+                    scheduler,
+                    filter_query,
+                    log_group,
+                    resolution,
+                    start_time,
+                    end_time,
+                    cached,
                 )
-            )
-        return response["results"]
+            ]
+            logger.info(f"{len(windows)} interval(s) to find the records")
+
+            # Queries are pipelined by the scheduler as its slots free up
+            threads = {
+                self.__submit(
+                    scheduler, query, log_group, start_time, end_time, cached
+                ): (start_time, end_time, cached)
+                for start_time, end_time, cached in windows
+            }
+
+            while threads:
+                done, _ = concurrent.futures.wait(
+                    threads, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    start_time, end_time, cached = threads.pop(future)
+                    results = future.result()
+
+                    if len(results) < self.limit_quota:
+                        response_result += self.__unique(results, retrieved)
+                        continue
+
+                    if end_time - start_time < 2:
+                        logger.warning(
+                            (
+                                f"Record larger than {self.limit_quota} within "
+                                f"a second ({start_time}), some traces are missing"
+                            )
+                        )
+                        response_result += self.__unique(results, retrieved)
+                        continue
+
+                    # Capped window, queried again in two halves
+                    middle = (start_time + end_time) // 2
+                    logger.info(
+                        (
+                            f"Window {start_time}-{end_time} reached "
+                            f"{self.limit_quota} record(s), splitting in half"
+                        )
+                    )
+                    for half_start, half_end in [
+                        (start_time, middle),
+                        (middle, end_time),
+                    ]:
+                        threads[
+                            self.__submit(
+                                scheduler,
+                                query,
+                                log_group,
+                                half_start,
+                                half_end,
+                                cached,
+                            )
+                        ] = (half_start, half_end, cached)
+
+        return response_result
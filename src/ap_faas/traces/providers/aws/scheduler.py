@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import concurrent.futures
+import math
+import time
+from types import TracebackType
+from typing import Optional, Type
+
+from botocore.client import BaseClient
+from botocore.exceptions import ClientError
+
+# Local imports
+from ap_faas.utils.logger import logger
+
+# Concurrent queries allowed per account by Logs Insights
+CONCURRENT_QUERIES = 30
+
+# States where a query will not change anymore
+TERMINAL_STATES = ["Complete", "Failed", "Cancelled", "Timeout", "Unknown"]
+
+# Errors retried with the same backoff as a running query
+THROTTLING_ERRORS = ["LimitExceededException", "ThrottlingException"]
+
+
+class QueryScheduler:
+    """
+    This is a scheduler of Logs Insights queries, running at most as many
+    queries as the service allows and polling each one until it completes.
+
+    Attributes:
+      concurrent_queries (int): Queries running at the same time.
+      initial_delay (float): First interval between two polls (seconds).
+      max_delay (float): Longest interval between two polls (seconds).
+      timeout (float): Longest time waiting for a query (seconds).
+    """
+
+    def __init__(
+        self,
+        client: BaseClient,
+        concurrent_queries: int = CONCURRENT_QUERIES,
+        initial_delay: float = 0.25,
+        max_delay: float = 8,
+        timeout: float = 900,
+    ) -> None:
+        """
+        The constructor for QueryScheduler class.
+
+        Parameters:
+          client (BaseClient): CloudWatch Logs client.
+          concurrent_queries (int): Queries running at the same time.
+          initial_delay (float): First interval between two polls (seconds).
+          max_delay (float): Longest interval between two polls (seconds).
+          timeout (float): Longest time waiting for a query (seconds).
+        """
+        self.concurrent_queries = concurrent_queries
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+        self.__client = client
+        self.__submitted = 0
+
+        # Each slot starts a query as soon as the previous one completes
+        self.__executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrent_queries
+        )
+
+    def __call(self, operation: str, **params: object) -> dict:
+        """
+        The function calls the client, backing off while it is throttled.
+
+        Parameters:
+          operation (str): Name of the client method.
+          params (object): Parameters of the method.
+
+        Returns:
+          dict: Response of the client
+        """
+        delay = self.initial_delay
+        while True:
+            try:
+                return getattr(self.__client, operation)(**params)
+
+            except ClientError as err:
+                if err.response["Error"]["Code"] not in THROTTLING_ERRORS:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_delay)
+
+    def __run(
+        self,
+        query: str,
+        log_group: str,
+        start_time: int,
+        end_time: int,
+        limit: int,
+        index: int,
+    ) -> list:
+        """
+        The function runs a query until it reaches a terminal state.
+
+        Parameters:
+          query (str): Query string.
+          log_group (str): Log group where perform query.
+          start_time (int): Start time of the window.
+          end_time (int): End time of the window (inclusive).
+          limit (int): Record limit of retrieval.
+          index (int): Submission order of the query.
+
+        Returns:
+          list: List of query results
+        """
+        query_id = self.__call(
+            "start_query",
+            logGroupName=log_group,
+            startTime=start_time,
+            endTime=end_time,
+            queryString=query,
+            limit=limit,
+        )["queryId"]
+        logger.info(
+            f"{index} out of {self.__submitted} - Generated query ID: {query_id}"
+        )
+
+        started = time.monotonic()
+        delay = self.initial_delay
+        polls = 0
+        while True:
+            time.sleep(delay)
+            response = self.__call("get_query_results", queryId=query_id)
+            polls += 1
+
+            if response["status"] in TERMINAL_STATES:
+                break
+
+            if time.monotonic() - started > self.timeout:
+                self.__call("stop_query", queryId=query_id)
+                raise Exception(
+                    f"Query {query_id} still {response['status']} after {self.timeout}s"
+                )
+
+            delay = min(delay * 2, self.max_delay)
+
+        if response["status"] != "Complete":
+            raise Exception(f"Query {query_id} ended as {response['status']}")
+
+        logger.info(
+            f"{query_id}: {len(response['results'])} record(s) found (polls:{polls})"
+        )
+
+        return response["results"]
+
+    def submit(
+        self,
+        query: str,
+        log_group: str,
+        start_time: float,
+        end_time: float,
+        limit: int,
+    ) -> concurrent.futures.Future:
+        """
+        The function schedules a query over a window of the log group.
+
+        Parameters:
+          query (str): Query string.
+          log_group (str): Log group where perform query.
+          start_time (float): Start time of the window.
+          end_time (float): End time of the window (inclusive).
+          limit (int): Record limit of retrieval.
+
+        Returns:
+          Future: Results of the query, once it completes
+        """
+        self.__submitted += 1
+
+        # Whole seconds widening the window, never narrowing it: a record
+        # stamped within a boundary second is found by both adjacent windows
+        return self.__executor.submit(
+            self.__run,
+            query,
+            log_group,
+            math.floor(start_time),
+            math.ceil(end_time),
+            limit,
+            self.__submitted,
+        )
+
+    def close(self) -> None:
+        """
+        The function waits for the scheduled queries and releases the slots.
+        """
+        self.__executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "QueryScheduler":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
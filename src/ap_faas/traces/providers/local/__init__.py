@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import uuid
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Local imports
+from ap_faas.traces import get_request_epoch
+from ap_faas.traces.providers.aws import Traces as AWSTraces
+from ap_faas.traces.providers.local.logs import SyntheticLogs
+from ap_faas.utils.logger import logger
+
+# Default settings of the synthetic log store
+LOCAL_SETTINGS = {
+    "latency": 0.5,
+    "page_size": 10000,
+    "max_concurrent": 30,
+    "background_rate": 0,
+    "cold_start_ratio": 0.05,
+    "memory": 1024,
+}
+
+
+def _synthesize_records(
+    experimental_data: pd.DataFrame, settings: dict, rng: np.random.Generator
+) -> pd.DataFrame:
+    """
+    The function generates the Lambda Insights record of each successful
+    request, plus unrelated invocations of the same functions.
+
+    Parameters:
+      experimental_data (DataFrame): Results from experimental test.
+      settings (dict): Settings of the synthetic log store.
+      rng (Generator): Random number generator.
+
+    Returns:
+      DataFrame: Synthetic records
+    """
+    successful = experimental_data.loc[
+        (experimental_data["response_status"] == 200)
+        & experimental_data["response_id"].notna()
+    ]
+
+    # Each record is written when its invocation ends
+    request_time = get_request_epoch(successful["request_time"]).to_numpy()
+    response_time = successful["response_time"].to_numpy(dtype=float)
+    timestamps = request_time + response_time
+    function_names = successful["function_name"].to_numpy(dtype=object)
+    request_ids = successful["response_id"].astype(str).to_numpy(dtype=object)
+
+    # Unrelated invocations over the whole experiment
+    if settings["background_rate"] > 0 and len(successful):
+        start, end = request_time.min(), timestamps.max()
+        size = rng.poisson(settings["background_rate"] * max(end - start, 1))
+        timestamps = np.concatenate([timestamps, rng.uniform(start, end, size)])
+        function_names = np.concatenate(
+            [function_names, rng.choice(successful["function_name"].unique(), size)]
+        )
+        request_ids = np.concatenate(
+            [
+                request_ids,
+                [str(uuid.UUID(bytes=rng.bytes(16), version=4)) for _ in range(size)],
+            ]
+        )
+        response_time = np.concatenate([response_time, rng.choice(response_time, size)])
+
+    size = len(timestamps)
+
+    # Execution time is the response time without the network
+    duration = np.round(response_time * 1000 * rng.uniform(0.6, 0.95, size), 2)
+    cold_start = rng.random(size) < settings["cold_start_ratio"]
+    init_duration = np.where(
+        cold_start, np.round(rng.uniform(100, 800, size), 2), np.nan
+    )
+    total_memory = np.full(size, settings["memory"])
+
+    return pd.DataFrame(
+        {
+            "timestamp": timestamps,
+            "event_type": "performance",
+            "function_name": function_names,
+            "request_id": request_ids,
+            "duration": duration,
+            "memory_utilization": np.round(rng.uniform(5, 60, size), 2),
+            "total_memory": total_memory,
+            "cpu_total_time": np.round(duration * rng.uniform(0.2, 1, size)),
+            "total_network": rng.integers(500, 50000, size),
+            "billed_mb_ms": np.ceil(duration) * total_memory,
+            "cold_start": cold_start,
+            "init_duration": init_duration,
+            "version": "$LATEST",
+            "shutdown": np.nan,
+            "shutdown_reason": np.nan,
+        }
+    )
+
+
+class Traces(AWSTraces):
+    """
+    This is a stand-in of the AWS provider, answering its queries from a
+    synthetic log store generated for the recorded experiment, without network.
+
+    Attributes:
+      namespace (str): Namespace of the synthetic log store.
+      functions (str): Function names.
+      limit_quota (int): Record limit of a query.
+    """
+
+    def __init__(
+        self,
+        functions: str,
+        config_file: dict,
+        namespace: str = "Local",
+        cache_dir: Optional[str] = None,
+        experimental_data: Optional[pd.DataFrame] = None,
+    ) -> None:
+        """
+        The constructor for Traces class.
+
+        Parameters:
+          functions (str): Function name
+          config_file (dict): Experimental configuration file.
+          namespace (str): Namespace of the synthetic log store.
+          cache_dir (str): Directory of the cached query windows (not used, the
+            records change with the settings).
+          experimental_data (DataFrame): Results from experimental test.
+        """
+        if experimental_data is None:
+            raise Exception("Local provider requires the experimental data")
+
+        settings = {**LOCAL_SETTINGS, **config_file.get("local_provider", {})}
+        rng = np.random.default_rng(
+            settings.get("seed", config_file.get("random_seed"))
+        )
+
+        records = _synthesize_records(experimental_data, settings, rng)
+        logger.info(f"{len(records)} synthetic record(s) generated")
+
+        self.limit_quota = settings["page_size"]
+        self.logs = SyntheticLogs(
+            records,
+            latency=settings["latency"],
+            page_size=settings["page_size"],
+            max_concurrent=settings["max_concurrent"],
+        )
+
+        super().__init__(
+            functions,
+            config_file,
+            namespace=namespace,
+            logs_client=self.logs,
+        )
+
+    def get_traces_per_request(
+        self,
+        limit: int,
+        resolution: int,
+        expected: Optional[list] = None,
+        requests: Optional[list] = None,
+    ) -> list:
+        """
+        The function retrieves the trace from each function.
+
+        Parameters:
+          limit (int): Record limit of retrieval.
+          resolution (int): Size of the bins packed into windows (seconds).
+          expected (list): Response ID and request time of each response to
+            wait for (tail mode), if any.
+          requests (list): Response ID and request time of each request to
+            look up directly (targeted mode), if any.
+
+        Returns:
+          list: List of dictionaries with traces
+        """
+        function_traces = super().get_traces_per_request(
+            limit, resolution, expected, requests
+        )
+        logger.info(f"{self.logs.queries} synthetic quer(ies) answered")
+
+        return function_traces
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import ast
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from botocore.exceptions import ClientError
+
+# Local imports
+from ap_faas.traces.providers.aws import TIMESTAMP_FORMAT
+
+# Parts of a Logs Insights query understood by the synthetic log store
+LIST_FILTER = r"{} in (\[[^\]]*\])"
+STATS_QUERY = re.compile(r"stats count\(\*\) as (\w+) by bin\((\d+)s\) as (\w+)")
+FIELDS_QUERY = re.compile(r"\|\s*fields\s+([^|]+)")
+FIELD_ALIAS = re.compile(r"^(.+?)\s+as\s+(\w+)$")
+
+
+class SyntheticLogs:
+    """
+    This is an in-memory stand-in of the CloudWatch Logs client, answering
+    the Logs Insights queries of the trace pipeline from synthetic records.
+
+    Attributes:
+      latency (float): Time each query stays running (seconds).
+      page_size (int): Record limit of a query.
+      max_concurrent (int): Queries running at the same time before throttling.
+      queries (int): Queries started.
+    """
+
+    def __init__(
+        self,
+        records: pd.DataFrame,
+        latency: float = 0.5,
+        page_size: int = 10000,
+        max_concurrent: int = 30,
+    ) -> None:
+        """
+        The constructor for SyntheticLogs class.
+
+        Parameters:
+          records (DataFrame): Records of the log store, with a timestamp column
+            (epoch seconds).
+          latency (float): Time each query stays running (seconds).
+          page_size (int): Record limit of a query.
+          max_concurrent (int): Queries running at the same time before throttling.
+        """
+        self.latency = latency
+        self.page_size = page_size
+        self.max_concurrent = max_concurrent
+        self.queries = 0
+
+        # Records keep their labels, the pointers of the records
+        records = records.sort_values("timestamp", kind="stable")
+        self.__timestamps = records["timestamp"].to_numpy(dtype=float)
+        self.__records = records
+
+        self.__lock = threading.Lock()
+        self.__running: dict = {}
+
+    def __error(self, code: str, message: str) -> ClientError:
+        return ClientError({"Error": {"Code": code, "Message": message}}, "StartQuery")
+
+    def __select(self, query: str, start_time: int, end_time: int) -> pd.DataFrame:
+        """
+        The function selects the records of a window matching the query filters.
+
+        Parameters:
+          query (str): Query string.
+          start_time (int): Start time of the window.
+          end_time (int): End time of the window (inclusive, only the records
+            stamped on the second itself).
+
+        Returns:
+          DataFrame: Records of the window
+        """
+        first = np.searchsorted(self.__timestamps, start_time, side="left")
+        last = np.searchsorted(self.__timestamps, end_time, side="right")
+        records = self.__records.iloc[first:last]
+
+        for column in ["function_name", "request_id"]:
+            values = re.search(LIST_FILTER.format(column), query)
+            if values is not None:
+                records = records[
+                    records[column].isin(ast.literal_eval(values.group(1)))
+                ]
+
+        return records
+
+    def __stats(self, records: pd.DataFrame, stats: re.Match) -> list:
+        """
+        The function counts the records of each bin.
+
+        Parameters:
+          records (DataFrame): Records of the window.
+          stats (Match): Count, bin size and bin names of the query.
+
+        Returns:
+          list: Count of each bin with records
+        """
+        count_name, resolution, bin_name = stats.groups()
+        bins = (
+            records["timestamp"].to_numpy(dtype=float)
+            // int(resolution)
+            * int(resolution)
+        )
+        values, counts = np.unique(bins, return_counts=True)
+
+        return [
+            [
+                {
+                    "field": bin_name,
+                    "value": datetime.fromtimestamp(value, timezone.utc).strftime(
+                        TIMESTAMP_FORMAT
+                    )[:-3],
+                },
+                {"field": count_name, "value": str(count)},
+            ]
+            for value, count in zip(values.tolist(), counts.tolist())
+        ]
+
+    def __fields(self, records: pd.DataFrame, query: str) -> list:
+        """
+        The function retrieves the fields of each record, newest first.
+
+        Parameters:
+          records (DataFrame): Records of the window.
+          query (str): Query string.
+
+        Returns:
+          list: Fields of each record
+        """
+        if "sort @timestamp desc" in query:
+            records = records.iloc[::-1]
+
+        fields = FIELDS_QUERY.search(query)
+        expressions = (
+            [field.strip() for field in fields.group(1).split(",")]
+            if fields is not None
+            else list(records.columns)
+        )
+
+        columns = {}
+        for expression in expressions:
+            alias = FIELD_ALIAS.match(expression)
+            source, name = alias.groups() if alias else (expression, expression)
+
+            # Arithmetic of the fields is limited to divisions by constants
+            column, *divisors = [part.strip() for part in source.split("/")]
+            if column not in records.columns:
+                continue
+            values = records[column]
+            for divisor in divisors:
+                values = values / float(divisor)
+            columns[name] = values.to_numpy(dtype=object)
+
+        # Values are strings and empty fields are left out, as in CloudWatch,
+        # and the pointer of a record is the same in every query and store
+        pointers = [uuid.UUID(int=index).hex for index in records.index.tolist()]
+        return [
+            [
+                {"field": name, "value": str(value)}
+                for name, value in zip(columns, row)
+                if value is not None and value == value
+            ]
+            + [{"field": "@ptr", "value": pointer}]
+            for row, pointer in zip(zip(*columns.values()), pointers)
+        ]
+
+    def start_query(
+        self,
+        logGroupName: str,
+        startTime: int,
+        endTime: int,
+        queryString: str,
+        limit: int,
+    ) -> dict:
+        """
+        The function starts a query over a window of the log store.
+
+        Parameters:
+          logGroupName (str): Log group of the query.
+          startTime (int): Start time of the window.
+          endTime (int): End time of the window (inclusive).
+          queryString (str): Query string.
+          limit (int): Record limit of retrieval.
+
+        Returns:
+          dict: Query ID
+        """
+        now = time.monotonic()
+        with self.__lock:
+            running = sum(ready > now for ready, _ in self.__running.values())
+            if running >= self.max_concurrent:
+                raise self.__error(
+                    "LimitExceededException",
+                    f"{running} queries are already running",
+                )
+            self.queries += 1
+
+        records = self.__select(queryString, startTime, endTime)
+        stats = STATS_QUERY.search(queryString)
+        if stats is not None:
+            results = self.__stats(records, stats)
+        else:
+            results = self.__fields(records, queryString)
+
+        query_id = str(uuid.uuid4())
+        with self.__lock:
+            self.__running[query_id] = (
+                now + self.latency,
+                results[: min(limit, self.page_size)],
+            )
+
+        return {"queryId": query_id}
+
+    def get_query_results(self, queryId: str) -> dict:
+        """
+        The function retrieves the state of a query, with its results once
+        it completes.
+
+        Parameters:
+          queryId (str): Query ID.
+
+        Returns:
+          dict: Status and results of the query
+        """
+        with self.__lock:
+            if queryId not in self.__running:
+                return {"status": "Unknown", "results": []}
+
+            ready, results = self.__running[queryId]
+            if ready > time.monotonic():
+                return {"status": "Running", "results": []}
+
+            del self.__running[queryId]
+
+        return {"status": "Complete", "results": results}
+
+    def stop_query(self, queryId: str) -> dict:
+        """
+        The function stops a running query.
+
+        Parameters:
+          queryId (str): Query ID.
+
+        Returns:
+          dict: Validation of the stop
+        """
+        with self.__lock:
+            return {"success": self.__running.pop(queryId, None) is not None}
@@ -8,12 +8,24 @@
 import json
 
 # External imports
+import math
 import os
+from typing import Iterator, Optional
 
 import jsonschema
+import pandas as pd
 import yaml
 from jsonschema import validate
 
+# Optional columnar formats
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
 # Local imports
 from ap_faas.config import BASE_DIR
 
@@ -21,6 +33,12 @@ with open(os.path.join(BASE_DIR, "schema.json"), "r") as file:
     schema_data = file.read()
 config_schema = json.loads(schema_data)
 
+# Extension of each output format
+OUTPUT_FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+# Columns with few distinct values, stored once in a dictionary
+DICTIONARY_COLUMNS = ["function_name", "endpoint", "path", "method"]
+
 
 def validate_config_file(config_file: dict) -> bool:
     """
@@ -64,6 +82,29 @@ def read_config_file(file_name: str, ext: str = ".json") -> dict:
         raise Exception(f"Error reading {ext} file: {err}")
 
 
+def _json_safe(content: object) -> object:
+    """
+    The function replaces the values JSON cannot represent (NaN and
+    infinities, e.g. the latency of a size without responses) with null.
+
+    Parameters:
+      content (object): Content to store.
+
+    Returns:
+      object: Content with only finite numbers
+    """
+    if isinstance(content, float):
+        return content if math.isfinite(content) else None
+
+    if isinstance(content, dict):
+        return {key: _json_safe(value) for key, value in content.items()}
+
+    if isinstance(content, (list, tuple)):
+        return [_json_safe(value) for value in content]
+
+    return content
+
+
 def write_file(output_file_name: str, content: dict) -> bool:
     """
     The function writes JSON file with configurations.
@@ -77,9 +118,309 @@ def write_file(output_file_name: str, content: dict) -> bool:
     """
     try:
         with open(output_file_name, "w") as outfile:
-            json.dump(content, outfile, indent=2)
+            json.dump(_json_safe(content), outfile, indent=2, allow_nan=False)
 
         return True
 
     except Exception as err:
         raise Exception(f"Error writing file: {err}")
+
+
+def get_output_file(file_name: str, output_format: str = "csv") -> str:
+    """
+    The function retrieves the name of a data file in an output format.
+
+    Parameters:
+      file_name (str): Name and location of the file (without extension).
+      output_format (str): Output format (csv, parquet or arrow).
+
+    Returns:
+      str: Name and location of the file
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise Exception(f"Unknown output format: {output_format}")
+
+    if output_format != "csv" and pa is None:
+        raise Exception(
+            f"The {output_format} output format requires pyarrow: "
+            "poetry install --extras columnar"
+        )
+
+    return f"{file_name}{OUTPUT_FORMATS[output_format]}"
+
+
+def is_data_file(file_name: str) -> bool:
+    """
+    The function checks whether a file is stored in an output format.
+
+    Parameters:
+      file_name (str): Name of the file.
+
+    Returns:
+      bool: Validation
+    """
+    return os.path.splitext(file_name)[1] in OUTPUT_FORMATS.values()
+
+
+def _extend_dictionary(column: "pa.ChunkedArray", dictionary: "pa.Array") -> tuple:
+    """
+    The function encodes a column against the dictionary of the previous
+    batches, appending its new values, so that every batch of a file shares
+    one dictionary.
+
+    Parameters:
+      column (pa.ChunkedArray): Column of the batch.
+      dictionary (pa.Array): Values of the previous batches.
+
+    Returns:
+      tuple: Encoded column and extended dictionary
+    """
+    values = column.combine_chunks()
+    added = values.filter(pc.invert(pc.is_in(values, value_set=dictionary)))
+    dictionary = pa.concat_arrays([dictionary, pc.unique(added.drop_null())])
+
+    return (
+        pa.DictionaryArray.from_arrays(
+            pc.index_in(values, value_set=dictionary), dictionary
+        ),
+        dictionary,
+    )
+
+
+def _encode_table(
+    table: "pa.Table", column_types: dict, dictionaries: Optional[dict] = None
+) -> "pa.Table":
+    """
+    The function types the columns of a table before storing it.
+
+    Parameters:
+      table (pa.Table): Table to store.
+      column_types (dict): Arrow type alias per column (e.g. int16, timestamp).
+      dictionaries (dict): Dictionary per column of the previous batches, when
+        the table is one batch of a file (extended in place).
+
+    Returns:
+      pa.Table: Typed table
+    """
+    for index, name in enumerate(table.column_names):
+        column = table.column(index)
+
+        if column_types.get(name) == "timestamp":
+            # Epoch seconds stored as UTC timestamps (microseconds)
+            micros = pc.cast(pc.multiply(column, 1e6), pa.int64(), safe=False)
+            column = pc.cast(micros, pa.timestamp("us", tz="UTC"))
+        elif name in column_types:
+            column = pc.cast(column, pa.type_for_alias(column_types[name]))
+
+        if name in DICTIONARY_COLUMNS and pa.types.is_string(column.type):
+            if dictionaries is None:
+                column = column.dictionary_encode()
+            else:
+                column, dictionaries[name] = _extend_dictionary(
+                    column, dictionaries.get(name, pa.array([], column.type))
+                )
+
+        table = table.set_column(index, name, column)
+
+    return table
+
+
+def _write_table(table: "pa.Table", output_file: str, output_format: str) -> None:
+    """
+    The function writes a table in a columnar format.
+
+    Parameters:
+      table (pa.Table): Table to store.
+      output_file (str): Name and location of the file.
+      output_format (str): Output format (parquet or arrow).
+    """
+    if output_format == "parquet":
+        pq.write_table(table, output_file)
+    else:
+        with pa.ipc.new_file(output_file, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _open_csv(csv_file: str, column_types: dict) -> "pa_csv.CSVStreamingReader":
+    """
+    The function opens a CSV file to read it one block at a time.
+
+    Parameters:
+      csv_file (str): Name and location of the CSV file.
+      column_types (dict): Arrow type alias per column (inferred if not given).
+
+    Returns:
+      pa_csv.CSVStreamingReader: Reader of the record batches
+    """
+    types = {
+        name: pa.float64() if alias == "timestamp" else pa.type_for_alias(alias)
+        for name, alias in column_types.items()
+    }
+
+    while True:
+        reader = pa_csv.open_csv(
+            csv_file,
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=types, strings_can_be_null=True
+            ),
+        )
+
+        # Types of the other columns are inferred from the first block, and
+        # the columns empty in it are read again as strings
+        empty = {
+            field.name: pa.string()
+            for field in reader.schema
+            if pa.types.is_null(field.type)
+        }
+        if not empty:
+            return reader
+
+        reader.close()
+        types |= empty
+
+
+def convert_csv(
+    csv_file: str, output_format: str, column_types: Optional[dict] = None
+) -> str:
+    """
+    The function converts a CSV file into an output format, typing its columns.
+
+    Parameters:
+      csv_file (str): Name and location of the CSV file (removed if converted).
+      output_format (str): Output format (csv, parquet or arrow).
+      column_types (dict): Arrow type alias per column (inferred if not given).
+
+    Returns:
+      str: Name and location of the converted file
+    """
+    output_file = get_output_file(os.path.splitext(csv_file)[0], output_format)
+    if output_format == "csv":
+        return csv_file
+
+    column_types = column_types or {}
+    try:
+        # Converted one block at a time, the file is never held in memory
+        with _open_csv(csv_file, column_types) as reader:
+            schema = _encode_table(reader.schema.empty_table(), column_types).schema
+            dictionaries: dict = {}
+
+            with (
+                pq.ParquetWriter(output_file, schema)
+                if output_format == "parquet"
+                else pa.ipc.new_file(
+                    output_file,
+                    schema,
+                    options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True),
+                )
+            ) as writer:
+                for batch in reader:
+                    writer.write_table(
+                        _encode_table(
+                            pa.Table.from_batches([batch]), column_types, dictionaries
+                        )
+                    )
+
+        os.remove(csv_file)
+
+        return output_file
+
+    except Exception as err:
+        raise Exception(f"Error converting {csv_file} to {output_format}: {err}")
+
+
+def write_data(data: pd.DataFrame, file_name: str, output_format: str = "csv") -> str:
+    """
+    The function writes a data frame in an output format.
+
+    Parameters:
+      data (DataFrame): Data to store.
+      file_name (str): Name and location of the file (without extension).
+      output_format (str): Output format (csv, parquet or arrow).
+
+    Returns:
+      str: Name and location of the file
+    """
+    output_file = get_output_file(file_name, output_format)
+
+    if output_format == "csv":
+        data.to_csv(output_file, index=False)
+    else:
+        _write_table(
+            _encode_table(pa.Table.from_pandas(data, preserve_index=False), {}),
+            output_file,
+            output_format,
+        )
+
+    return output_file
+
+
+def read_data(file_name: str) -> pd.DataFrame:
+    """
+    The function reads a data file stored in any output format.
+
+    Parameters:
+      file_name (str): Name and location of the file.
+
+    Returns:
+      DataFrame: Stored data
+    """
+    extension = os.path.splitext(file_name)[1]
+
+    if extension == OUTPUT_FORMATS["csv"]:
+        return pd.read_csv(file_name)
+
+    if pa is None:
+        raise Exception(f"Reading {file_name} requires pyarrow")
+
+    if extension == OUTPUT_FORMATS["parquet"]:
+        return pq.read_table(file_name).to_pandas()
+
+    if extension == OUTPUT_FORMATS["arrow"]:
+        with pa.memory_map(file_name) as source:
+            return pa.ipc.open_file(source).read_all().to_pandas()
+
+    raise Exception(f"Unknown data file: {file_name}")
+
+
+def iter_column(
+    file_name: str, column: str, chunk_size: int = 1_000_000
+) -> Iterator[pd.Series]:
+    """
+    The function reads a column of a data file stored in any output format,
+    one chunk at a time.
+
+    Parameters:
+      file_name (str): Name and location of the file.
+      column (str): Name of the column.
+      chunk_size (int): Number of rows per chunk.
+
+    Returns:
+      Iterator: Values of the column, per chunk
+    """
+    extension = os.path.splitext(file_name)[1]
+
+    if extension == OUTPUT_FORMATS["csv"]:
+        with pd.read_csv(file_name, usecols=[column], chunksize=chunk_size) as chunks:
+            for chunk in chunks:
+                yield chunk[column]
+        return
+
+    if pa is None:
+        raise Exception(f"Reading {file_name} requires pyarrow")
+
+    if extension == OUTPUT_FORMATS["parquet"]:
+        for batch in pq.ParquetFile(file_name).iter_batches(
+            chunk_size, columns=[column]
+        ):
+            yield batch.column(0).to_pandas()
+        return
+
+    if extension == OUTPUT_FORMATS["arrow"]:
+        with pa.memory_map(file_name) as source:
+            reader = pa.ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                yield reader.get_batch(index).column(column).to_pandas()
+        return
+
+    raise Exception(f"Unknown data file: {file_name}")
@@ -8,11 +8,16 @@
 import urllib.parse as queryParams
 
 # External imports
+import numpy as np
 import pandas as pd
 from pandas.core.frame import DataFrame
 
 # Local imports
 from ap_faas.utils.logger import logger
+from ap_faas.utils.template import SampleTemplate, is_templated
+
+# Rendered variants of each templated sample in the sample catalogue
+TEMPLATE_VARIANTS = 1000
 
 
 def parse_query(query_params: dict) -> str:
@@ -53,6 +58,131 @@ def parse_https_sample(function: dict) -> dict:
     return https_samples
 
 
+def _parse_samples(config_file: dict) -> tuple:
+    """
+    The function parses the samples of the functions.
+
+    Parameters:
+      config_file (dict): Configuration file
+
+    Returns:
+      DataFrame: Distinct samples of the functions (templated ones unrendered)
+      ndarray: Probability of each sample, if any weight is configured
+      dict: SampleTemplate of each templated sample, by index
+    """
+    if config_file["event"] != "https":
+        raise Exception("Error parsing samples")
+
+    # Samples of every function gathered before a single frame is built
+    columns: dict = {
+        "function_name": [],
+        "endpoint": [],
+        "path": [],
+        "method": [],
+        "query_string": [],
+        "body": [],
+    }
+    weights = []
+    templates: dict = {}
+    weighted = False
+    for function in config_file["functions"]:
+        samples = function["samples"]
+        templates |= {
+            len(columns["path"]) + index: SampleTemplate(sample)
+            for index, sample in enumerate(samples)
+            if is_templated(sample)
+        }
+        for column, values in parse_https_sample(function).items():
+            columns[column].extend(values)
+
+        # Every sample equally likely by default
+        sample_weights = np.array(
+            [sample.get("weight", 1) for sample in samples], dtype=float
+        )
+        weights.append(
+            function.get("weight", len(samples)) * sample_weights / sample_weights.sum()
+        )
+        weighted |= "weight" in function or any(
+            "weight" in sample for sample in samples
+        )
+
+    probabilities = np.concatenate(weights) if weighted else None
+    if probabilities is not None:
+        probabilities /= probabilities.sum()
+
+    return pd.DataFrame(columns, dtype=object), probabilities, templates
+
+
+def _render_templates(
+    data: DataFrame, templates: dict, rng: np.random.Generator
+) -> DataFrame:
+    """
+    The function renders the templated samples of the test data, drawing
+    the parameters of every request of a sample at once.
+
+    Parameters:
+      data (DataFrame): Test data, indexed by the sample of each request.
+      templates (dict): SampleTemplate of each templated sample, by index.
+      rng (Generator): Random number generator.
+
+    Returns:
+      DataFrame: Test data with the rendered samples
+    """
+    samples = data.index.to_numpy()
+    columns = {
+        column: data[column].to_numpy(dtype=object, copy=True)
+        for column in ["path", "query_string", "body"]
+    }
+
+    for index, template in templates.items():
+        positions = np.flatnonzero(samples == index)
+        if not len(positions):
+            continue
+
+        for column, values in template.render(len(positions), rng).items():
+            columns[column][positions] = np.fromiter(
+                values, dtype=object, count=len(positions)
+            )
+
+    return data.assign(**columns)
+
+
+def generate_catalogue(config_file: dict) -> DataFrame:
+    """
+    The function generates the distinct samples of the functions, from which
+    the test data is drawn. Each templated sample is rendered as a number of
+    variants (template_variants).
+
+    Parameters:
+      config_file (dict): Configuration file
+
+    Returns:
+      DataFrame: Distinct samples of the functions, with the probability of
+        each one in DataFrame.attrs["weights"] when they are not uniform
+    """
+    catalogue, weights, templates = _parse_samples(config_file)
+
+    if templates:
+        variants = config_file.get("template_variants", TEMPLATE_VARIANTS)
+        counts = np.ones(len(catalogue), dtype=int)
+        counts[list(templates)] = variants
+
+        if weights is None:
+            weights = np.full(len(catalogue), 1 / len(catalogue))
+        weights = np.repeat(weights / counts, counts)
+
+        catalogue = _render_templates(
+            catalogue.loc[catalogue.index.repeat(counts)],
+            templates,
+            np.random.default_rng(config_file["random_seed"]),
+        ).reset_index(drop=True)
+
+    if weights is not None:
+        catalogue.attrs["weights"] = weights.tolist()
+
+    return catalogue
+
+
 def generate_sample(config_file: dict) -> DataFrame:
     """
     The function generates test data for profiling.
@@ -67,34 +197,22 @@ def generate_sample(config_file: dict) -> DataFrame:
     logger.info(f"Test data size: {config_file['data_size']}")
     logger.info(f"Random seed: {config_file['random_seed']}")
 
-    samples = None
-
-    if config_file["event"] == "https":
-        samples_df = pd.DataFrame(
-            columns=[
-                "function_name",
-                "endpoint",
-                "path",
-                "method",
-                "query_string",
-                "body",
-            ]
-        )
-
-        for function in config_file["functions"]:
-            https_samples = pd.DataFrame(parse_https_sample(function))
-            samples_df = pd.concat([samples_df, https_samples], ignore_index=True)
-
-        samples = samples_df.copy(deep=True)
-
-    if samples is None:
-        raise Exception("Error parsing samples")
-
-    sample_data = samples.sample(
+    catalogue, weights, templates = _parse_samples(config_file)
+    sample_data = catalogue.sample(
         random_state=config_file["random_seed"],
         n=config_file["data_size"],
         replace=True,
-    ).reset_index(drop=True)
+        weights=weights,
+    )
+
+    if templates:
+        sample_data = _render_templates(
+            sample_data,
+            templates,
+            np.random.default_rng(config_file["random_seed"]),
+        )
+
+    sample_data = sample_data.reset_index(drop=True)
 
     logger.info(f"\n {sample_data}")
     logger.success("Test data generation completed!\n")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import math
+
+import numpy as np
+
+# Percentiles reported in the latency summaries
+PERCENTILES = {"p50": 50, "p90": 90, "p99": 99, "p99.9": 99.9}
+
+# Highest trackable latency in microseconds (1 hour)
+HIGHEST_TRACKABLE = 3600 * 1000 * 1000
+
+
+class LatencyHistogram:
+    """
+    This is a mergeable high dynamic range (HDR) histogram of latencies,
+    recorded in microseconds with a fixed number of significant digits.
+
+    Attributes:
+      digits (int): Significant digits kept for every recorded value.
+      counts (np.ndarray): Count per bucket.
+      total (int): Number of recorded values.
+      sum (float): Sum of the recorded values (seconds).
+      minimum (int): Lowest recorded value (microseconds).
+      maximum (int): Highest recorded value (microseconds).
+    """
+
+    def __init__(self, digits: int = 3) -> None:
+        """
+        The constructor for LatencyHistogram class.
+
+        Parameters:
+          digits (int): Significant digits kept for every recorded value.
+        """
+        self.digits = digits
+
+        # Linear sub-buckets within each power of two
+        self.__magnitude = math.ceil(math.log2(2 * 10**digits))
+        self.__half_magnitude = self.__magnitude - 1
+        self.__half_count = 1 << self.__half_magnitude
+        self.__mask = (1 << self.__magnitude) - 1
+
+        buckets = self.__bucket_index(HIGHEST_TRACKABLE) + 1
+        self.counts = np.zeros((buckets + 1) * self.__half_count, dtype=np.int64)
+        self.total = 0
+        self.sum = 0.0
+        self.minimum = HIGHEST_TRACKABLE
+        self.maximum = 0
+
+    def __bucket_index(self, value: int) -> int:
+        return (value | self.__mask).bit_length() - self.__magnitude
+
+    def index_of(self, seconds: float) -> int:
+        """
+        The function retrieves the bucket of a latency.
+
+        Parameters:
+          seconds (float): Latency in seconds.
+
+        Returns:
+          int: Bucket index
+        """
+        value = min(max(int(seconds * 1e6), 0), HIGHEST_TRACKABLE)
+        bucket = self.__bucket_index(value)
+        sub_bucket = value >> bucket
+
+        return ((bucket + 1) << self.__half_magnitude) + sub_bucket - self.__half_count
+
+    def values(self) -> np.ndarray:
+        """
+        The function retrieves the lowest latency (microseconds) of each bucket.
+
+        Returns:
+          np.ndarray: Value per bucket
+        """
+        index = np.arange(len(self.counts))
+        bucket = (index >> self.__half_magnitude) - 1
+        sub_bucket = (index & (self.__half_count - 1)) + self.__half_count
+
+        # The first bucket also covers the lower half of the sub-buckets
+        sub_bucket = np.where(bucket < 0, sub_bucket - self.__half_count, sub_bucket)
+        bucket = np.maximum(bucket, 0)
+
+        return sub_bucket.astype(np.int64) << bucket
+
+    def record(self, seconds: float) -> None:
+        """
+        The function records a latency.
+
+        Parameters:
+          seconds (float): Latency in seconds.
+        """
+        value = min(max(int(seconds * 1e6), 0), HIGHEST_TRACKABLE)
+        self.counts[self.index_of(seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """
+        The function adds the latencies of another histogram.
+
+        Parameters:
+          other (LatencyHistogram): Histogram with the same digits.
+
+        Returns:
+          LatencyHistogram: Merged histogram
+        """
+        if other.digits != self.digits:
+            raise Exception(
+                f"Histograms with distinct digits: {self.digits} and {other.digits}"
+            )
+
+        self.counts += other.counts
+        self.total += other.total
+        self.sum += other.sum
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+        return self
+
+    def percentile(self, percentile: float) -> float:
+        """
+        The function estimates a percentile of the recorded latencies.
+
+        Parameters:
+          percentile (float): Percentile (0-100).
+
+        Returns:
+          float: Latency in seconds
+        """
+        if self.total == 0:
+            return math.nan
+
+        rank = max(math.ceil(self.total * percentile / 100), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        value = min(int(self.values()[index]), self.maximum)
+
+        return max(value, self.minimum) / 1e6
+
+    def summary(self) -> dict:
+        """
+        The function summarizes the recorded latencies.
+
+        Returns:
+          dict: Count, mean, minimum, maximum and percentiles (seconds)
+        """
+        summary = {
+            "count": self.total,
+            "min": self.minimum / 1e6 if self.total else math.nan,
+            "mean": self.sum / self.total if self.total else math.nan,
+        }
+        for name, percentile in PERCENTILES.items():
+            summary[name] = self.percentile(percentile)
+        summary["max"] = self.maximum / 1e6 if self.total else math.nan
+
+        return summary
+
+    def to_dict(self) -> dict:
+        """
+        The function encodes the histogram with its non-empty buckets only.
+
+        Returns:
+          dict: Encoded histogram
+        """
+        index = np.flatnonzero(self.counts)
+
+        return {
+            "digits": self.digits,
+            "unit": "us",
+            "total": self.total,
+            "sum": self.sum,
+            "min": self.minimum,
+            "max": self.maximum,
+            "index": index.tolist(),
+            "counts": self.counts[index].tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, content: dict) -> "LatencyHistogram":
+        """
+        The function decodes a histogram.
+
+        Parameters:
+          content (dict): Encoded histogram.
+
+        Returns:
+          LatencyHistogram: Decoded histogram
+        """
+        histogram = cls(content["digits"])
+        histogram.counts[content["index"]] = content["counts"]
+        histogram.total = content["total"]
+        histogram.sum = content["sum"]
+        histogram.minimum = content["min"]
+        histogram.maximum = content["max"]
+
+        return histogram
@@ -13,8 +13,6 @@ from typing import Optional, Union
 import loguru
 from loguru import logger as custom_logger
 from rich.console import Console
-from rich.progress import ProgressColumn, Task
-from rich.text import Text
 from rich.theme import Theme
 
 
@@ -127,9 +125,9 @@ def create_logger(console: Console) -> CustomLogger:
 logger = create_logger(console=console)
 
 
-def _format_time(seconds: Optional[float]) -> str:
+def format_time(seconds: Optional[float]) -> str:
     """Formats seconds to readable time string.
-    This function is used to display time in progress bar.
+    This function is used to display the elapsed time in the dashboard.
     """
     if not seconds:
         return "--:--"
@@ -140,14 +138,3 @@ def _format_time(seconds: Optional[float]) -> str:
     if hours:
         return f"{hours}:{minutes:02d}:{seconds:02d}"
     return f"{minutes:02d}:{seconds:02d}"
-
-
-class TimeColumn(ProgressColumn):
-    """Renders total time, ETA, and speed in progress bar."""
-
-    max_refresh = 0.5  # Only refresh twice a second to prevent jitter
-
-    def render(self, task: Task) -> Text:
-        elapsed_time = _format_time(task.elapsed)
-        speed = f"{task.speed:.2f}/s" if task.speed else "?/s"
-        return Text(f"[{elapsed_time}, {speed}]", style="progress.remaining")
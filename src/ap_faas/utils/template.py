@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import re
+import urllib.parse as queryParams
+from typing import Callable, Union
+
+import numpy as np
+import pandas as pd
+
+# Parameters of each generator of the sample parameters
+GENERATORS = {
+    "uniform": (2,),
+    "normal": (2,),
+    "zipf": (1, 2),
+}
+
+# Reference to a parameter within a templated field (e.g. {height})
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def _parse_number(value: str) -> Union[int, float]:
+    """
+    The function parses a parameter of a generator.
+
+    Parameters:
+      value (str): Parameter of the generator.
+
+    Returns:
+      int: Parameter as an integer, or as a float if it is not one
+    """
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def parse_generator(
+    generator: Union[str, list], rng: np.random.Generator
+) -> Callable[[int], np.ndarray]:
+    """
+    The function parses the generator of a sample parameter. Integer bounds
+    draw integers (uniform bounds included, normal values rounded).
+
+    Parameters:
+      generator (str): Generator and its parameters (e.g. uniform:100:900,
+        normal:5000:800, zipf:1.2, zipf:0.8:50) or list of values to choose
+        from.
+      rng (Generator): Random number generator.
+
+    Returns:
+      Callable: Generator of a column of values, given its size
+    """
+    if isinstance(generator, list):
+        if not generator:
+            raise Exception("Sample parameter without values to choose from")
+        choices = np.array(generator, dtype=object)
+        return lambda size: choices[rng.integers(0, len(choices), size)]
+
+    name, *values = str(generator).split(":")
+    if name not in GENERATORS or len(values) not in GENERATORS[name]:
+        raise Exception(f"Unknown sample parameter generator: {generator}")
+
+    try:
+        params = [_parse_number(value) for value in values]
+    except ValueError:
+        raise Exception(f"Sample parameter generator with invalid values: {generator}")
+
+    integer = all(isinstance(param, int) for param in params)
+
+    if name == "uniform":
+        low, high = params[0], params[1]
+        if integer:
+            return lambda size: rng.integers(int(low), int(high), size, endpoint=True)
+        return lambda size: rng.uniform(low, high, size)
+
+    elif name == "normal":
+        mean, std = params[0], params[1]
+        if integer:
+            return lambda size: np.rint(rng.normal(mean, std, size)).astype(np.int64)
+        return lambda size: rng.normal(mean, std, size)
+
+    elif len(params) == 1:
+        # Unbounded ranks (the exponent must be greater than 1)
+        if params[0] <= 1:
+            raise Exception(f"Zipf exponent must be greater than 1: {generator}")
+        exponent = params[0]
+        return lambda size: rng.zipf(exponent, size)
+
+    else:
+        # Ranks from 1 to the given maximum
+        ranks = np.arange(1, int(params[1]) + 1)
+        weights = ranks ** -float(params[0])
+        weights /= weights.sum()
+        return lambda size: rng.choice(ranks, size, p=weights)
+
+
+def _render_string(text: str, columns: dict, size: int) -> list:
+    """
+    The function renders a templated string for a column of parameters.
+
+    Parameters:
+      text (str): Templated string.
+      columns (dict): Column of values of each parameter.
+      size (int): Number of values.
+
+    Returns:
+      list: Rendered values (raw parameter values for a single placeholder)
+    """
+    match = PLACEHOLDER.fullmatch(text)
+    if match:
+        return columns[match.group(1)].tolist()
+
+    rendered = pd.Series([""] * size, dtype=object)
+    position = 0
+    for match in PLACEHOLDER.finditer(text):
+        rendered += text[position : match.start()]
+        rendered += pd.Series(columns[match.group(1)]).astype(str)
+        position = match.end()
+
+    return (rendered + text[position:]).tolist()
+
+
+def _render_value(value: object, columns: dict, size: int) -> list:
+    """
+    The function renders a value of a templated body for a column of
+    parameters.
+
+    Parameters:
+      value (object): Value of the body.
+      columns (dict): Column of values of each parameter.
+      size (int): Number of values.
+
+    Returns:
+      list: Rendered values
+    """
+    if isinstance(value, str) and PLACEHOLDER.search(value):
+        return _render_string(value, columns, size)
+
+    if isinstance(value, dict):
+        keys = list(value)
+        rendered = [_render_value(value[key], columns, size) for key in keys]
+        return [dict(zip(keys, items)) for items in zip(*rendered)]
+
+    if isinstance(value, list):
+        rendered = [_render_value(item, columns, size) for item in value]
+        return [list(items) for items in zip(*rendered)]
+
+    return [value] * size
+
+
+def _quote_column(values: list) -> np.ndarray:
+    """
+    The function encodes a column of query string values, quoting each
+    distinct value once.
+
+    Parameters:
+      values (list): Rendered values.
+
+    Returns:
+      np.ndarray: Encoded values
+    """
+    codes, distinct = pd.factorize(pd.Series(values, dtype=object).astype(str))
+    quoted = np.array([queryParams.quote_plus(item) for item in distinct], dtype=object)
+
+    return quoted[codes]
+
+
+class SampleTemplate:
+    """
+    This is a sample with templated path, query string or body, whose
+    parameters are drawn from generators.
+
+    Attributes:
+      sample (dict): Sample of the configuration.
+      params (dict): Generator of each parameter.
+    """
+
+    def __init__(self, sample: dict) -> None:
+        """
+        The constructor for SampleTemplate class.
+
+        Parameters:
+          sample (dict): Sample of the configuration.
+        """
+        self.sample = sample
+        self.params = sample.get("params") or {}
+
+        # Every generator is checked before any value is drawn
+        rng = np.random.default_rng()
+        for generator in self.params.values():
+            parse_generator(generator, rng)
+
+        fields = [sample["path"], sample["query_string"], sample["body"]]
+        references = set(PLACEHOLDER.findall(str(fields)))
+        unknown = references - set(self.params)
+        if unknown:
+            raise Exception(
+                f"Unknown sample parameter(s) in {sample['path']}: "
+                f"{', '.join(sorted(unknown))}"
+            )
+
+    def render(self, size: int, rng: np.random.Generator) -> dict:
+        """
+        The function renders a column of samples, drawing each parameter
+        in a single call.
+
+        Parameters:
+          size (int): Number of samples.
+          rng (Generator): Random number generator.
+
+        Returns:
+          dict: Rendered path, query string and body columns
+        """
+        columns = {
+            name: parse_generator(generator, rng)(size)
+            for name, generator in self.params.items()
+        }
+
+        path = self.sample["path"]
+        paths = (
+            _render_string(path, columns, size)
+            if path and PLACEHOLDER.search(path)
+            else [path] * size
+        )
+
+        # Pairs encoded as the query strings of the literal samples
+        query_strings = pd.Series([""] * size, dtype=object)
+        for key, value in (self.sample["query_string"] or {}).items():
+            if isinstance(value, str) and PLACEHOLDER.search(value):
+                pair = (
+                    queryParams.quote_plus(str(key))
+                    + "="
+                    + pd.Series(
+                        _quote_column(_render_string(value, columns, size)),
+                        dtype=object,
+                    )
+                )
+            else:
+                pair = pd.Series(
+                    [queryParams.urlencode([(key, value)], doseq=True)] * size,
+                    dtype=object,
+                )
+            query_strings = query_strings.where(
+                query_strings == "", query_strings + "&"
+            )
+            query_strings += pair
+
+        return {
+            "path": paths,
+            "query_string": query_strings.tolist(),
+            "body": _render_value(self.sample["body"], columns, size),
+        }
+
+
+def is_templated(sample: dict) -> bool:
+    """
+    The function checks if a sample has parameters drawn from generators.
+
+    Parameters:
+      sample (dict): Sample of the configuration.
+
+    Returns:
+      bool: Whether the sample is templated
+    """
+    return bool(sample.get("params"))
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import os
+import socket
+import time
+from multiprocessing import Process
+from multiprocessing.connection import Client
+from typing import Iterator
+
+import pandas as pd
+import pytest
+
+# Local imports
+from ap_faas.fetcher import distributed
+from ap_faas.fetcher import init as fetcher
+from ap_faas.fetcher.distributed import serve_agent
+from ap_faas.target import serve_target
+from ap_faas.utils.generator import generate_sample
+
+# Requests of the experiment and processes of each agent
+DATA_SIZE = 600
+AGENT_PROCESSES = 2
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_port(port: int, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.05)
+
+    raise Exception(f"Nothing listening on port {port}")
+
+
+@pytest.fixture
+def ports(request: pytest.FixtureRequest) -> Iterator[dict]:
+    """
+    The function starts a local target and two agents on loopback ports.
+
+    Parameters:
+      request (FixtureRequest): Service time of the target (0 if not given).
+
+    Returns:
+      dict: Port of the target and of each agent
+    """
+    service_time = getattr(request, "param", 0)
+    target_port = _free_port()
+    agent_ports = [_free_port(), _free_port()]
+    processes = [
+        Process(
+            target=serve_target,
+            args=(
+                "127.0.0.1",
+                target_port,
+                {"default": {"service_time": service_time}},
+            ),
+        )
+    ] + [
+        Process(target=serve_agent, args=("127.0.0.1", port, None, AGENT_PROCESSES))
+        for port in agent_ports
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        for port in [target_port] + agent_ports:
+            _wait_port(port)
+        yield {"target": target_port, "agents": agent_ports}
+
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+def _config(ports: dict, concurrent: int) -> dict:
+    return {
+        "data_size": DATA_SIZE,
+        "random_seed": 2022,
+        "cpu_percentage": 100,
+        "concurrency": {
+            "wait_time": 0,
+            "initial": concurrent,
+            "increment": concurrent,
+            "maximum": concurrent,
+        },
+        "rate_per_request": 0,
+        "ramp_up_time": 0,
+        "event": "https",
+        "response_headers": ["function-cache"],
+        "agents": [{"host": "127.0.0.1", "port": port} for port in ports["agents"]],
+        "functions": [
+            {
+                "name": "city-weather",
+                "endpoint": f"http://127.0.0.1:{ports['target']}",
+                "samples": [
+                    {
+                        "path": f"city-weather/{city}",
+                        "method": "GET",
+                        "query_string": None,
+                        "body": None,
+                    }
+                    for city in ["atlanta", "boston", "london"]
+                ],
+            }
+        ],
+    }
+
+
+def test_agents_on_loopback(
+    ports: dict, tmp_path: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Commands received by each agent, recorded on the coordinator side
+    received: dict = {port: [] for port in ports["agents"]}
+
+    def recording_client(address: tuple, authkey: bytes) -> object:
+        channel = Client(address, authkey=authkey)
+        send = channel.send
+
+        def record(message: tuple) -> None:
+            if message[0] == "run":
+                received[address[1]] += message[1]["commands"]
+            send(message)
+
+        setattr(channel, "send", record)
+        return channel
+
+    monkeypatch.setattr(distributed, "Client", recording_client)
+
+    concurrent = 2 * AGENT_PROCESSES
+    config_file = _config(ports, concurrent)
+    exp_dir = str(tmp_path)
+    test_files = fetcher(config_file, exp_dir, generate_sample(config_file))
+
+    assert test_files == [f"test_{concurrent}_concurrency.csv"]
+    test_file = pd.read_csv(os.path.join(exp_dir, test_files[0]))
+    assert len(test_file) == DATA_SIZE
+    assert (test_file["response_status"] == 200).all()
+
+    # Processes are assigned round-robin, each agent runs an equal chunk
+    chunk = DATA_SIZE // concurrent
+    for position, port in enumerate(ports["agents"]):
+        commands = received[port]
+        assert len(commands) == AGENT_PROCESSES
+        assert [(command["start"], command["stop"]) for command in commands] == [
+            (index * chunk, (index + 1) * chunk)
+            for index in range(position, concurrent, len(ports["agents"]))
+        ]
+
+
+@pytest.mark.parametrize("ports", [0.05], indirect=True)
+def test_slo_breach_on_agents(ports: dict, tmp_path: str) -> None:
+    # Every request exceeds the objective, the agents stop once it is checked
+    config_file = _config(ports, 2 * AGENT_PROCESSES) | {
+        "slo": {"p99": 1, "min_requests": 20}
+    }
+    exp_dir = str(tmp_path)
+    test_files = fetcher(config_file, exp_dir, generate_sample(config_file))
+
+    test_file = pd.read_csv(os.path.join(exp_dir, test_files[0]))
+    assert 20 <= len(test_file) < DATA_SIZE
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2022 Joel Corporan
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+# External imports
+import math
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+from ap_faas.traces.providers import aws
+from ap_faas.traces.providers.aws import TARGET_AFTER, TARGET_BEFORE, Traces
+from ap_faas.traces.providers.local.logs import STATS_QUERY, SyntheticLogs
+
+# Experiment start (epoch seconds), duration and records of the log store
+START_TIME = 1_700_000_000
+DURATION = 120
+RECORDS = 1000
+
+# Record limit of a query, low enough to cap every window
+LIMIT_QUOTA = 50
+
+
+def _records(rng: np.random.Generator) -> pd.DataFrame:
+    # Records stamped within the second before a whole second, or exactly on
+    # it, are the ones lost or duplicated by windows sharing a boundary
+    seconds = START_TIME + rng.integers(1, DURATION, RECORDS // 2)
+    timestamps = np.concatenate(
+        [
+            START_TIME + rng.uniform(0, DURATION, RECORDS // 4),
+            seconds[: RECORDS // 4] - 0.001,
+            seconds[RECORDS // 4 :].astype(float),
+        ]
+    )
+
+    return pd.DataFrame(
+        {
+            "timestamp": timestamps,
+            "event_type": "performance",
+            "function_name": "city-weather",
+            "request_id": [str(uuid.uuid4()) for _ in range(len(timestamps))],
+        }
+    )
+
+
+def test_capped_windows(monkeypatch: pytest.MonkeyPatch) -> None:
+    records = _records(np.random.default_rng(2022))
+    logs = SyntheticLogs(records, latency=0)
+
+    # Bin size of every count and record count of every window, per query
+    bins: list = []
+    windows: dict = {}
+    start_query, get_query_results = logs.start_query, logs.get_query_results
+
+    def record_start(**params: object) -> dict:
+        response = start_query(**params)  # type: ignore[arg-type]
+        stats = STATS_QUERY.search(str(params["queryString"]))
+        if stats is not None:
+            bins.append(int(stats.group(2)))
+        else:
+            windows[response["queryId"]] = (params["startTime"], params["endTime"])
+        return response
+
+    def record_results(queryId: str) -> dict:
+        response = get_query_results(queryId)
+        if response["status"] == "Complete" and queryId in windows:
+            windows[queryId] += (len(response["results"]),)
+        return response
+
+    monkeypatch.setattr(logs, "start_query", record_start)
+    monkeypatch.setattr(logs, "get_query_results", record_results)
+
+    traces = Traces(
+        "['city-weather']",
+        {
+            "experimental_results": {
+                "start_time": START_TIME,
+                "end_time": START_TIME + DURATION,
+            }
+        },
+        logs_client=logs,
+    )
+    traces.limit_quota = LIMIT_QUOTA
+    function_traces = traces.get_traces_per_request(LIMIT_QUOTA, 1)
+
+    # Bins of a second exceed the limit, counted again with coarser bins
+    assert bins[0] == 1
+    assert len(bins) == 2 and bins[1] > 1
+
+    # Every record is retrieved once
+    response_ids = [traces["response_id"] for traces in function_traces]
+    assert len(response_ids) == len(records)
+    assert set(response_ids) == set(records["request_id"])
+
+    # Capped windows are split in halves sharing their boundary
+    capped = [
+        (start, end)
+        for start, end, count in windows.values()
+        if count == LIMIT_QUOTA and end - start >= 2
+    ]
+    assert capped
+    queried = {(start, end) for start, end, _ in windows.values()}
+    for start, end in capped:
+        middle = (start + end) // 2
+        assert {(start, middle), (middle, end)} <= queried
+
+
+def test_window_boundaries() -> None:
+    # The end of a window is inclusive down to the record on the second itself
+    records = pd.DataFrame(
+        {
+            "timestamp": [START_TIME - 0.5, START_TIME, START_TIME + 0.5],
+            "event_type": "performance",
+            "function_name": "city-weather",
+            "request_id": ["before", "boundary", "after"],
+        }
+    )
+    logs = SyntheticLogs(records, latency=0)
+
+    query_id = logs.start_query(
+        logGroupName="/aws/lambda-insights",
+        startTime=START_TIME - 1,
+        endTime=START_TIME,
+        queryString="fields request_id",
+        limit=LIMIT_QUOTA,
+    )["queryId"]
+    results = logs.get_query_results(query_id)["results"]
+
+    assert [
+        field["value"]
+        for result in results
+        for field in result
+        if field["field"] == "request_id"
+    ] == ["before", "boundary"]
+
+
+def test_tail_rescans_missing_ranges(monkeypatch: pytest.MonkeyPatch) -> None:
+    records = _records(np.random.default_rng(2022))
+
+    # Records of a few seconds ingested late, after the first scan
+    late = records["timestamp"].between(START_TIME + 30, START_TIME + 35)
+    full_logs = SyntheticLogs(records, latency=0)
+
+    traces = Traces(
+        "['city-weather']",
+        {
+            "experimental_results": {
+                "start_time": START_TIME,
+                "end_time": START_TIME + DURATION,
+            }
+        },
+        logs_client=SyntheticLogs(records[~late], latency=0),
+    )
+    traces.limit_quota = LIMIT_QUOTA
+    scanned_end = math.ceil(traces.end_time.timestamp())
+
+    # Windows queried once the late records are ingested
+    windows: list = []
+    start_query = full_logs.start_query
+
+    def record_start(**params: object) -> dict:
+        windows.append((params["startTime"], params["endTime"]))
+        return start_query(**params)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(full_logs, "start_query", record_start)
+    monkeypatch.setattr(
+        aws.time, "sleep", lambda _: setattr(traces, "cloudwatch_logs", full_logs)
+    )
+
+    function_traces = traces.get_traces_per_request(
+        LIMIT_QUOTA,
+        1,
+        expected=list(zip(records["request_id"], records["timestamp"])),
+    )
+
+    # Every record is retrieved once
+    response_ids = [traces["response_id"] for traces in function_traces]
+    assert len(response_ids) == len(records)
+    assert set(response_ids) == set(records["request_id"])
+
+    # Only the range of the late records and the extension are scanned again
+    assert windows
+    for start, end in windows:
+        assert (
+            START_TIME + 30 - TARGET_BEFORE <= start
+            and end <= START_TIME + 35 + TARGET_AFTER
+        ) or start >= scanned_end